@@ -11,6 +11,28 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = '["http://localhost:5173"]'
     APP_TITLE: str = "UC Davis VMTH Cancer Registry API"
     APP_VERSION: str = "1.0.0"
+    FACET_CACHE_SIZE: int = 512
+    FACET_CACHE_TTL_SECONDS: float = 300.0
+    REPORT_CACHE_MAX_AGE_SECONDS: int = 300
+    CLASSIFIER_POOL_KIND: str = "process"
+    CLASSIFIER_BACKEND: str = "sparse"
+    CLASSIFIER_WORKERS: int = 2
+    CLASSIFIER_QUEUE_SIZE: int = 32
+    CLASSIFIER_TIMEOUT_SECONDS: float = 10.0
+    CLASSIFY_CACHE_SIZE: int = 10_000
+    CLASSIFY_BATCH_MAX_REPORTS: int = 10_000
+    CLASSIFY_BATCH_CHUNK_SIZE: int = 250
+    CLASSIFY_MICRO_BATCH_SIZE: int = 32
+    CLASSIFY_MICRO_BATCH_WAIT_MS: float = 2.0
+    TRANSFORMER_MODEL_DIR: str = "/ml/model/vetbert-onnx"
+    TRANSFORMER_MAX_LENGTH: int = 512
+    TRANSFORMER_BATCH_SIZE: int = 32
+    TRANSFORMER_THREADS: int = 1
+    SIMILAR_INDEX_DIR: str = "/app/data/similar-index"
+    SIMILAR_INDEX_NPROBE: int = 16
+    FUZZY_WORD_SIMILARITY: float = 0.6
+    INGEST_MAX_RECORDS: int = 10_000
+    DATA_CHANGE_LISTENER: bool = True
 
     @property
     def cors_origins_list(self) -> List[str]:
@@ -0,0 +1,180 @@
+"""
+Bulk reclassification of pathology reports.
+
+Streams every report whose classifier_version differs from the current
+classifier through a server-side cursor in (report_date, id) order, scores
+batches in parallel worker processes and writes each batch back with COPY into
+a staging table followed by a single UPDATE ... FROM. After every batch the
+last written key is checkpointed in the same transaction, so an interrupted
+run resumes after the last committed batch, and the reports data version is
+bumped so the API's cached report facets are invalidated.
+
+Usage (from backend/):
+    python -m app.jobs.reclassify [--batch-size 5000] [--workers 4] [--restart]
+"""
+
+import io
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+import psycopg2
+
+from app.config import settings
+from app.services.classifier_pool import CLASSIFIER_BACKENDS, backend_version
+
+# (id, report_date, report_text) in, (id, report_date, classification, confidence) out
+ReportRow = Tuple[int, object, str]
+ScoredRow = Tuple[int, object, str, float]
+
+_classifier = None
+
+
+def _init_worker(backend: str) -> None:
+    global _classifier
+    _classifier = CLASSIFIER_BACKENDS[backend]()
+
+
+def score_batch(rows: List[ReportRow]) -> List[ScoredRow]:
+    texts = [text for _, _, text in rows]
+    if hasattr(_classifier, "classify_batch"):
+        results = _classifier.classify_batch(texts)
+    else:
+        results = [_classifier.classify(text) for text in texts]
+    return [
+        (report_id, report_date, result.predicted_cancer_type, result.confidence)
+        for (report_id, report_date, _), result in zip(rows, results)
+    ]
+
+
+def load_checkpoint(cur, version: str, restart: bool):
+    """Resume position for this version, or None to start from the beginning."""
+    if restart:
+        cur.execute("DELETE FROM reclassification_checkpoints WHERE classifier_version = %s", (version,))
+    cur.execute(
+        """INSERT INTO reclassification_checkpoints (classifier_version) VALUES (%s)
+           ON CONFLICT (classifier_version) DO NOTHING""",
+        (version,)
+    )
+    cur.execute(
+        """SELECT last_report_date, last_id, processed FROM reclassification_checkpoints
+           WHERE classifier_version = %s""",
+        (version,)
+    )
+    last_date, last_id, processed = cur.fetchone()
+    return ((last_date, last_id) if last_id is not None else None), processed
+
+
+def write_batch(conn, scored: List[ScoredRow], version: str) -> int:
+    """COPY a scored batch into staging, apply it and advance the checkpoint atomically."""
+    buffer = io.StringIO()
+    for report_id, report_date, classification, confidence in scored:
+        buffer.write(f"{report_id}\t{report_date.isoformat()}\t{classification}\t{confidence}\n")
+    buffer.seek(0)
+
+    last_id, last_date = scored[-1][0], scored[-1][1]
+    with conn.cursor() as cur:
+        cur.copy_expert(
+            "COPY reclassify_stage (id, report_date, classification, confidence_score) FROM STDIN",
+            buffer,
+        )
+        cur.execute(
+            """UPDATE pathology_reports p
+               SET classification = s.classification,
+                   confidence_score = s.confidence_score,
+                   classifier_version = %s
+               FROM reclassify_stage s
+               WHERE p.id = s.id AND p.report_date = s.report_date""",
+            (version,)
+        )
+        updated = cur.rowcount
+        cur.execute(
+            """UPDATE reclassification_checkpoints
+               SET last_report_date = %s, last_id = %s, processed = processed + %s, updated_at = now()
+               WHERE classifier_version = %s""",
+            (last_date, last_id, len(scored), version)
+        )
+        # Committed with the batch: every API worker drops its cached report facets
+        cur.execute("SELECT bump_data_versions(ARRAY['reports'])")
+    # The staging table is ON COMMIT DELETE ROWS, so every batch starts empty
+    conn.commit()
+    return updated
+
+
+def run(batch_size: int = 5000, workers: int = 4, restart: bool = False,
+        backend: str = settings.CLASSIFIER_BACKEND):
+    version = backend_version(backend)
+    read_conn = psycopg2.connect(settings.DATABASE_URL_SYNC)
+    write_conn = psycopg2.connect(settings.DATABASE_URL_SYNC)
+
+    with write_conn.cursor() as cur:
+        position, processed = load_checkpoint(cur, version, restart)
+        cur.execute(
+            """CREATE TEMP TABLE reclassify_stage (
+                   id INTEGER, report_date DATE,
+                   classification VARCHAR(100), confidence_score NUMERIC(5, 4)
+               ) ON COMMIT DELETE ROWS"""
+        )
+    write_conn.commit()
+    if position:
+        print(f"Resuming {version} after report {position[1]} ({position[0]}), {processed} already done")
+    else:
+        print(f"Reclassifying stale reports with {version}")
+
+    # Named cursor: rows are fetched from the server batch_size at a time
+    reader = read_conn.cursor(name="reclassify_reports")
+    reader.itersize = batch_size
+    query = """SELECT id, report_date, report_text FROM pathology_reports
+               WHERE classifier_version IS DISTINCT FROM %s"""
+    params: list = [version]
+    if position:
+        query += " AND (report_date, id) > (%s, %s)"
+        params += list(position)
+    reader.execute(query + " ORDER BY report_date, id", params)
+
+    started = time.perf_counter()
+    done = updated = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(backend,)) as pool:
+        # Batches are written in submission order so the checkpoint only ever moves forward
+        in_flight: deque = deque()
+        while True:
+            rows = reader.fetchmany(batch_size)
+            if rows:
+                in_flight.append(pool.submit(score_batch, rows))
+            if in_flight and (not rows or len(in_flight) >= workers * 2):
+                scored = in_flight.popleft().result()
+                updated += write_batch(write_conn, scored, version)
+                done += len(scored)
+                rate = done / (time.perf_counter() - started)
+                print(f"  {processed + done} reports ({rate:,.0f}/s)")
+            elif not rows:
+                break
+
+    reader.close()
+    read_conn.close()
+
+    with write_conn.cursor() as cur:
+        # A finished run clears its position: the next run only scans for new stale rows
+        cur.execute(
+            """UPDATE reclassification_checkpoints
+               SET last_report_date = NULL, last_id = NULL, finished_at = now(), updated_at = now()
+               WHERE classifier_version = %s""",
+            (version,)
+        )
+    write_conn.commit()
+    write_conn.close()
+    print(f"Done: {done} reports scored, {updated} rows updated in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reclassify pathology reports scored by an older classifier.")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Reports per batch (default: 5000)")
+    parser.add_argument("--workers", type=int, default=4, help="Classifier processes (default: 4)")
+    parser.add_argument("--backend", choices=sorted(CLASSIFIER_BACKENDS), default=settings.CLASSIFIER_BACKEND,
+                        help="Classifier implementation; keyword and sparse give identical results")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignore the saved checkpoint and scan from the beginning")
+    args = parser.parse_args()
+    run(batch_size=args.batch_size, workers=args.workers, restart=args.restart, backend=args.backend)
@@ -0,0 +1,87 @@
+"""
+Build or extend the similar-report index.
+
+With --rebuild, IDF weights and IVF centroids are fitted on a random sample
+of reports and every report is embedded into a new build, which replaces the
+served index once it is published. Without it, only reports with an id above
+the highest indexed id are embedded and appended, so the job can run after
+every seed or ingest; running API workers pick the new rows up on their next
+similar-report request.
+
+Usage (from backend/):
+    python -m app.jobs.similar_index [--rebuild] [--batch-size 20000] [--sample 50000]
+"""
+
+import time
+import argparse
+
+import numpy as np
+import psycopg2
+
+from app.config import settings
+from app.services import similar_index
+from app.services.similar_index import SimilarIndex
+
+
+def fit(conn, sample: int, nlist: int):
+    """IDF weights and centroids from a random sample of reports."""
+    with conn.cursor() as cur:
+        cur.execute("SELECT report_text FROM pathology_reports ORDER BY random() LIMIT %s", (sample,))
+        texts = [row[0] for row in cur.fetchall()]
+    if not texts:
+        raise SystemExit("No reports to index")
+    counts = similar_index.term_counts(texts)
+    idf = similar_index.fit_idf(counts)
+    vectors = similar_index.embed(texts, idf)
+    if not nlist:
+        with conn.cursor() as cur:
+            cur.execute("SELECT count(*) FROM pathology_reports")
+            nlist = int(np.sqrt(cur.fetchone()[0]))
+    centroids = similar_index.train_centroids(vectors, min(nlist, len(texts)))
+    print(f"Fitted IDF and {len(centroids)} lists on {len(texts)} sampled reports")
+    return idf, centroids
+
+
+def run(rebuild: bool = False, batch_size: int = 20_000, sample: int = 50_000, nlist: int = 0):
+    conn = psycopg2.connect(settings.DATABASE_URL_SYNC)
+    started = time.perf_counter()
+
+    index = None if rebuild else SimilarIndex.open(settings.SIMILAR_INDEX_DIR)
+    rebuilding = index is None
+    if rebuilding:
+        idf, centroids = fit(conn, sample, nlist)
+        index = SimilarIndex.create(settings.SIMILAR_INDEX_DIR, centroids, idf)
+    after = index.max_id
+    print(f"Indexing reports with id > {after} ({index.count} already indexed)")
+
+    # Named cursor: rows are fetched from the server batch_size at a time
+    reader = conn.cursor(name="similar_index_reports")
+    reader.itersize = batch_size
+    reader.execute("SELECT id, report_text FROM pathology_reports WHERE id > %s ORDER BY id", (after,))
+    added = 0
+    while True:
+        rows = reader.fetchmany(batch_size)
+        if not rows:
+            break
+        # A rebuild stays invisible to the API until every report is in it
+        index.add([r[0] for r in rows], similar_index.embed([r[1] for r in rows], index.idf),
+                  publish=not rebuilding)
+        added += len(rows)
+        print(f"  {index.count} reports ({added / (time.perf_counter() - started):,.0f}/s)")
+    index.publish()
+    reader.close()
+    conn.close()
+    print(f"Done: {added} reports added, {index.count} indexed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or extend the similar-report index.")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="Refit IDF and centroids and re-embed every report")
+    parser.add_argument("--batch-size", type=int, default=20_000, help="Reports per batch (default: 20000)")
+    parser.add_argument("--sample", type=int, default=50_000,
+                        help="Reports sampled to fit IDF and centroids (default: 50000)")
+    parser.add_argument("--nlist", type=int, default=0,
+                        help="IVF lists (default: square root of the report count)")
+    args = parser.parse_args()
+    run(rebuild=args.rebuild, batch_size=args.batch_size, sample=args.sample, nlist=args.nlist)
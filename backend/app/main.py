@@ -1,15 +1,31 @@
 """FastAPI application entry point for the VMTH Cancer Registry."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.routers import dashboard, incidence, geo, trends, search
+from app.routers import dashboard, incidence, geo, trends, search, demographics, ingest
+from app.services.data_changes import DataChangeListener
+
+data_change_listener = DataChangeListener(settings.DATABASE_URL)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.DATA_CHANGE_LISTENER:
+        await data_change_listener.start()
+    yield
+    await data_change_listener.stop()
+    search.classifier_pool.shutdown()
+
 
 app = FastAPI(
     title=settings.APP_TITLE,
     version=settings.APP_VERSION,
     description="UC Davis Veterinary Medical Teaching Hospital Cancer Registry API",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -25,6 +41,8 @@ app.include_router(incidence.router)
 app.include_router(geo.router)
 app.include_router(trends.router)
 app.include_router(search.router)
+app.include_router(demographics.router)
+app.include_router(ingest.router)
 
 
 @app.get("/")
@@ -1 +1,4 @@
-from app.models.models import Species, Breed, CancerType, County, Patient, CancerCase, PathologyReport
+from app.models.models import (
+    Species, Breed, CancerType, County, Patient, CancerCase, PathologyReport, FactCase,
+    DemographicSketchBin, ReportClassificationCount, ReportFeatures
+)
@@ -1,9 +1,11 @@
 """SQLAlchemy + GeoAlchemy2 models for the VMTH Cancer Registry."""
 
 from sqlalchemy import (
-    Column, Integer, String, Numeric, Date, Text, ForeignKey, CheckConstraint
+    Column, Integer, SmallInteger, BigInteger, String, Numeric, Date, Text, Boolean, ForeignKey,
+    CheckConstraint, Computed
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from geoalchemy2 import Geometry
 
 from app.database import Base
@@ -98,5 +100,71 @@ class PathologyReport(Base):
     classification = Column(String(100))
     confidence_score = Column(Numeric(5, 4))
     report_date = Column(Date, nullable=False)
+    classifier_version = Column(String(64))
+    report_tsv = deferred(Column(
+        TSVECTOR, Computed("to_tsvector('vet_oncology'::regconfig, report_text)", persisted=True)
+    ))
 
     case = relationship("CancerCase", back_populates="reports")
+
+
+class ReportFeatures(Base):
+    """Grading and prognostic values parsed from a report's text by database triggers.
+
+    Codes: patnaik_grade and ckit_pattern 1-3, kiupel_grade 1 = low / 2 = high,
+    margin_status 1 = clean / 2 = narrow / 3 = incomplete; NULL when not stated.
+    """
+
+    __tablename__ = "report_features"
+
+    report_id = Column(Integer, primary_key=True)
+    report_date = Column(Date, nullable=False)
+    patnaik_grade = Column(SmallInteger)
+    kiupel_grade = Column(SmallInteger)
+    mitotic_index = Column(SmallInteger)
+    ki67_percent = Column(Numeric(5, 2))
+    margin_status = Column(SmallInteger)
+    margin_mm = Column(Numeric(5, 1))
+    ckit_pattern = Column(SmallInteger)
+    tumor_size_cm = Column(Numeric(6, 1))
+    extractor_version = Column(SmallInteger, nullable=False)
+
+
+class FactCase(Base):
+    """Denormalized analytic row per case, kept in sync by database triggers."""
+
+    __tablename__ = "fact_cases"
+
+    case_id = Column(Integer, primary_key=True)
+    species_id = Column(SmallInteger, nullable=False)
+    breed_id = Column(SmallInteger, nullable=False)
+    sex = Column(SmallInteger, nullable=False)
+    is_neutered = Column(Boolean, nullable=False)
+    county_id = Column(SmallInteger, nullable=False)
+    cancer_type_id = Column(SmallInteger, nullable=False)
+    stage = Column(SmallInteger)
+    outcome = Column(SmallInteger)
+    diagnosis_year = Column(SmallInteger, primary_key=True)
+    diagnosis_month = Column(SmallInteger, nullable=False)
+
+
+class DemographicSketchBin(Base):
+    """One DDSketch bucket count of patient age or weight for a cube cell."""
+
+    __tablename__ = "demographic_sketch_bins"
+
+    metric = Column(SmallInteger, primary_key=True)
+    species_id = Column(SmallInteger, primary_key=True)
+    breed_id = Column(SmallInteger, primary_key=True)
+    cancer_type_id = Column(SmallInteger, primary_key=True)
+    bucket = Column(SmallInteger, primary_key=True)
+    count = Column(BigInteger, nullable=False)
+
+
+class ReportClassificationCount(Base):
+    """Trigger-maintained number of reports per classification ('' = unclassified)."""
+
+    __tablename__ = "report_classification_counts"
+
+    classification = Column(String(100), primary_key=True)
+    report_count = Column(BigInteger, nullable=False)
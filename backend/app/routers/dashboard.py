@@ -1,22 +1,31 @@
 """Dashboard summary endpoints."""
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select, func
+from sqlalchemy import text, select, func, and_, tuple_
+from typing import Optional, List
 
+from app.config import settings
 from app.database import get_db
-from app.schemas.schemas import DashboardSummary, SpeciesBreakdown, TopCancer, FilterOptions
+from app.schemas.schemas import (
+    DashboardSummary, SpeciesBreakdown, TopCancer, FilterOptions, FacetCounts, FacetOption
+)
 from app.models.models import (
-    Species, Breed, CancerType, County, Patient, CancerCase
+    Species, Breed, CancerType, County, Patient, FactCase
 )
+from app.services.cache import LRUCache, filter_hash, data_version, register_data_cache
+from app.services.fact_service import fact_conditions
 
 router = APIRouter(prefix="/api/v1/dashboard", tags=["dashboard"])
 
+facet_cache = register_data_cache(
+    "cases", LRUCache(maxsize=settings.FACET_CACHE_SIZE, ttl=settings.FACET_CACHE_TTL_SECONDS))
+
 
 @router.get("/summary", response_model=DashboardSummary)
 async def get_summary(db: AsyncSession = Depends(get_db)):
     # Total cases
-    result = await db.execute(select(func.count(CancerCase.id)))
+    result = await db.execute(select(func.count()).select_from(FactCase))
     total_cases = result.scalar() or 0
 
     # Total patients
@@ -25,16 +34,13 @@ async def get_summary(db: AsyncSession = Depends(get_db)):
 
     # Total counties with cases
     result = await db.execute(
-        select(func.count(func.distinct(CancerCase.county_id)))
+        select(func.count(func.distinct(FactCase.county_id)))
     )
     total_counties = result.scalar() or 0
 
     # Year range
     result = await db.execute(
-        select(
-            func.min(func.extract("year", CancerCase.diagnosis_date)),
-            func.max(func.extract("year", CancerCase.diagnosis_date))
-        )
+        select(func.min(FactCase.diagnosis_year), func.max(FactCase.diagnosis_year))
     )
     row = result.one()
     year_range = [int(row[0] or 2015), int(row[1] or 2024)]
@@ -43,12 +49,12 @@ async def get_summary(db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(
             Species.name,
-            func.count(CancerCase.id).label("cnt")
+            func.count().label("cnt")
         )
-        .join(Patient, Patient.id == CancerCase.patient_id)
-        .join(Species, Species.id == Patient.species_id)
+        .select_from(FactCase)
+        .join(Species, Species.id == FactCase.species_id)
         .group_by(Species.name)
-        .order_by(func.count(CancerCase.id).desc())
+        .order_by(func.count().desc())
     )
     species_rows = result.all()
     species_breakdown = [
@@ -64,11 +70,12 @@ async def get_summary(db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(
             CancerType.name,
-            func.count(CancerCase.id).label("cnt")
+            func.count().label("cnt")
         )
-        .join(CancerCase, CancerCase.cancer_type_id == CancerType.id)
+        .select_from(FactCase)
+        .join(CancerType, FactCase.cancer_type_id == CancerType.id)
         .group_by(CancerType.name)
-        .order_by(func.count(CancerCase.id).desc())
+        .order_by(func.count().desc())
         .limit(8)
     )
     top_cancers = [TopCancer(cancer_type=name, count=cnt) for name, cnt in result.all()]
@@ -77,11 +84,12 @@ async def get_summary(db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(
             County.name,
-            func.count(CancerCase.id).label("cnt")
+            func.count().label("cnt")
         )
-        .join(CancerCase, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(County, FactCase.county_id == County.id)
         .group_by(County.name)
-        .order_by(func.count(CancerCase.id).desc())
+        .order_by(func.count().desc())
         .limit(1)
     )
     top_county_row = result.first()
@@ -108,10 +116,7 @@ async def get_filter_options(db: AsyncSession = Depends(get_db)):
     breeds = (await db.execute(select(Breed).order_by(Breed.name))).scalars().all()
 
     result = await db.execute(
-        select(
-            func.min(func.extract("year", CancerCase.diagnosis_date)),
-            func.max(func.extract("year", CancerCase.diagnosis_date))
-        )
+        select(func.min(FactCase.diagnosis_year), func.max(FactCase.diagnosis_year))
     )
     row = result.one()
     year_range = [int(row[0] or 2015), int(row[1] or 2024)]
@@ -123,3 +128,90 @@ async def get_filter_options(db: AsyncSession = Depends(get_db)):
         breeds=breeds,
         year_range=year_range,
     )
+
+
+@router.get("/facets", response_model=FacetCounts)
+async def get_facets(
+    species: Optional[List[str]] = Query(None),
+    cancer_type: Optional[List[str]] = Query(None),
+    county: Optional[List[str]] = Query(None),
+    breed: Optional[List[str]] = Query(None),
+    year_start: Optional[int] = None,
+    year_end: Optional[int] = None,
+    sex: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Count every option of every facet under the other facets' filters.
+
+    One GROUPING SETS scan over fact_cases: each facet's counts are a FILTERed
+    aggregate that leaves out that facet's own selection, so picking a species
+    still shows how many cases every other species would have.
+    """
+    key = (filter_hash(species=species, cancer_type=cancer_type, county=county, breed=breed,
+                       year_start=year_start, year_end=year_end, sex=sex), data_version("cases"))
+    cached = facet_cache.get(key)
+    if cached is not None:
+        return cached
+
+    own = {
+        "species": fact_conditions(species=species),
+        "cancer_type": fact_conditions(cancer_type=cancer_type),
+        "county": fact_conditions(county=county),
+        "breed": fact_conditions(breed=breed),
+    }
+
+    def count_without(dimension: Optional[str]):
+        conditions = [c for dim, conds in own.items() if dim != dimension for c in conds]
+        return func.count().filter(and_(*conditions)) if conditions else func.count()
+
+    stmt = (
+        select(
+            FactCase.species_id,
+            FactCase.cancer_type_id,
+            FactCase.county_id,
+            FactCase.breed_id,
+            count_without("species").label("n_species"),
+            count_without("cancer_type").label("n_cancer_type"),
+            count_without("county").label("n_county"),
+            count_without("breed").label("n_breed"),
+            count_without(None).label("n_all"),
+        )
+        .where(*fact_conditions(year_start=year_start, year_end=year_end, sex=sex))
+        .group_by(func.grouping_sets(
+            tuple_(FactCase.species_id),
+            tuple_(FactCase.cancer_type_id),
+            tuple_(FactCase.county_id),
+            tuple_(FactCase.breed_id),
+        ))
+    )
+    rows = (await db.execute(stmt)).all()
+
+    counts: dict[str, dict[int, int]] = {"species": {}, "cancer_type": {}, "county": {}, "breed": {}}
+    total = 0
+    for r in rows:
+        if r.species_id is not None:
+            counts["species"][r.species_id] = r.n_species
+            total += r.n_all
+        elif r.cancer_type_id is not None:
+            counts["cancer_type"][r.cancer_type_id] = r.n_cancer_type
+        elif r.county_id is not None:
+            counts["county"][r.county_id] = r.n_county
+        else:
+            counts["breed"][r.breed_id] = r.n_breed
+
+    async def options(model, dimension: str) -> list[FacetOption]:
+        result = await db.execute(select(model.id, model.name).order_by(model.name))
+        return [
+            FacetOption(id=id_, name=name, count=counts[dimension].get(id_, 0))
+            for id_, name in result.all()
+        ]
+
+    facets = FacetCounts(
+        total=total,
+        species=await options(Species, "species"),
+        cancer_types=await options(CancerType, "cancer_type"),
+        counties=await options(County, "county"),
+        breeds=await options(Breed, "breed"),
+    )
+    facet_cache.set(key, facets)
+    return facets
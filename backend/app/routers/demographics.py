@@ -0,0 +1,95 @@
+"""Patient age and weight demographics served from merged quantile sketches."""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+from typing import Optional, List, Literal
+
+from app.database import get_db
+from app.models.models import DemographicSketchBin, Species, Breed, CancerType
+from app.schemas.schemas import (
+    DemographicsResponse, DemographicGroup, MetricSummary, QuantilePoint, HistogramBin
+)
+from app.services.sketch import DDSketch, RELATIVE_ACCURACY, METRIC_AGE, METRIC_WEIGHT
+
+router = APIRouter(prefix="/api/v1/demographics", tags=["demographics"])
+
+QUANTILES = [0.05, 0.25, 0.5, 0.75, 0.95]
+AGE_EDGES = list(range(0, 22, 1))
+WEIGHT_EDGES = list(range(0, 85, 5))
+
+GROUP_DIMENSIONS = {
+    "species": (Species, DemographicSketchBin.species_id),
+    "breed": (Breed, DemographicSketchBin.breed_id),
+    "cancer_type": (CancerType, DemographicSketchBin.cancer_type_id),
+}
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+def _summarize(sketch: DDSketch, edges: List[int]) -> MetricSummary:
+    return MetricSummary(
+        count=sketch.count,
+        mean=_round(sketch.mean()),
+        quantiles=[QuantilePoint(q=q, value=_round(sketch.quantile(q))) for q in QUANTILES],
+        histogram=[
+            HistogramBin(lower=lo, upper=hi, count=c) for lo, hi, c in sketch.histogram(edges)
+        ],
+    )
+
+
+@router.get("", response_model=DemographicsResponse)
+async def get_demographics(
+    species: Optional[List[str]] = Query(None),
+    breed: Optional[List[str]] = Query(None),
+    cancer_type: Optional[List[str]] = Query(None),
+    group_by: Optional[Literal["species", "breed", "cancer_type"]] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    columns = [
+        DemographicSketchBin.metric,
+        DemographicSketchBin.bucket,
+        func.sum(DemographicSketchBin.count).label("count"),
+    ]
+    group_columns = [DemographicSketchBin.metric, DemographicSketchBin.bucket]
+    stmt = select(*columns)
+    if group_by:
+        model, key = GROUP_DIMENSIONS[group_by]
+        stmt = (
+            select(model.name.label("grp"), *columns)
+            .select_from(DemographicSketchBin)
+            .join(model, key == model.id)
+        )
+        group_columns.insert(0, model.name)
+
+    if species:
+        stmt = stmt.where(DemographicSketchBin.species_id.in_(
+            select(Species.id).where(Species.name.in_(species))))
+    if breed:
+        stmt = stmt.where(DemographicSketchBin.breed_id.in_(
+            select(Breed.id).where(Breed.name.in_(breed))))
+    if cancer_type:
+        stmt = stmt.where(DemographicSketchBin.cancer_type_id.in_(
+            select(CancerType.id).where(CancerType.name.in_(cancer_type))))
+
+    stmt = stmt.group_by(*group_columns)
+    result = await db.execute(stmt)
+
+    # Merge the cells' sketches per group and metric
+    sketches: dict[str, dict[int, DDSketch]] = {}
+    for r in result.all():
+        group = r.grp if group_by else "All"
+        per_metric = sketches.setdefault(group, {METRIC_AGE: DDSketch(), METRIC_WEIGHT: DDSketch()})
+        per_metric[r.metric].add_bucket(r.bucket, int(r.count))
+
+    groups = [
+        DemographicGroup(
+            group=name,
+            age_years=_summarize(per_metric[METRIC_AGE], AGE_EDGES),
+            weight_kg=_summarize(per_metric[METRIC_WEIGHT], WEIGHT_EDGES),
+        )
+        for name, per_metric in sorted(sketches.items())
+    ]
+    return DemographicsResponse(group_by=group_by, groups=groups, relative_accuracy=RELATIVE_ACCURACY)
@@ -2,16 +2,17 @@
 
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text, select, func
+from sqlalchemy import select, func, cast, Integer
+from sqlalchemy.dialects.postgresql import JSON
 from typing import Optional, List
-import json
 
 from app.database import get_db
-from app.models.models import County, CancerCase, CancerType, Patient, Species
+from app.models.models import County, FactCase, CancerType, Species
 from app.schemas.schemas import (
     GeoJSONResponse, GeoJSONFeature, GeoJSONFeatureProperties,
     CountyDetail, CountyOut, TopCancer, SpeciesBreakdown
 )
+from app.services.fact_service import fact_conditions
 
 router = APIRouter(prefix="/api/v1/geo", tags=["geo"])
 
@@ -25,61 +26,47 @@ async def get_counties_geojson(
     sex: Optional[str] = None,
     db: AsyncSession = Depends(get_db),
 ):
-    # Build dynamic WHERE clause
-    conditions = []
-    params = {}
-    if species:
-        conditions.append("s.name = ANY(:species)")
-        params["species"] = species
-    if cancer_type:
-        conditions.append("ct.name = ANY(:cancer_type)")
-        params["cancer_type"] = cancer_type
-    if year_start:
-        conditions.append("EXTRACT(YEAR FROM cc.diagnosis_date) >= :year_start")
-        params["year_start"] = year_start
-    if year_end:
-        conditions.append("EXTRACT(YEAR FROM cc.diagnosis_date) <= :year_end")
-        params["year_end"] = year_end
-    if sex and sex != "All":
-        conditions.append("p.sex ILIKE :sex")
-        params["sex"] = f"%{sex}%"
-
-    where_clause = " AND ".join(conditions) if conditions else "1=1"
-
-    query = text(f"""
-        SELECT
-            c.id,
-            c.name,
-            c.fips_code,
-            c.population,
-            ST_AsGeoJSON(c.geom)::json AS geometry,
-            COALESCE(case_counts.total, 0) AS total_cases,
-            case_counts.top_cancer
-        FROM counties c
-        LEFT JOIN (
-            SELECT
-                cc.county_id,
-                COUNT(*) AS total,
-                (SELECT ct2.name
-                 FROM cancer_cases cc2
-                 JOIN cancer_types ct2 ON cc2.cancer_type_id = ct2.id
-                 WHERE cc2.county_id = cc.county_id
-                 GROUP BY ct2.name
-                 ORDER BY COUNT(*) DESC
-                 LIMIT 1
-                ) AS top_cancer
-            FROM cancer_cases cc
-            JOIN patients p ON cc.patient_id = p.id
-            JOIN species s ON p.species_id = s.id
-            JOIN cancer_types ct ON cc.cancer_type_id = ct.id
-            WHERE {where_clause}
-            GROUP BY cc.county_id
-        ) case_counts ON c.id = case_counts.county_id
-        WHERE c.geom IS NOT NULL
-        ORDER BY c.name
-    """)
-
-    result = await db.execute(query, params)
+    # One pass over the filtered facts: counts per (county, cancer type),
+    # from which both the county totals and the top cancer are derived
+    counts = (
+        select(
+            FactCase.county_id,
+            FactCase.cancer_type_id,
+            func.count().label("n"),
+        )
+        .where(*fact_conditions(species, cancer_type, None, year_start, year_end, sex))
+        .group_by(FactCase.county_id, FactCase.cancer_type_id)
+        .cte("counts")
+    )
+    totals = (
+        select(counts.c.county_id, cast(func.sum(counts.c.n), Integer).label("total"))
+        .group_by(counts.c.county_id)
+        .subquery("totals")
+    )
+    top = (
+        select(counts.c.county_id, CancerType.name.label("top_cancer"))
+        .join(CancerType, counts.c.cancer_type_id == CancerType.id)
+        .distinct(counts.c.county_id)
+        .order_by(counts.c.county_id, counts.c.n.desc(), CancerType.name)
+        .subquery("top")
+    )
+    query = (
+        select(
+            County.id,
+            County.name,
+            County.fips_code,
+            County.population,
+            cast(func.ST_AsGeoJSON(County.geom), JSON).label("geometry"),
+            func.coalesce(totals.c.total, 0).label("total_cases"),
+            top.c.top_cancer,
+        )
+        .outerjoin(totals, County.id == totals.c.county_id)
+        .outerjoin(top, County.id == top.c.county_id)
+        .where(County.geom.isnot(None))
+        .order_by(County.name)
+    )
+
+    result = await db.execute(query)
     rows = result.all()
 
     features = []
@@ -118,28 +105,29 @@ async def get_county_detail(
 
     # Total cases
     result = await db.execute(
-        select(func.count(CancerCase.id)).where(CancerCase.county_id == county_id)
+        select(func.count()).select_from(FactCase).where(FactCase.county_id == county_id)
     )
     total_cases = result.scalar() or 0
 
     # Cancer breakdown
     result = await db.execute(
-        select(CancerType.name, func.count(CancerCase.id).label("cnt"))
-        .join(CancerCase, CancerCase.cancer_type_id == CancerType.id)
-        .where(CancerCase.county_id == county_id)
+        select(CancerType.name, func.count().label("cnt"))
+        .select_from(FactCase)
+        .join(CancerType, FactCase.cancer_type_id == CancerType.id)
+        .where(FactCase.county_id == county_id)
         .group_by(CancerType.name)
-        .order_by(func.count(CancerCase.id).desc())
+        .order_by(func.count().desc())
     )
     cancer_breakdown = [TopCancer(cancer_type=name, count=cnt) for name, cnt in result.all()]
 
     # Species breakdown
     result = await db.execute(
-        select(Species.name, func.count(CancerCase.id).label("cnt"))
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .where(CancerCase.county_id == county_id)
+        select(Species.name, func.count().label("cnt"))
+        .select_from(FactCase)
+        .join(Species, FactCase.species_id == Species.id)
+        .where(FactCase.county_id == county_id)
         .group_by(Species.name)
-        .order_by(func.count(CancerCase.id).desc())
+        .order_by(func.count().desc())
     )
     species_rows = result.all()
     species_breakdown = [
@@ -153,12 +141,12 @@ async def get_county_detail(
     # Yearly trend
     result = await db.execute(
         select(
-            func.extract("year", CancerCase.diagnosis_date).label("year"),
-            func.count(CancerCase.id).label("count")
+            FactCase.diagnosis_year.label("year"),
+            func.count().label("count")
         )
-        .where(CancerCase.county_id == county_id)
-        .group_by(func.extract("year", CancerCase.diagnosis_date))
-        .order_by(func.extract("year", CancerCase.diagnosis_date))
+        .where(FactCase.county_id == county_id)
+        .group_by(FactCase.diagnosis_year)
+        .order_by(FactCase.diagnosis_year)
     )
     yearly_trend = [{"year": int(r.year), "count": r.count} for r in result.all()]
 
@@ -6,31 +6,13 @@ from sqlalchemy import select, func
 from typing import Optional, List
 
 from app.database import get_db
-from app.models.models import CancerCase, CancerType, Patient, Species, Breed, County
+from app.models.models import FactCase, CancerType, Species, Breed, County
 from app.schemas.schemas import IncidenceRecord, IncidenceResponse
+from app.services.fact_service import fact_conditions
 
 router = APIRouter(prefix="/api/v1/incidence", tags=["incidence"])
 
 
-def _apply_filters(stmt, species: Optional[List[str]], cancer_type: Optional[List[str]],
-                   county: Optional[List[str]], year_start: Optional[int],
-                   year_end: Optional[int], sex: Optional[str]):
-    """Apply common filters to a query statement."""
-    if species:
-        stmt = stmt.where(Species.name.in_(species))
-    if cancer_type:
-        stmt = stmt.where(CancerType.name.in_(cancer_type))
-    if county:
-        stmt = stmt.where(County.name.in_(county))
-    if year_start:
-        stmt = stmt.where(func.extract("year", CancerCase.diagnosis_date) >= year_start)
-    if year_end:
-        stmt = stmt.where(func.extract("year", CancerCase.diagnosis_date) <= year_end)
-    if sex and sex != "All":
-        stmt = stmt.where(Patient.sex.ilike(f"%{sex}%"))
-    return stmt
-
-
 @router.get("", response_model=IncidenceResponse)
 async def get_incidence(
     species: Optional[List[str]] = Query(None),
@@ -46,19 +28,18 @@ async def get_incidence(
             CancerType.name.label("cancer_type"),
             County.name.label("county"),
             Species.name.label("species"),
-            func.extract("year", CancerCase.diagnosis_date).label("year"),
-            func.count(CancerCase.id).label("count"),
+            FactCase.diagnosis_year.label("year"),
+            func.count().label("count"),
         )
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(County, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(CancerType, FactCase.cancer_type_id == CancerType.id)
+        .join(Species, FactCase.species_id == Species.id)
+        .join(County, FactCase.county_id == County.id)
+        .where(*fact_conditions(species, cancer_type, county, year_start, year_end, sex))
     )
-    stmt = _apply_filters(stmt, species, cancer_type, county, year_start, year_end, sex)
     stmt = stmt.group_by(
-        CancerType.name, County.name, Species.name,
-        func.extract("year", CancerCase.diagnosis_date)
-    ).order_by(func.count(CancerCase.id).desc())
+        CancerType.name, County.name, Species.name, FactCase.diagnosis_year
+    ).order_by(func.count().desc())
 
     result = await db.execute(stmt)
     rows = result.all()
@@ -93,15 +74,13 @@ async def get_incidence_by_cancer_type(
     stmt = (
         select(
             CancerType.name.label("cancer_type"),
-            func.count(CancerCase.id).label("count"),
+            func.count().label("count"),
         )
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(County, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(CancerType, FactCase.cancer_type_id == CancerType.id)
+        .where(*fact_conditions(species, None, county, year_start, year_end, sex))
     )
-    stmt = _apply_filters(stmt, species, None, county, year_start, year_end, sex)
-    stmt = stmt.group_by(CancerType.name).order_by(func.count(CancerCase.id).desc())
+    stmt = stmt.group_by(CancerType.name).order_by(func.count().desc())
 
     result = await db.execute(stmt)
     data = [IncidenceRecord(cancer_type=r.cancer_type, count=r.count) for r in result.all()]
@@ -125,15 +104,13 @@ async def get_incidence_by_species(
     stmt = (
         select(
             Species.name.label("species"),
-            func.count(CancerCase.id).label("count"),
+            func.count().label("count"),
         )
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(County, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(Species, FactCase.species_id == Species.id)
+        .where(*fact_conditions(None, cancer_type, county, year_start, year_end, sex))
     )
-    stmt = _apply_filters(stmt, None, cancer_type, county, year_start, year_end, sex)
-    stmt = stmt.group_by(Species.name).order_by(func.count(CancerCase.id).desc())
+    stmt = stmt.group_by(Species.name).order_by(func.count().desc())
 
     result = await db.execute(stmt)
     data = [IncidenceRecord(species=r.species, count=r.count, cancer_type="All") for r in result.all()]
@@ -159,16 +136,14 @@ async def get_incidence_by_breed(
         select(
             Breed.name.label("breed"),
             Species.name.label("species"),
-            func.count(CancerCase.id).label("count"),
+            func.count().label("count"),
         )
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(Breed, Patient.breed_id == Breed.id)
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(County, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(Species, FactCase.species_id == Species.id)
+        .join(Breed, FactCase.breed_id == Breed.id)
+        .where(*fact_conditions(species, cancer_type, county, year_start, year_end, sex))
     )
-    stmt = _apply_filters(stmt, species, cancer_type, county, year_start, year_end, sex)
-    stmt = stmt.group_by(Breed.name, Species.name).order_by(func.count(CancerCase.id).desc())
+    stmt = stmt.group_by(Breed.name, Species.name).order_by(func.count().desc())
 
     result = await db.execute(stmt)
     data = [
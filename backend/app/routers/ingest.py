@@ -0,0 +1,43 @@
+"""Bulk case ingestion endpoint."""
+
+import time
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_db
+from app.schemas.schemas import IngestRequest, IngestResponse, IngestRecordError
+from app.services import ingest
+from app.services.cache import apply_data_versions
+
+router = APIRouter(prefix="/api/v1/ingest", tags=["ingest"])
+
+
+@router.post("/cases", response_model=IngestResponse)
+async def ingest_cases(request: IngestRequest, db: AsyncSession = Depends(get_db)):
+    """Store a batch of patient/case/report records in one transaction.
+
+    Invalid records are rejected individually with their errors; the rest are
+    committed together, with every derived aggregate updated before the
+    response is sent.
+    """
+    if len(request.records) > settings.INGEST_MAX_RECORDS:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch exceeds {settings.INGEST_MAX_RECORDS} records")
+
+    started = time.perf_counter()
+    result = await ingest.ingest_records(db, request.records)
+    # Other workers hear of the change through registry_data_changed
+    apply_data_versions(result.versions)
+
+    return IngestResponse(
+        received=len(request.records),
+        cases_created=result.cases,
+        reports_created=result.reports,
+        rejected=len(result.errors),
+        errors=[IngestRecordError(index=index, id=id_, errors=errors)
+                for index, id_, errors in result.errors],
+        data_versions=result.versions,
+        elapsed_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
@@ -1,20 +1,46 @@
 """BERT search and pathology report endpoints."""
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+import time
+import hashlib
+
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, text
-from typing import Optional
+from sqlalchemy import select, func, text, and_, null
+from typing import Optional, Literal
 
+from app.config import settings
 from app.database import get_db
 from app.models.models import PathologyReport, CancerCase, CancerType
 from app.schemas.schemas import (
-    ClassifyRequest, ClassifyResult, ReportOut, ReportSearchResponse
+    ClassifyRequest, ClassifyResult, ClassifyBatchRequest, ClassifyBatchResponse, BatchItemResult,
+    ClassifierPoolMetrics, ReportOut, ReportSummary, ReportSearchResponse, ReportFacets,
+    ReportFacetOption, SimilarReport, SimilarReportsResponse
 )
-from app.services.bert_service import BertClassifier
+from app.services.classifier_pool import ClassifierPool, PoolSaturated, PoolTimeout
+from app.services import report_search, report_upload, similar_index as similar
+from app.services.cache import LRUCache, filter_hash, data_version, register_data_cache
 
 router = APIRouter(prefix="/api/v1/search", tags=["search"])
 
-classifier = BertClassifier()
+classifier_pool = ClassifierPool(
+    kind=settings.CLASSIFIER_POOL_KIND,
+    backend=settings.CLASSIFIER_BACKEND,
+    workers=settings.CLASSIFIER_WORKERS,
+    queue_size=settings.CLASSIFIER_QUEUE_SIZE,
+    timeout=settings.CLASSIFIER_TIMEOUT_SECONDS,
+    cache=LRUCache(maxsize=settings.CLASSIFY_CACHE_SIZE) if settings.CLASSIFY_CACHE_SIZE else None,
+    max_batch_size=settings.CLASSIFY_MICRO_BATCH_SIZE,
+    max_batch_wait_ms=settings.CLASSIFY_MICRO_BATCH_WAIT_MS,
+)
+
+# Built by app.jobs.similar_index; mapped on first use and refreshed as it grows
+similar_reports_index = similar.SimilarIndex(settings.SIMILAR_INDEX_DIR)
+
+# Facet counts per search state, like the dashboard facet cache
+report_facet_cache = register_data_cache(
+    "reports", LRUCache(maxsize=settings.FACET_CACHE_SIZE, ttl=settings.FACET_CACHE_TTL_SECONDS))
 
 
 @router.post("/classify", response_model=ClassifyResult)
@@ -22,47 +48,333 @@ async def classify_report(request: ClassifyRequest):
     if not request.text.strip():
         raise HTTPException(status_code=400, detail="Report text is required")
 
-    result = classifier.classify(request.text)
+    try:
+        result = await classifier_pool.classify(request.text)
+    except PoolSaturated:
+        raise HTTPException(status_code=429, detail="Classifier is busy, retry shortly",
+                            headers={"Retry-After": "1"})
+    except PoolTimeout:
+        raise HTTPException(status_code=503, detail="Classification timed out",
+                            headers={"Retry-After": "5"})
     return result
 
 
+@router.post("/classify-batch", response_model=ClassifyBatchResponse)
+async def classify_batch(request: ClassifyBatchRequest):
+    if len(request.reports) > settings.CLASSIFY_BATCH_MAX_REPORTS:
+        raise HTTPException(status_code=413,
+                            detail=f"Batch exceeds {settings.CLASSIFY_BATCH_MAX_REPORTS} reports")
+
+    outcomes = await classifier_pool.classify_many(
+        [report.text for report in request.reports], settings.CLASSIFY_BATCH_CHUNK_SIZE
+    )
+    results = [
+        BatchItemResult(index=i, id=report.id, result=result, error=error)
+        for i, (report, (result, error)) in enumerate(zip(request.reports, outcomes))
+    ]
+    failed = sum(1 for r in results if r.error is not None)
+    return ClassifyBatchResponse(results=results, succeeded=len(results) - failed, failed=failed)
+
+
+@router.post("/classify-upload")
+async def classify_upload(
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "jsonl"]] = None,
+    text_field: str = "report_text",
+    id_field: str = "id",
+):
+    """Classify a CSV or JSONL file of reports, streaming NDJSON results as chunks complete."""
+    fmt = report_upload.detect_format(file.filename, format)
+    if fmt is None:
+        raise HTTPException(status_code=400, detail="Upload a .csv or .jsonl file, or pass format=")
+    source = await run_in_threadpool(report_upload.detach_upload, file)
+    try:
+        records = await run_in_threadpool(report_upload.open_records, source, fmt, text_field, id_field)
+    except ValueError as exc:
+        source.close()
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    return StreamingResponse(
+        report_upload.classify_stream(records, classifier_pool, settings.CLASSIFY_BATCH_CHUNK_SIZE, source),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/classify/metrics", response_model=ClassifierPoolMetrics)
+async def classifier_metrics():
+    return classifier_pool.metrics()
+
+
+@router.get("/similar", response_model=SimilarReportsResponse)
+async def similar_reports(
+    report_id: Optional[int] = None,
+    text: Optional[str] = Query(default=None, max_length=100_000),
+    k: int = Query(default=10, ge=1, le=50),
+    nprobe: int = Query(default=settings.SIMILAR_INDEX_NPROBE, ge=1, le=256),
+    db: AsyncSession = Depends(get_db),
+):
+    if (report_id is None) == (not text):
+        raise HTTPException(status_code=400, detail="Pass exactly one of report_id or text")
+    if not await run_in_threadpool(similar_reports_index.refresh):
+        raise HTTPException(status_code=503, detail="Similar-report index has not been built")
+    # One snapshot for the whole request, even if a rebuild is published meanwhile
+    index = similar_reports_index.snapshot
+
+    query = index.vector_for(report_id) if report_id is not None else None
+    if query is None:
+        if report_id is not None:
+            # Not indexed yet: embed the stored text with the index's weights
+            text = (await db.execute(
+                select(PathologyReport.report_text).where(PathologyReport.id == report_id)
+            )).scalar()
+            if text is None:
+                raise HTTPException(status_code=404, detail="Report not found")
+        query = similar.embed([text], index.idf)[0]
+
+    started = time.perf_counter()
+    matches = await run_in_threadpool(index.search, query, k, nprobe, report_id)
+    search_ms = round((time.perf_counter() - started) * 1000, 2)
+
+    rows = {}
+    if matches:
+        result = await db.execute(
+            select(
+                PathologyReport.id, PathologyReport.case_id, PathologyReport.classification,
+                PathologyReport.confidence_score, PathologyReport.report_date,
+                report_search.preview(PathologyReport.report_text).label("preview"),
+            ).where(PathologyReport.id.in_([report for report, _ in matches]))
+        )
+        rows = {r.id: r for r in result.all()}
+    # Reports deleted since they were indexed are skipped
+    results = [
+        SimilarReport(
+            id=r.id,
+            case_id=r.case_id,
+            classification=r.classification,
+            confidence_score=float(r.confidence_score) if r.confidence_score else None,
+            report_date=r.report_date,
+            similarity=score,
+            preview=r.preview,
+        )
+        for report, score in matches if (r := rows.get(report)) is not None
+    ]
+    return SimilarReportsResponse(report_id=report_id, results=results,
+                                  indexed_reports=index.count, search_ms=search_ms)
+
+
 @router.get("/reports", response_model=ReportSearchResponse)
 async def search_reports(
     keyword: Optional[str] = None,
     classification: Optional[str] = None,
+    year: Optional[int] = None,
+    confidence: Optional[Literal["high", "medium", "low", "unscored"]] = None,
+    match: Literal["fulltext", "substring", "fuzzy"] = "fulltext",
+    similarity: Optional[float] = Query(default=None, gt=0, le=1,
+                                        description="word_similarity threshold for match=fuzzy"),
     limit: int = Query(default=20, le=100),
-    offset: int = 0,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    view: Literal["full", "summary"] = "full",
+    facets: bool = False,
+    patnaik_grade: Optional[int] = Query(default=None, ge=1, le=3),
+    kiupel_grade: Optional[Literal["low", "high"]] = None,
+    margin_status: Optional[Literal["clean", "narrow", "incomplete"]] = None,
+    ckit_pattern: Optional[int] = Query(default=None, ge=1, le=3),
+    mitotic_min: Optional[int] = Query(default=None, ge=0),
+    mitotic_max: Optional[int] = Query(default=None, ge=0),
+    ki67_min: Optional[float] = Query(default=None, ge=0, le=100),
+    ki67_max: Optional[float] = Query(default=None, ge=0, le=100),
+    size_min: Optional[float] = Query(default=None, ge=0, description="Tumor size in cm"),
+    size_max: Optional[float] = Query(default=None, ge=0, description="Tumor size in cm"),
     db: AsyncSession = Depends(get_db),
 ):
-    stmt = select(PathologyReport)
-
+    conditions = []
+    query = None
+    score = None
     if keyword:
-        stmt = stmt.where(PathologyReport.report_text.ilike(f"%{keyword}%"))
+        if match == "fulltext":
+            query = report_search.text_query(keyword)
+            conditions.append(report_search.matches(query))
+            score = report_search.rank(query)
+        elif match == "fuzzy":
+            similarity = similarity or settings.FUZZY_WORD_SIMILARITY
+            await report_search.set_word_similarity_threshold(db, similarity)
+            conditions.append(report_search.fuzzy_matches(keyword))
+            score = report_search.fuzzy_rank(keyword)
+        else:
+            conditions.append(PathologyReport.report_text.ilike(f"%{keyword}%"))
+
+    features = dict(patnaik_grade=patnaik_grade, kiupel_grade=kiupel_grade, margin_status=margin_status,
+                    ckit_pattern=ckit_pattern, mitotic_min=mitotic_min, mitotic_max=mitotic_max,
+                    ki67_min=ki67_min, ki67_max=ki67_max, size_min=size_min, size_max=size_max)
+    feature_filter = report_search.feature_condition(**features)
+    if feature_filter is not None:
+        conditions.append(feature_filter)
+
+    # The faceted dimensions: each facet is counted without its own refinement
+    refinements = {
+        "classification": [PathologyReport.classification == classification] if classification else [],
+        "year": report_search.year_conditions(year),
+        "confidence": report_search.confidence_conditions(confidence),
+    }
+    state = filter_hash(keyword=keyword, classification=classification, year=year, confidence=confidence,
+                        match=match, similarity=similarity if match == "fuzzy" else None, **features)
+    facet_counts = None
+    if facets:
+        facet_key = (state, data_version("reports"))
+        facet_counts = report_facet_cache.get(facet_key)
+        if facet_counts is None:
+            facet_counts = await report_search.report_facets(db, conditions, refinements)
+            report_facet_cache.set(facet_key, facet_counts)
+    conditions += [c for conds in refinements.values() for c in conds]
 
-    if classification:
-        stmt = stmt.where(PathologyReport.classification == classification)
+    # Cursors are only valid for the sort order and filters they were issued for
+    sort = "relevance" if score is not None else "date"
+    filters = state[:16]
 
-    # Count total
-    count_stmt = select(func.count()).select_from(stmt.subquery())
-    total_result = await db.execute(count_stmt)
-    total = total_result.scalar() or 0
+    # Rank and paginate on the narrow key columns first, so snippets are only
+    # built for the rows on this page. One extra row tells us whether a next page exists.
+    key_columns = [PathologyReport.id, PathologyReport.report_date]
+    order = [PathologyReport.report_date.desc(), PathologyReport.id.desc()]
+    if score is not None:
+        key_columns.append(score.label("rank"))
+        order.insert(0, score.desc())
+    page_conditions = list(conditions)
+    if cursor:
+        position = report_search.decode_cursor(cursor, sort, filters)
+        page_conditions.append(report_search.after_cursor(position, score))
+    page = (
+        select(*key_columns)
+        .where(*page_conditions)
+        .order_by(*order)
+        .limit(limit + 1)
+        .subquery()
+    )
+
+    columns = [
+        PathologyReport.id, PathologyReport.case_id, PathologyReport.classification,
+        PathologyReport.confidence_score, PathologyReport.report_date,
+    ]
+    # The summary view never ships the full text: only a snippet and its length
+    if view == "summary":
+        columns.append(func.length(PathologyReport.report_text).label("text_length"))
+    else:
+        columns.append(PathologyReport.report_text)
+    if score is not None:
+        columns.append(page.c.rank)
+        page_order = [page.c.rank.desc()]
+    else:
+        columns.append(null().label("rank"))
+        page_order = []
+    if query is not None:
+        snippet = report_search.headline(PathologyReport.report_text, query)
+    elif view == "summary":
+        snippet = report_search.preview(PathologyReport.report_text, keyword if match == "substring" else None)
+    else:
+        snippet = null()
+    columns.append(snippet.label("snippet"))
+    stmt = (
+        select(*columns)
+        .join(page, and_(PathologyReport.id == page.c.id,
+                         PathologyReport.report_date == page.c.report_date))
+        .order_by(*page_order, PathologyReport.report_date.desc(), PathologyReport.id.desc())
+    )
+    rows = (await db.execute(stmt)).all()
 
-    # Paginate
-    stmt = stmt.order_by(PathologyReport.report_date.desc()).offset(offset).limit(limit)
-    result = await db.execute(stmt)
-    reports = result.scalars().all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = report_search.encode_cursor(sort, filters, last.report_date, last.id, last.rank)
+
+    total, total_is_estimate = None, False
+    if include_total:
+        if facet_counts is not None:
+            # Exact, and already counted by the facet scan
+            total = facet_counts["total"]
+        elif not keyword and feature_filter is None and year is None and confidence is None:
+            total = await report_search.classification_total(db, classification or None)
+        elif not cursor and next_cursor is None:
+            # The whole result set fits on the first page
+            total = len(rows)
+        else:
+            total = await report_search.planner_estimate(
+                db, select(PathologyReport.id).where(*conditions))
+            if total <= report_search.EXACT_COUNT_THRESHOLD:
+                count_stmt = select(func.count()).select_from(PathologyReport).where(*conditions)
+                total = (await db.execute(count_stmt)).scalar() or 0
+            else:
+                total_is_estimate = True
+
+    # Suggestions only accompany the first page of a search
+    suggestion = await report_search.did_you_mean(db, keyword) if keyword and not cursor else None
 
     return ReportSearchResponse(
-        reports=[
-            ReportOut(
-                id=r.id,
-                case_id=r.case_id,
-                report_text=r.report_text,
-                classification=r.classification,
-                confidence_score=float(r.confidence_score) if r.confidence_score else None,
-                report_date=r.report_date,
-            )
-            for r in reports
-        ],
+        reports=[_report_row(r, view) for r in rows],
         total=total,
+        total_is_estimate=total_is_estimate,
+        next_cursor=next_cursor,
+        did_you_mean=suggestion,
+        facets=_facet_response(facet_counts) if facet_counts is not None else None,
+    )
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match semantics: `*`, or any listed tag equal to ours (weak comparison)."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+@router.get("/reports/{report_id}", response_model=ReportOut)
+async def get_report(
+    report_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    result = await db.execute(select(PathologyReport).where(PathologyReport.id == report_id))
+    report = result.scalars().first()
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+
+    # Reclassification changes the payload, so the ETag covers every returned field
+    out = _report_row(report, "full")
+    etag = '"' + hashlib.sha256(out.model_dump_json().encode()).hexdigest()[:32] + '"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={settings.REPORT_CACHE_MAX_AGE_SECONDS}",
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return out
+
+
+def _facet_response(counts: dict) -> ReportFacets:
+    def options(values: dict, order) -> list[ReportFacetOption]:
+        return [ReportFacetOption(value=v, count=n) for v, n in sorted(values.items(), key=order)]
+    bands = list(report_search.CONFIDENCE_BANDS) + [report_search.UNSCORED]
+    return ReportFacets(
+        total=counts["total"],
+        # Largest first; unclassified reports (None) last
+        classifications=options(counts["classification"], lambda kv: (kv[0] is None, -kv[1], kv[0] or "")),
+        years=options(counts["year"], lambda kv: kv[0]),
+        confidence_bands=options(counts["confidence"], lambda kv: bands.index(kv[0])),
+    )
+
+
+def _report_row(r, view: str):
+    fields = dict(
+        id=r.id,
+        case_id=r.case_id,
+        classification=r.classification,
+        confidence_score=float(r.confidence_score) if r.confidence_score else None,
+        report_date=r.report_date,
+        rank=round(r.rank, 6) if getattr(r, "rank", None) is not None else None,
+        snippet=getattr(r, "snippet", None),
     )
+    if view == "summary":
+        return ReportSummary(text_length=r.text_length, **fields)
+    return ReportOut(report_text=r.report_text, **fields)
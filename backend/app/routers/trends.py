@@ -6,8 +6,9 @@ from sqlalchemy import select, func
 from typing import Optional, List
 
 from app.database import get_db
-from app.models.models import CancerCase, CancerType, Patient, Species, County
+from app.models.models import FactCase, CancerType
 from app.schemas.schemas import TrendsResponse, TrendSeries, TrendPoint
+from app.services.fact_service import fact_conditions, OUTCOME_ALIVE, OUTCOME_DECEASED
 
 router = APIRouter(prefix="/api/v1/trends", tags=["trends"])
 
@@ -22,29 +23,15 @@ async def get_yearly_trends(
 ):
     stmt = (
         select(
-            func.extract("year", CancerCase.diagnosis_date).label("year"),
-            func.count(CancerCase.id).label("count"),
-            func.count(CancerCase.id).filter(CancerCase.outcome == "deceased").label("deceased"),
-            func.count(CancerCase.id).filter(CancerCase.outcome == "alive").label("alive"),
+            FactCase.diagnosis_year.label("year"),
+            func.count().label("count"),
+            func.count().filter(FactCase.outcome == OUTCOME_DECEASED).label("deceased"),
+            func.count().filter(FactCase.outcome == OUTCOME_ALIVE).label("alive"),
         )
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(County, CancerCase.county_id == County.id)
+        .where(*fact_conditions(species, cancer_type, county, sex=sex))
     )
 
-    if species:
-        stmt = stmt.where(Species.name.in_(species))
-    if cancer_type:
-        stmt = stmt.where(CancerType.name.in_(cancer_type))
-    if county:
-        stmt = stmt.where(County.name.in_(county))
-    if sex and sex != "All":
-        stmt = stmt.where(Patient.sex.ilike(f"%{sex}%"))
-
-    stmt = stmt.group_by(func.extract("year", CancerCase.diagnosis_date)).order_by(
-        func.extract("year", CancerCase.diagnosis_date)
-    )
+    stmt = stmt.group_by(FactCase.diagnosis_year).order_by(FactCase.diagnosis_year)
 
     result = await db.execute(stmt)
     rows = result.all()
@@ -67,27 +54,19 @@ async def get_trends_by_cancer_type(
     stmt = (
         select(
             CancerType.name.label("cancer_type"),
-            func.extract("year", CancerCase.diagnosis_date).label("year"),
-            func.count(CancerCase.id).label("count"),
-            func.count(CancerCase.id).filter(CancerCase.outcome == "deceased").label("deceased"),
-            func.count(CancerCase.id).filter(CancerCase.outcome == "alive").label("alive"),
+            FactCase.diagnosis_year.label("year"),
+            func.count().label("count"),
+            func.count().filter(FactCase.outcome == OUTCOME_DECEASED).label("deceased"),
+            func.count().filter(FactCase.outcome == OUTCOME_ALIVE).label("alive"),
         )
-        .join(CancerType, CancerCase.cancer_type_id == CancerType.id)
-        .join(Patient, CancerCase.patient_id == Patient.id)
-        .join(Species, Patient.species_id == Species.id)
-        .join(County, CancerCase.county_id == County.id)
+        .select_from(FactCase)
+        .join(CancerType, FactCase.cancer_type_id == CancerType.id)
+        .where(*fact_conditions(species, None, county, sex=sex))
     )
 
-    if species:
-        stmt = stmt.where(Species.name.in_(species))
-    if county:
-        stmt = stmt.where(County.name.in_(county))
-    if sex and sex != "All":
-        stmt = stmt.where(Patient.sex.ilike(f"%{sex}%"))
-
     stmt = stmt.group_by(
-        CancerType.name, func.extract("year", CancerCase.diagnosis_date)
-    ).order_by(CancerType.name, func.extract("year", CancerCase.diagnosis_date))
+        CancerType.name, FactCase.diagnosis_year
+    ).order_by(CancerType.name, FactCase.diagnosis_year)
 
     result = await db.execute(stmt)
     rows = result.all()
@@ -1,8 +1,8 @@
 """Pydantic request/response models for the API."""
 
-from pydantic import BaseModel
-from typing import Optional, List, Any
-from datetime import date
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Any, Dict, Literal, Union
+from datetime import date, timedelta
 
 
 # --- Lookup Schemas ---
@@ -60,6 +60,22 @@ class DashboardSummary(BaseModel):
     top_county_cases: int
 
 
+# --- Facets ---
+
+class FacetOption(BaseModel):
+    id: int
+    name: str
+    count: int
+
+
+class FacetCounts(BaseModel):
+    total: int
+    species: List[FacetOption]
+    cancer_types: List[FacetOption]
+    counties: List[FacetOption]
+    breeds: List[FacetOption]
+
+
 # --- Incidence ---
 
 class IncidenceRecord(BaseModel):
@@ -125,6 +141,38 @@ class TrendsResponse(BaseModel):
     series: List[TrendSeries]
 
 
+# --- Demographics ---
+
+class QuantilePoint(BaseModel):
+    q: float
+    value: Optional[float] = None
+
+
+class HistogramBin(BaseModel):
+    lower: float
+    upper: float
+    count: int
+
+
+class MetricSummary(BaseModel):
+    count: int
+    mean: Optional[float] = None
+    quantiles: List[QuantilePoint]
+    histogram: List[HistogramBin]
+
+
+class DemographicGroup(BaseModel):
+    group: str
+    age_years: MetricSummary
+    weight_kg: MetricSummary
+
+
+class DemographicsResponse(BaseModel):
+    group_by: Optional[str] = None
+    groups: List[DemographicGroup]
+    relative_accuracy: float
+
+
 # --- Search / BERT ---
 
 class ClassifyRequest(BaseModel):
@@ -137,6 +185,69 @@ class ClassifyResult(BaseModel):
     top_predictions: List[dict]
 
 
+class BatchReport(BaseModel):
+    id: Optional[str] = None
+    text: str
+
+
+class ClassifyBatchRequest(BaseModel):
+    reports: List[BatchReport]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    result: Optional[ClassifyResult] = None
+    error: Optional[str] = None
+
+
+class ClassifyBatchResponse(BaseModel):
+    results: List[BatchItemResult]
+    succeeded: int
+    failed: int
+
+
+class LatencySummary(BaseModel):
+    count: int
+    p50: Optional[float] = None
+    p95: Optional[float] = None
+    p99: Optional[float] = None
+
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class MicroBatchStats(BaseModel):
+    max_batch_size: int
+    max_wait_ms: float
+    batches: int
+    mean_batch_size: Optional[float] = None
+    batch_ms: LatencySummary
+
+
+class ClassifierPoolMetrics(BaseModel):
+    kind: str
+    backend: str
+    workers: int
+    queue_size: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    timed_out: int
+    failed: int
+    queue_wait_ms: LatencySummary
+    run_ms: LatencySummary
+    version: str
+    cache: Optional[CacheStats] = None
+    micro_batching: MicroBatchStats
+
+
 class ReportOut(BaseModel):
     id: int
     case_id: int
@@ -144,12 +255,137 @@ class ReportOut(BaseModel):
     classification: Optional[str] = None
     confidence_score: Optional[float] = None
     report_date: date
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
     model_config = {"from_attributes": True}
 
 
-class ReportSearchResponse(BaseModel):
-    reports: List[ReportOut]
+class ReportSummary(BaseModel):
+    """Search result row without the full report text (view=summary)."""
+    id: int
+    case_id: int
+    classification: Optional[str] = None
+    confidence_score: Optional[float] = None
+    report_date: date
+    rank: Optional[float] = None
+    snippet: Optional[str] = None
+    text_length: int
+
+
+class SimilarReport(BaseModel):
+    id: int
+    case_id: int
+    classification: Optional[str] = None
+    confidence_score: Optional[float] = None
+    report_date: date
+    similarity: float
+    preview: str
+
+
+class SimilarReportsResponse(BaseModel):
+    report_id: Optional[int] = None
+    results: List[SimilarReport]
+    indexed_reports: int
+    search_ms: float
+
+
+class ReportFacetOption(BaseModel):
+    value: Union[int, str, None]
+    count: int
+
+
+class ReportFacets(BaseModel):
     total: int
+    classifications: List[ReportFacetOption]
+    years: List[ReportFacetOption]
+    confidence_bands: List[ReportFacetOption]
+
+
+class ReportSearchResponse(BaseModel):
+    reports: List[Union[ReportOut, ReportSummary]]
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+    did_you_mean: Optional[str] = None
+    facets: Optional[ReportFacets] = None
+
+
+# --- Case Ingestion ---
+
+# Ingested dates must fall between this and a year from today: every distinct
+# year in a batch gets its own partitions, created inside the request
+INGEST_EARLIEST_DATE = date(1990, 1, 1)
+
+
+def _ingest_date(value: Optional[date]) -> Optional[date]:
+    latest = date.today() + timedelta(days=365)
+    if value is not None and not INGEST_EARLIEST_DATE <= value <= latest:
+        raise ValueError(f"must be between {INGEST_EARLIEST_DATE} and {latest}")
+    return value
+
+
+class IngestPatient(BaseModel):
+    species: str
+    breed: str
+    sex: Literal["Male", "Female", "Neutered Male", "Spayed Female"]
+    age_years: float = Field(ge=0, lt=100)
+    weight_kg: Optional[float] = Field(default=None, gt=0, le=9999.99)  # NUMERIC(6, 2)
+    county: str
+    registered_date: Optional[date] = None
+
+    _check_dates = field_validator("registered_date")(_ingest_date)
+
+
+class IngestCase(BaseModel):
+    cancer_type: str
+    diagnosis_date: date
+    stage: Optional[Literal["I", "II", "III", "IV"]] = None
+    outcome: Optional[Literal["alive", "deceased", "unknown"]] = None
+    county: Optional[str] = None
+
+    _check_dates = field_validator("diagnosis_date")(_ingest_date)
+
+
+class IngestReport(BaseModel):
+    report_text: str = Field(min_length=1)
+    classification: Optional[str] = Field(default=None, max_length=100)
+    confidence_score: Optional[float] = Field(default=None, ge=0, le=1)
+    report_date: Optional[date] = None
+
+    _check_dates = field_validator("report_date")(_ingest_date)
+
+
+class IngestRecord(BaseModel):
+    """One patient with one case and optionally its pathology report.
+
+    The case county defaults to the patient's, registered_date and
+    report_date to the diagnosis date.
+    """
+    id: Optional[str] = None
+    patient: IngestPatient
+    case: IngestCase
+    report: Optional[IngestReport] = None
+
+
+class IngestRequest(BaseModel):
+    # Validated record by record, so one bad record does not reject the batch
+    records: List[Dict[str, Any]]
+
+
+class IngestRecordError(BaseModel):
+    index: int
+    id: Optional[str] = None
+    errors: List[str]
+
+
+class IngestResponse(BaseModel):
+    received: int
+    cases_created: int
+    reports_created: int
+    rejected: int
+    errors: List[IngestRecordError]
+    data_versions: Dict[str, int]
+    elapsed_ms: float
 
 
 # --- Filter Options ---
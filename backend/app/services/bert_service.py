@@ -5,7 +5,9 @@ with an optional real BERT model for production.
 """
 
 import re
-from typing import List, Dict
+import json
+import hashlib
+from typing import Callable, List, Dict, Optional
 from app.schemas.schemas import ClassifyResult
 
 
@@ -47,24 +49,88 @@ CANCER_PATTERNS = {
     ],
 }
 
+# Identifies the scoring behaviour for result caches: changes whenever the
+# pattern table does, or when the model revision is bumped
+MODEL_REVISION = "keyword-1"
+CLASSIFIER_VERSION = MODEL_REVISION + "-" + hashlib.sha256(
+    json.dumps(CANCER_PATTERNS, sort_keys=True).encode()
+).hexdigest()[:12]
+
+
+_REGEX_META = set(".^$*+?{}[]\\()")
+
+
+def _literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """Lower-cased literals of a plain `a|b` pattern, or None if it needs the regex engine.
+
+    Alternatives that could overlap each other (one containing another, or a
+    suffix of one starting another) are left to the regex, whose leftmost
+    non-overlapping match count would differ from the summed literal counts.
+    """
+    if any(ch in _REGEX_META for ch in pattern):
+        return None
+    literals = [alt.lower() for alt in pattern.split("|")]
+    for i, a in enumerate(literals):
+        if not a:
+            return None
+        for j, b in enumerate(literals):
+            if i != j and (a in b or any(a.endswith(b[:k]) for k in range(1, len(b)))):
+                return None
+    return literals
+
+
+def _match_counter(pattern: str) -> Callable[[str, str], int]:
+    """Count of case-insensitive matches given (text, lower-cased ASCII text).
+
+    Literal keywords are counted with str.count on the lowered text, which for
+    ASCII input equals the number of IGNORECASE findall matches.
+    """
+    literals = _literal_alternatives(pattern)
+    if literals is None:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return lambda text, lowered: len(compiled.findall(text))
+    if len(literals) == 1:
+        literal = literals[0]
+        return lambda text, lowered: lowered.count(literal)
+    return lambda text, lowered: sum(lowered.count(literal) for literal in literals)
+
 
 class BertClassifier:
     """Mock BERT classifier using keyword matching for development."""
 
+    version = CLASSIFIER_VERSION
+
     def __init__(self):
         self.patterns = {
             cancer: [re.compile(p, re.IGNORECASE) for p in patterns]
             for cancer, patterns in CANCER_PATTERNS.items()
         }
+        self.counters = {
+            cancer: [_match_counter(p) for p in patterns]
+            for cancer, patterns in CANCER_PATTERNS.items()
+        }
+
+    def match_counts(self, text: str) -> Dict[str, List[int]]:
+        """Per-pattern match counts for each cancer type, in CANCER_PATTERNS order."""
+        if not text.isascii():
+            # Unicode case folding (e.g. the Kelvin sign) is only honoured by the regex engine
+            return {
+                cancer: [len(p.findall(text)) for p in compiled_patterns]
+                for cancer, compiled_patterns in self.patterns.items()
+            }
+        lowered = text.lower()
+        return {
+            cancer: [count(text, lowered) for count in counters]
+            for cancer, counters in self.counters.items()
+        }
 
     def classify(self, text: str) -> ClassifyResult:
         scores: Dict[str, float] = {}
 
-        for cancer_type, compiled_patterns in self.patterns.items():
+        for cancer_type, counts in self.match_counts(text).items():
             score = 0.0
-            for pattern in compiled_patterns:
-                matches = pattern.findall(text)
-                score += len(matches) * (1.0 / len(compiled_patterns))
+            for matches in counts:
+                score += matches * (1.0 / len(counts))
             scores[cancer_type] = score
 
         total_score = sum(scores.values())
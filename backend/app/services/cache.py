@@ -0,0 +1,123 @@
+"""Small in-process caches for query and classification results."""
+
+import time
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class LRUCache:
+    """Bounded least-recently-used cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def filter_hash(**filters) -> str:
+    """Stable hash of a filter state; list order and unset filters do not matter."""
+    normalized = {
+        k: sorted(v) if isinstance(v, (list, tuple)) else v
+        for k, v in filters.items() if v not in (None, [], "")
+    }
+    return hashlib.sha256(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+
+
+def text_hash(text: str) -> str:
+    """Hash of report text after normalization that cannot change a classification.
+
+    Only line endings and surrounding whitespace are normalized: inner whitespace
+    is significant to multi-word keywords such as "lymph node".
+    """
+    normalized = text.replace("\r\n", "\n").strip()
+    return hashlib.sha256(normalized.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+# Result caches by the data dimension (see data_versions, migration 015) their
+# entries are computed from, and the latest version of each dimension this
+# process has seen. Keys of those caches include data_version(), so an entry
+# computed while a write was committing is never served after it.
+_data_caches: dict[str, list[LRUCache]] = {}
+_data_versions: dict[str, int] = {}
+_versions_lock = threading.Lock()
+
+
+def register_data_cache(dimension: str, cache: LRUCache) -> LRUCache:
+    _data_caches.setdefault(dimension, []).append(cache)
+    return cache
+
+
+def data_version(dimension: str) -> int:
+    return _data_versions.get(dimension, 0)
+
+
+def invalidate_data(dimensions) -> int:
+    """Clear every cache registered for the dimensions; returns entries dropped."""
+    dropped = 0
+    for dimension in set(dimensions):
+        for cache in _data_caches.get(dimension, []):
+            dropped += len(cache)
+            cache.clear()
+    return dropped
+
+
+def apply_data_versions(versions: dict[str, int], exact: bool = False) -> list[str]:
+    """Record new dimension versions and clear the caches of those that moved.
+
+    Versions older than the one already seen are ignored, since a change can be
+    reported both by the writer and by its notification. With exact=True any
+    difference counts, for resynchronizing after a database reset.
+    """
+    with _versions_lock:
+        changed = [
+            dimension for dimension, version in versions.items()
+            if (version != _data_versions.get(dimension) if exact
+                else version > _data_versions.get(dimension, -1))
+        ]
+        for dimension in changed:
+            _data_versions[dimension] = versions[dimension]
+    invalidate_data(changed)
+    return changed
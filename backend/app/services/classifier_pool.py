@@ -0,0 +1,368 @@
+"""
+Bounded worker pool for CPU-bound report classification.
+
+Classification runs in a thread or process pool instead of on the event loop,
+so long reports cannot stall the other requests served by the same worker.
+Admission is bounded: once every worker is busy and the queue is full, new
+work is rejected immediately rather than piling up behind the backlog.
+
+Single-report requests can be micro-batched: concurrent calls are collected
+for up to max_batch_wait_ms (or until max_batch_size are waiting) and scored
+as one chunk, so batch-oriented backends such as the transformer model are
+bound by throughput rather than by per-request overhead.
+"""
+
+import time
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+from app.schemas.schemas import ClassifyResult
+from app.services.bert_service import BertClassifier, CLASSIFIER_VERSION
+from app.services.cache import LRUCache, text_hash
+from app.services.sketch import DDSketch
+from app.services.sparse_classifier import SparseKeywordClassifier
+from app.services.transformer_classifier import TransformerClassifier, model_version
+
+# Classifier implementations by CLASSIFIER_BACKEND name. "keyword" and "sparse"
+# give identical results; "transformer" runs an exported ONNX model
+CLASSIFIER_BACKENDS = {
+    "keyword": BertClassifier,
+    "sparse": SparseKeywordClassifier,
+    "transformer": TransformerClassifier,
+}
+
+
+def backend_version(backend: str) -> str:
+    """Version recorded with results of a backend, without loading it."""
+    if backend == "transformer":
+        return model_version(settings.TRANSFORMER_MODEL_DIR)
+    return CLASSIFIER_VERSION
+
+# Per-worker classifiers, built once per backend (by the pool initializer where possible)
+_worker_classifiers: Dict[str, Any] = {}
+
+
+def _init_worker(backend: str) -> None:
+    _worker(backend)
+
+
+def _worker(backend: str):
+    if backend not in _worker_classifiers:
+        _worker_classifiers[backend] = CLASSIFIER_BACKENDS[backend]()
+    return _worker_classifiers[backend]
+
+
+# (result, error) per report; exactly one of the two is set
+ItemOutcome = Tuple[Optional[ClassifyResult], Optional[str]]
+
+
+def classify_text(backend: str, text: str) -> ClassifyResult:
+    """Classify one report inside a pool worker."""
+    return _worker(backend).classify(text)
+
+
+def classify_chunk(backend: str, texts: Sequence[str]) -> List[ItemOutcome]:
+    """Classify a chunk of reports inside a pool worker, isolating per-report failures."""
+    classifier = _worker(backend)
+    outcomes: List[ItemOutcome] = [
+        (None, "Report text is required") if not text or not text.strip() else None for text in texts
+    ]
+    valid = [i for i, outcome in enumerate(outcomes) if outcome is None]
+    if valid and hasattr(classifier, "classify_batch"):
+        try:
+            for i, result in zip(valid, classifier.classify_batch([texts[i] for i in valid])):
+                outcomes[i] = (result, None)
+            return outcomes
+        except Exception:
+            # Fall through to one-by-one scoring to find the failing reports
+            pass
+    for i in valid:
+        try:
+            outcomes[i] = (classifier.classify(texts[i]), None)
+        except Exception as exc:
+            outcomes[i] = (None, f"{type(exc).__name__}: {exc}")
+    return outcomes
+
+
+class PoolSaturated(Exception):
+    """Every worker is busy and the queue is full."""
+
+
+class PoolTimeout(Exception):
+    """The work did not finish within the per-request timeout."""
+
+
+class ClassificationFailed(Exception):
+    """A micro-batched report could not be classified."""
+
+
+class ClassifierPool:
+    """Thread or process pool with a bounded queue, timeouts and latency metrics.
+
+    With a cache, results are looked up by normalized-text hash and classifier
+    version before any work is submitted, so repeated reports never reach a worker.
+    """
+
+    def __init__(self, kind: str = "process", workers: int = 2, queue_size: int = 32,
+                 timeout: float = 10.0, cache: Optional[LRUCache] = None,
+                 version: Optional[str] = None, backend: str = "keyword",
+                 max_batch_size: int = 1, max_batch_wait_ms: float = 0.0):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown classifier pool kind: {kind}")
+        if backend not in CLASSIFIER_BACKENDS:
+            raise ValueError(f"Unknown classifier backend: {backend}")
+        self.kind = kind
+        self.backend = backend
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.cache = cache
+        self.version = version or backend_version(backend)
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_batch_wait = max_batch_wait_ms / 1000
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._batch_tasks: set = set()
+        self.batches = 0
+        self.batched_reports = 0
+        self._batch_ms = DDSketch()
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.failed = 0
+        self._wait_ms = DDSketch()
+        self._run_ms = DDSketch()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def _get_executor(self) -> Executor:
+        # Created on first use so importing the app never starts worker processes
+        if self._executor is None:
+            if self.kind == "process":
+                # spawn, not fork: the server process holds an event loop and DB connections
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_init_worker,
+                                                     initargs=(self.backend,))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix="classifier",
+                                                    initializer=_init_worker,
+                                                    initargs=(self.backend,))
+        return self._executor
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturated()
+            self._in_flight += 1
+
+    def _release(self, outcome: str, wait_ms: Optional[float], run_ms: Optional[float]) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if outcome == "completed":
+                self.completed += 1
+            elif outcome == "failed":
+                self.failed += 1
+            if wait_ms is not None:
+                self._wait_ms.add(wait_ms)
+            if run_ms is not None:
+                self._run_ms.add(run_ms)
+
+    async def submit(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """Run fn(*args) in the pool; raises PoolSaturated or PoolTimeout."""
+        self._admit()
+        submitted = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_timed, fn, *args)
+        except Exception:
+            self._release("failed", None, None)
+            raise
+
+        def done(f):
+            # Slots are released when the worker finishes, not when the caller stops
+            # waiting, so abandoned work still counts against the queue bound
+            if f.cancelled():
+                self._release("cancelled", None, None)
+            elif f.exception() is not None:
+                self._release("failed", None, None)
+            else:
+                started, finished, _ = f.result()
+                self._release("completed", (started - submitted) * 1000, (finished - started) * 1000)
+
+        future.add_done_callback(done)
+        try:
+            _, _, result = await asyncio.wait_for(asyncio.wrap_future(future),
+                                                  timeout if timeout is not None else self.timeout)
+        except asyncio.TimeoutError:
+            # Queued work is dropped; work already running cannot be interrupted
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise PoolTimeout()
+        return result
+
+    def _cache_key(self, text: str) -> Tuple[str, str]:
+        return self.version, text_hash(text)
+
+    async def _classify_one(self, text: str) -> ClassifyResult:
+        if self.max_batch_size == 1:
+            return await self.submit(classify_text, self.backend, text)
+        return await self._enqueue(text)
+
+    async def classify(self, text: str) -> ClassifyResult:
+        if self.cache is None:
+            return await self._classify_one(text)
+        key = self._cache_key(text)
+        result = self.cache.get(key)
+        if result is None:
+            result = await self._classify_one(text)
+            self.cache.set(key, result)
+        return result
+
+    def _enqueue(self, text: str) -> asyncio.Future:
+        """Queue one report for the next micro-batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.max_batch_wait, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            # Hold a reference: the loop only keeps weak references to tasks
+            task = asyncio.ensure_future(self._run_batch(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _run_batch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        """Score a micro-batch as one chunk; pool errors fail every request in it."""
+        started = time.perf_counter()
+        try:
+            outcomes = await self.submit(classify_chunk, self.backend, [text for text, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        with self._lock:
+            self.batches += 1
+            self.batched_reports += len(batch)
+            self._batch_ms.add((time.perf_counter() - started) * 1000)
+        for (_, future), (result, error) in zip(batch, outcomes):
+            # Callers that gave up have cancelled their future
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(ClassificationFailed(error))
+            else:
+                future.set_result(result)
+
+    async def classify_chunk(self, texts: Sequence[str]) -> List[ItemOutcome]:
+        """Classify one chunk in a worker; pool failures are reported on every item."""
+        outcomes: List[Optional[ItemOutcome]] = [None] * len(texts)
+        keys: Dict[int, Tuple[str, str]] = {}
+        if self.cache is not None:
+            for i, text in enumerate(texts):
+                keys[i] = self._cache_key(text)
+                cached = self.cache.get(keys[i])
+                if cached is not None:
+                    outcomes[i] = (cached, None)
+        misses = [i for i, outcome in enumerate(outcomes) if outcome is None]
+        if not misses:
+            return outcomes
+
+        try:
+            computed = await self.submit(classify_chunk, self.backend, [texts[i] for i in misses])
+        except PoolSaturated:
+            computed = [(None, "Classifier is busy")] * len(misses)
+        except PoolTimeout:
+            computed = [(None, "Classification timed out")] * len(misses)
+        except Exception as exc:
+            computed = [(None, f"{type(exc).__name__}: {exc}")] * len(misses)
+        for i, outcome in zip(misses, computed):
+            outcomes[i] = outcome
+            if self.cache is not None and outcome[0] is not None:
+                self.cache.set(keys[i], outcome[0])
+        return outcomes
+
+    async def classify_many(self, texts: Sequence[str], chunk_size: int) -> List[ItemOutcome]:
+        """Classify reports in parallel chunks, returning outcomes in input order.
+
+        A single batch keeps at most one chunk per worker in flight, so it never
+        fills the shared queue on its own and single-report requests still get in.
+        """
+        slots = asyncio.Semaphore(self.workers)
+
+        async def run(chunk: Sequence[str]) -> List[ItemOutcome]:
+            async with slots:
+                return await self.classify_chunk(chunk)
+
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        outcomes: List[ItemOutcome] = []
+        for chunk_outcomes in await asyncio.gather(*(run(chunk) for chunk in chunks)):
+            outcomes.extend(chunk_outcomes)
+        return outcomes
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "backend": self.backend,
+                "version": self.version,
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "queue_depth": max(self._in_flight - self.workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+                "failed": self.failed,
+                "queue_wait_ms": _latency_summary(self._wait_ms),
+                "run_ms": _latency_summary(self._run_ms),
+                "cache": self.cache.stats() if self.cache is not None else None,
+                "micro_batching": {
+                    "max_batch_size": self.max_batch_size,
+                    "max_wait_ms": self.max_batch_wait * 1000,
+                    "batches": self.batches,
+                    "mean_batch_size": round(self.batched_reports / self.batches, 2) if self.batches else None,
+                    "batch_ms": _latency_summary(self._batch_ms),
+                },
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _timed(fn: Callable[..., Any], *args: Any):
+    # perf_counter is system-wide on Linux, so worker timestamps compare with the caller's
+    started = time.perf_counter()
+    result = fn(*args)
+    return started, time.perf_counter(), result
+
+
+def _latency_summary(sketch: DDSketch) -> Dict[str, Optional[float]]:
+    summary = {"count": sketch.count}
+    for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+        value = sketch.quantile(q)
+        summary[name] = round(value, 2) if value is not None else None
+    return summary
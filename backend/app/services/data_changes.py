@@ -0,0 +1,86 @@
+"""
+Cross-worker cache invalidation over PostgreSQL LISTEN/NOTIFY.
+
+Every write path bumps data_versions through bump_data_versions(), which
+NOTIFYs registry_data_changed with the new versions on commit (migration 016).
+Each API worker holds one dedicated asyncpg connection LISTENing on that
+channel and applies the versions to its in-process caches, so only the caches
+of the dimensions that changed are dropped.
+
+Notifications sent while the connection is down are lost, so on every
+(re)connect the listener reads data_versions and applies any difference.
+"""
+
+import json
+import asyncio
+import logging
+from typing import Optional
+
+import asyncpg
+
+from app.services.cache import apply_data_versions
+
+CHANNEL = "registry_data_changed"
+
+logger = logging.getLogger(__name__)
+
+
+class DataChangeListener:
+    """Background task keeping one LISTEN connection open, reconnecting with backoff."""
+
+    def __init__(self, dsn: str, max_backoff: float = 30.0):
+        # asyncpg takes a plain libpq URL, not the SQLAlchemy dialect form
+        self.dsn = dsn.replace("postgresql+asyncpg://", "postgresql://", 1)
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.notifications = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="data-change-listener")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        self.notifications += 1
+        try:
+            versions = {dimension: int(version) for dimension, version in json.loads(payload).items()}
+        except (ValueError, TypeError, AttributeError):
+            logger.warning("Ignoring malformed %s payload: %r", CHANNEL, payload)
+            return
+        apply_data_versions(versions)
+
+    async def _run(self) -> None:
+        backoff = 1.0
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(self.dsn)
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(CHANNEL, self._on_notify)
+                # Listen first, then resync, so no change falls between the two
+                rows = await connection.fetch("SELECT dimension, version FROM data_versions")
+                apply_data_versions({r["dimension"]: r["version"] for r in rows}, exact=True)
+                self.connected = True
+                backoff = 1.0
+                await lost.wait()
+                logger.warning("%s listener connection lost; reconnecting", CHANNEL)
+            except asyncio.CancelledError:
+                raise
+            except (OSError, asyncpg.PostgresError) as exc:
+                logger.warning("%s listener unavailable (%s); retrying in %.0fs", CHANNEL, exc, backoff)
+            finally:
+                self.connected = False
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
@@ -0,0 +1,80 @@
+"""Filter helpers for the fact_cases star-schema table."""
+
+from typing import Optional, List
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.models.models import FactCase, Species, CancerType, County, Breed
+
+
+SEX_MALE = 1
+SEX_FEMALE = 2
+
+OUTCOME_ALIVE = 1
+OUTCOME_DECEASED = 2
+OUTCOME_UNKNOWN = 3
+
+# Accepted `sex` filter values -> (sex code, neutered flag or None for either).
+# Covers both the database labels and the frontend's option values.
+SEX_FILTERS = {
+    "male": (SEX_MALE, None),
+    "female": (SEX_FEMALE, None),
+    "neutered male": (SEX_MALE, True),
+    "spayed female": (SEX_FEMALE, True),
+    "male_intact": (SEX_MALE, False),
+    "male_neutered": (SEX_MALE, True),
+    "female_intact": (SEX_FEMALE, False),
+    "female_spayed": (SEX_FEMALE, True),
+}
+
+
+def sex_conditions(sex: Optional[str]) -> list:
+    """Translate a `sex` query value into indexable fact_cases conditions."""
+    if not sex or sex.lower() == "all":
+        return []
+    try:
+        code, neutered = SEX_FILTERS[sex.lower()]
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown sex filter: {sex}")
+    conditions = [FactCase.sex == code]
+    if neutered is not None:
+        conditions.append(FactCase.is_neutered.is_(neutered))
+    return conditions
+
+
+def fact_conditions(species: Optional[List[str]] = None,
+                    cancer_type: Optional[List[str]] = None,
+                    county: Optional[List[str]] = None,
+                    year_start: Optional[int] = None,
+                    year_end: Optional[int] = None,
+                    sex: Optional[str] = None,
+                    breed: Optional[List[str]] = None) -> list:
+    """Build WHERE conditions on fact_cases for the common dashboard filters.
+
+    Names are resolved to dimension keys through uncorrelated subqueries on the
+    small lookup tables, so the fact scan itself stays join-free.
+    """
+    conditions = []
+    if species:
+        conditions.append(
+            FactCase.species_id.in_(select(Species.id).where(Species.name.in_(species)))
+        )
+    if cancer_type:
+        conditions.append(
+            FactCase.cancer_type_id.in_(select(CancerType.id).where(CancerType.name.in_(cancer_type)))
+        )
+    if county:
+        conditions.append(
+            FactCase.county_id.in_(select(County.id).where(County.name.in_(county)))
+        )
+    if breed:
+        conditions.append(
+            FactCase.breed_id.in_(select(Breed.id).where(Breed.name.in_(breed)))
+        )
+    if year_start:
+        conditions.append(FactCase.diagnosis_year >= year_start)
+    if year_end:
+        conditions.append(FactCase.diagnosis_year <= year_end)
+    conditions.extend(sex_conditions(sex))
+    return conditions
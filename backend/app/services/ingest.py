@@ -0,0 +1,191 @@
+"""
+Bulk ingestion of patient + case (+ optional report) records.
+
+Each record is validated on its own against the ingest schemas, and names are
+resolved against the dimension tables in bulk, so a bad record is reported by
+index instead of failing the batch. Valid records are COPYed (asyncpg's
+binary COPY) into a temporary staging table and merged into patients,
+cancer_cases and pathology_reports with one INSERT ... SELECT each. In the
+same transaction the database triggers apply the batch's rows to fact_cases,
+the demographic sketches and the report counts, features and terms, and the
+data_versions counters of the touched dimensions are bumped.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.schemas.schemas import IngestRecord
+
+STAGING_TABLE = "ingest_staging"
+
+# Columns COPYed into staging; patient_id and case_id are drawn from the sequences
+STAGING_COLUMNS = [
+    "record_index", "species_id", "breed_id", "sex", "age_years", "weight_kg", "patient_county_id",
+    "registered_date", "cancer_type_id", "diagnosis_date", "stage", "outcome", "case_county_id",
+    "report_text", "classification", "confidence_score", "report_date",
+]
+
+CREATE_STAGING = f"""
+    CREATE TEMP TABLE {STAGING_TABLE} (
+        record_index INTEGER NOT NULL,
+        species_id INTEGER NOT NULL,
+        breed_id INTEGER NOT NULL,
+        sex TEXT NOT NULL,
+        age_years DOUBLE PRECISION NOT NULL,
+        weight_kg DOUBLE PRECISION,
+        patient_county_id INTEGER NOT NULL,
+        registered_date DATE NOT NULL,
+        cancer_type_id INTEGER NOT NULL,
+        diagnosis_date DATE NOT NULL,
+        stage TEXT,
+        outcome TEXT,
+        case_county_id INTEGER NOT NULL,
+        report_text TEXT,
+        classification TEXT,
+        confidence_score DOUBLE PRECISION,
+        report_date DATE,
+        patient_id INTEGER NOT NULL DEFAULT nextval('patients_id_seq'),
+        case_id INTEGER NOT NULL DEFAULT nextval('cancer_cases_id_seq')
+    ) ON COMMIT DROP
+"""
+
+MERGE_PATIENTS = f"""
+    INSERT INTO patients (id, species_id, breed_id, sex, age_years, weight_kg, county_id, registered_date)
+    SELECT patient_id, species_id, breed_id, sex, age_years, weight_kg, patient_county_id, registered_date
+    FROM {STAGING_TABLE}
+"""
+
+MERGE_CASES = f"""
+    INSERT INTO cancer_cases (id, patient_id, cancer_type_id, diagnosis_date, stage, outcome, county_id)
+    SELECT case_id, patient_id, cancer_type_id, diagnosis_date, stage, outcome, case_county_id
+    FROM {STAGING_TABLE}
+"""
+
+MERGE_REPORTS = f"""
+    INSERT INTO pathology_reports (case_id, report_text, classification, confidence_score, report_date)
+    SELECT case_id, report_text, classification, confidence_score, report_date
+    FROM {STAGING_TABLE} WHERE report_text IS NOT NULL
+"""
+
+
+@dataclass
+class IngestResult:
+    cases: int = 0
+    reports: int = 0
+    # (record index, client id, messages)
+    errors: List[Tuple[int, Optional[str], List[str]]] = field(default_factory=list)
+    versions: Dict[str, int] = field(default_factory=dict)
+
+
+@dataclass
+class Dimensions:
+    """Dimension keys by lower-cased name; breeds are keyed by (species id, name)."""
+    species: Dict[str, int]
+    breeds: Dict[Tuple[int, str], int]
+    counties: Dict[str, int]
+    cancer_types: Dict[str, int]
+
+
+async def load_dimensions(db: AsyncSession) -> Dimensions:
+    rows = (await db.execute(text("""
+        SELECT 'species', id, NULL::INTEGER, name FROM species
+        UNION ALL SELECT 'breed', id, species_id, name FROM breeds
+        UNION ALL SELECT 'county', id, NULL, name FROM counties
+        UNION ALL SELECT 'cancer_type', id, NULL, name FROM cancer_types
+    """))).all()
+    dims = Dimensions({}, {}, {}, {})
+    tables = {"species": dims.species, "county": dims.counties, "cancer_type": dims.cancer_types}
+    for kind, id_, species_id, name in rows:
+        if kind == "breed":
+            dims.breeds[(species_id, name.lower())] = id_
+        else:
+            tables[kind][name.lower()] = id_
+    return dims
+
+
+def _validation_messages(exc: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in exc.errors()]
+
+
+def staging_row(index: int, record: IngestRecord, dims: Dimensions) -> Tuple[Optional[tuple], List[str]]:
+    """The staging tuple for a validated record, or the reasons it cannot be stored."""
+    errors = []
+
+    def lookup(table: Dict, key, name: str, path: str) -> Optional[int]:
+        id_ = table.get(key)
+        if id_ is None:
+            errors.append(f"{path}: unknown {name} {key[1] if isinstance(key, tuple) else key!r}")
+        return id_
+
+    patient, case, report = record.patient, record.case, record.report
+    species_id = lookup(dims.species, patient.species.lower(), "species", "patient.species")
+    breed_id = None
+    if species_id is not None:
+        breed_id = lookup(dims.breeds, (species_id, patient.breed.lower()), "breed for this species",
+                          "patient.breed")
+    patient_county = lookup(dims.counties, patient.county.lower(), "county", "patient.county")
+    case_county = (lookup(dims.counties, case.county.lower(), "county", "case.county")
+                   if case.county else patient_county)
+    cancer_type_id = lookup(dims.cancer_types, case.cancer_type.lower(), "cancer type", "case.cancer_type")
+    if patient.registered_date and patient.registered_date > case.diagnosis_date:
+        errors.append("patient.registered_date: after the diagnosis date")
+    if report is not None and report.report_date and report.report_date < case.diagnosis_date:
+        errors.append("report.report_date: before the diagnosis date")
+    if errors:
+        return None, errors
+
+    return (
+        index, species_id, breed_id, patient.sex, patient.age_years, patient.weight_kg, patient_county,
+        patient.registered_date or case.diagnosis_date, cancer_type_id, case.diagnosis_date,
+        case.stage, case.outcome, case_county,
+        report.report_text if report else None,
+        report.classification if report else None,
+        report.confidence_score if report else None,
+        (report.report_date or case.diagnosis_date) if report else None,
+    ), []
+
+
+async def ingest_records(db: AsyncSession, records: List[Dict[str, Any]]) -> IngestResult:
+    """Validate, stage and merge a batch; commits when any record is valid."""
+    result = IngestResult()
+    dims = await load_dimensions(db)
+    rows = []
+    for index, raw in enumerate(records):
+        client_id = raw.get("id") if isinstance(raw, dict) else None
+        try:
+            record = IngestRecord.model_validate(raw)
+        except ValidationError as exc:
+            result.errors.append((index, str(client_id) if client_id is not None else None,
+                                  _validation_messages(exc)))
+            continue
+        row, errors = staging_row(index, record, dims)
+        if errors:
+            result.errors.append((index, record.id, errors))
+        else:
+            rows.append(row)
+    if not rows:
+        return result
+
+    # Only the years present: a batch spanning decades does not create the years between
+    years = {row[9].year for row in rows} | {row[16].year for row in rows if row[16] is not None}
+    await db.execute(text("SELECT ensure_year_partitions(y, y) FROM unnest(CAST(:years AS INTEGER[])) AS y"),
+                     {"years": sorted(years)})
+    await db.execute(text(CREATE_STAGING))
+    connection = await (await db.connection()).get_raw_connection()
+    await connection.driver_connection.copy_records_to_table(
+        STAGING_TABLE, records=rows, columns=STAGING_COLUMNS)
+
+    await db.execute(text(MERGE_PATIENTS))
+    result.cases = (await db.execute(text(MERGE_CASES))).rowcount
+    result.reports = (await db.execute(text(MERGE_REPORTS))).rowcount
+
+    dimensions = ["cases"] + (["reports"] if result.reports else [])
+    bumped = await db.execute(text("SELECT dimension, version FROM bump_data_versions(:dimensions)"),
+                              {"dimensions": dimensions})
+    result.versions = {r.dimension: r.version for r in bumped}
+    await db.commit()
+    return result
@@ -0,0 +1,298 @@
+"""Full-text, fuzzy, structured-feature, facet, keyset pagination and count helpers for pathology report search."""
+
+import re
+import json
+import math
+import base64
+import binascii
+from datetime import date
+from typing import Optional
+
+from fastapi import HTTPException
+from sqlalchemy import Text, case, extract, func, literal, literal_column, select, text, tuple_, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Integer
+
+from app.models.models import PathologyReport, ReportClassificationCount, ReportFeatures
+
+# Text search configuration created in migration 010
+TS_CONFIG = literal_column("'vet_oncology'::regconfig")
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=20, MinWords=6, StartSel=<mark>, StopSel=</mark>"
+
+
+def text_query(keyword: str):
+    """Parse user input with websearch syntax: "exact phrase", or, -exclude."""
+    return func.websearch_to_tsquery(TS_CONFIG, keyword)
+
+
+def matches(query):
+    return PathologyReport.report_tsv.op("@@")(query)
+
+
+def rank(query):
+    return func.ts_rank_cd(PathologyReport.report_tsv, query)
+
+
+def headline(text_column, query):
+    return func.ts_headline(TS_CONFIG, text_column, query, HEADLINE_OPTIONS)
+
+
+# --- Fuzzy (trigram) matching ---
+
+async def set_word_similarity_threshold(db: AsyncSession, threshold: float):
+    """Threshold for the <% operator, for the rest of the current transaction."""
+    await db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+                     {"threshold": str(threshold)})
+
+
+def fuzzy_matches(keyword: str):
+    """keyword <% report_text: served by the trigram GIN index from migration 005."""
+    return literal(keyword, Text).op("<%")(PathologyReport.report_text)
+
+
+def fuzzy_rank(keyword: str):
+    return func.word_similarity(literal(keyword, Text), PathologyReport.report_text)
+
+
+# Words of a search worth checking against the term dictionary; websearch
+# operators and short words are left alone
+SUGGEST_WORD = re.compile(r"[a-z][a-z0-9-]{2,}", re.IGNORECASE)
+SEARCH_OPERATORS = {"or", "and", "not"}
+
+
+async def did_you_mean(db: AsyncSession, keyword: str) -> Optional[str]:
+    """The keyword with each word missing from the report_terms dictionary replaced
+    by its closest, most common dictionary word; None when every word is known
+    or nothing close enough exists.
+
+    Candidates come from the trigram index on report_terms (the % operator,
+    pg_trgm.similarity_threshold), so the lookup never scans the dictionary.
+    """
+    words = sorted({w.lower() for w in SUGGEST_WORD.findall(keyword)} - SEARCH_OPERATORS)
+    if not words:
+        return None
+    rows = await db.execute(text("""
+        SELECT w.word, (SELECT t.term FROM report_terms t
+                        WHERE t.term % w.word AND t.doc_count > 0
+                        ORDER BY similarity(t.term, w.word) DESC, t.doc_count DESC
+                        LIMIT 1) AS suggestion
+        FROM unnest(CAST(:words AS TEXT[])) AS w(word)
+        WHERE NOT EXISTS (SELECT 1 FROM report_terms t WHERE t.term = w.word AND t.doc_count > 0)
+    """), {"words": words})
+    replacements = {r.word: r.suggestion for r in rows if r.suggestion}
+    if not replacements:
+        return None
+    return SUGGEST_WORD.sub(lambda m: replacements.get(m.group(0).lower(), m.group(0)), keyword)
+
+
+# Length of the plain-text preview returned by the summary view
+PREVIEW_CHARS = 240
+
+
+def preview(text_column, keyword: Optional[str] = None):
+    """Leading slice of the report, or a window around the first substring match."""
+    if not keyword:
+        return func.left(text_column, PREVIEW_CHARS)
+    start = func.greatest(func.strpos(func.lower(text_column), keyword.lower()) - PREVIEW_CHARS // 4, 1)
+    return func.substr(text_column, start, PREVIEW_CHARS)
+
+
+# Filtered result sets estimated above this size are not counted exactly
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+# --- Structured features (migration 013) ---
+
+KIUPEL_GRADES = {"low": 1, "high": 2}
+MARGIN_STATUSES = {"clean": 1, "narrow": 2, "incomplete": 3}
+
+
+def feature_condition(patnaik_grade: Optional[int] = None,
+                      kiupel_grade: Optional[str] = None,
+                      margin_status: Optional[str] = None,
+                      ckit_pattern: Optional[int] = None,
+                      mitotic_min: Optional[int] = None,
+                      mitotic_max: Optional[int] = None,
+                      ki67_min: Optional[float] = None,
+                      ki67_max: Optional[float] = None,
+                      size_min: Optional[float] = None,
+                      size_max: Optional[float] = None):
+    """Semi-join on report_features for the given filters, or None when none are set.
+
+    Each filter hits its own partial B-tree index, so selective feature filters
+    pick a small id set before any report row is read.
+    """
+    conditions = []
+    if patnaik_grade is not None:
+        conditions.append(ReportFeatures.patnaik_grade == patnaik_grade)
+    if kiupel_grade is not None:
+        conditions.append(ReportFeatures.kiupel_grade == KIUPEL_GRADES[kiupel_grade])
+    if margin_status is not None:
+        conditions.append(ReportFeatures.margin_status == MARGIN_STATUSES[margin_status])
+    if ckit_pattern is not None:
+        conditions.append(ReportFeatures.ckit_pattern == ckit_pattern)
+    for column, low, high in ((ReportFeatures.mitotic_index, mitotic_min, mitotic_max),
+                              (ReportFeatures.ki67_percent, ki67_min, ki67_max),
+                              (ReportFeatures.tumor_size_cm, size_min, size_max)):
+        if low is not None:
+            conditions.append(column >= low)
+        if high is not None:
+            conditions.append(column <= high)
+    if not conditions:
+        return None
+    return PathologyReport.id.in_(select(ReportFeatures.report_id).where(*conditions))
+
+
+# --- Facets ---
+
+# Confidence bands as [low, high) score ranges; unscored reports form their own band
+CONFIDENCE_BANDS = {"high": (0.8, None), "medium": (0.5, 0.8), "low": (None, 0.5)}
+UNSCORED = "unscored"
+
+
+def year_conditions(year: Optional[int]) -> list:
+    """Report date range for a year, so only that year's partition is scanned."""
+    if year is None:
+        return []
+    return [PathologyReport.report_date >= date(year, 1, 1), PathologyReport.report_date < date(year + 1, 1, 1)]
+
+
+def confidence_conditions(band: Optional[str]) -> list:
+    if band is None:
+        return []
+    if band == UNSCORED:
+        return [PathologyReport.confidence_score.is_(None)]
+    low, high = CONFIDENCE_BANDS[band]
+    conditions = []
+    if low is not None:
+        conditions.append(PathologyReport.confidence_score >= low)
+    if high is not None:
+        conditions.append(PathologyReport.confidence_score < high)
+    return conditions
+
+
+def confidence_band():
+    """Band name per report. Constants are inlined rather than bound: the same
+    expression appears in both the select list and GROUP BY, and Postgres only
+    matches the two when they are textually identical."""
+    def const(value):
+        return literal_column(f"'{value}'" if isinstance(value, str) else str(value))
+    return case(
+        *[(PathologyReport.confidence_score >= const(low), const(name))
+          for name, (low, _) in CONFIDENCE_BANDS.items() if low is not None],
+        (PathologyReport.confidence_score.is_not(None), const("low")),
+        else_=const(UNSCORED),
+    )
+
+
+async def report_facets(db: AsyncSession, conditions: list, refinements: dict[str, list]) -> dict:
+    """Counts per classification, report year and confidence band, plus the total.
+
+    One GROUPING SETS scan over the reports matching `conditions`, the same
+    shape as the dashboard facets: each facet's counts leave out that facet's
+    own refinement, so selecting a year still shows every other year's count.
+    `refinements` maps "classification", "year" and "confidence" to the
+    conditions they add.
+    """
+    def count_without(facet: Optional[str]):
+        own = [c for name, conds in refinements.items() if name != facet for c in conds]
+        return func.count().filter(and_(*own)) if own else func.count()
+
+    year = extract("year", PathologyReport.report_date).cast(Integer)
+    band = confidence_band()
+    stmt = (
+        select(
+            PathologyReport.classification,
+            year.label("year"),
+            band.label("band"),
+            func.grouping(PathologyReport.classification).label("g_classification"),
+            func.grouping(year).label("g_year"),
+            count_without("classification").label("n_classification"),
+            count_without("year").label("n_year"),
+            count_without("confidence").label("n_confidence"),
+            count_without(None).label("n_all"),
+        )
+        .where(*conditions)
+        .group_by(func.grouping_sets(
+            tuple_(PathologyReport.classification),
+            tuple_(year),
+            tuple_(band),
+        ))
+    )
+    facets = {"classification": {}, "year": {}, "confidence": {}, "total": 0}
+    for r in (await db.execute(stmt)).all():
+        if not r.g_classification:
+            facets["classification"][r.classification] = r.n_classification
+            facets["total"] += r.n_all
+        elif not r.g_year:
+            facets["year"][r.year] = r.n_year
+        else:
+            facets["confidence"][r.band] = r.n_confidence
+    return facets
+
+
+# --- Keyset cursors ---
+
+def encode_cursor(sort: str, filters: str, report_date: date, report_id: int,
+                  rank: Optional[float] = None) -> str:
+    payload = {"s": sort, "f": filters, "d": report_date.isoformat(), "i": report_id}
+    if rank is not None:
+        payload["r"] = rank
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _is_number(value, integer: bool = False) -> bool:
+    if isinstance(value, bool):
+        return False
+    if integer:
+        return isinstance(value, int)
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
+
+def decode_cursor(cursor: str, sort: str, filters: str) -> dict:
+    """Decode a cursor, rejecting tokens issued for a different query."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        payload["d"] = date.fromisoformat(payload["d"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    # The id and rank are bound into the keyset comparison, so their types must match the columns
+    if not _is_number(payload.get("i"), integer=True) or (
+            sort == "relevance" and not _is_number(payload.get("r"))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if payload.get("s") != sort or payload.get("f") != filters:
+        raise HTTPException(status_code=400, detail="Cursor does not match this search")
+    return payload
+
+
+def after_cursor(payload: dict, score=None):
+    """Rows strictly after the cursor position in (rank desc,) report_date desc, id desc order."""
+    after_key = tuple_(PathologyReport.report_date, PathologyReport.id) < tuple_(payload["d"], payload["i"])
+    if score is None:
+        return after_key
+    return or_(score < payload["r"], and_(score == payload["r"], after_key))
+
+
+# --- Totals ---
+
+async def classification_total(db: AsyncSession, classification: Optional[str]) -> int:
+    """Exact report total from the trigger-maintained per-classification counts."""
+    stmt = select(func.coalesce(func.sum(ReportClassificationCount.report_count), 0))
+    if classification is not None:
+        stmt = stmt.where(ReportClassificationCount.classification == classification)
+    return int((await db.execute(stmt)).scalar())
+
+
+async def planner_estimate(db: AsyncSession, stmt) -> int:
+    """Row estimate for a statement from EXPLAIN, without executing it."""
+    conn = await db.connection()
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + compiled.string, params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,151 @@
+"""
+Incremental parsing and streamed classification of uploaded report files.
+
+Uploads are read record by record from the spooled upload file, classified in
+chunks through the classifier pool and written back as NDJSON as each chunk
+completes. Only a few chunks are held at any time, so memory stays flat
+however large the file is.
+"""
+
+import io
+import os
+import csv
+import sys
+import json
+import asyncio
+from typing import IO, Iterator, List, Optional, Tuple, AsyncIterator
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.services.classifier_pool import ClassifierPool
+
+FORMATS = ("csv", "jsonl")
+
+# Report texts routinely exceed csv's 128 KiB default field limit
+csv.field_size_limit(min(sys.maxsize, 2**31 - 1))
+
+# (line or row number, client id, text, parse error)
+Record = Tuple[int, Optional[str], Optional[str], Optional[str]]
+
+
+def detect_format(filename: Optional[str], requested: Optional[str]) -> Optional[str]:
+    if requested:
+        return requested
+    name = (filename or "").lower()
+    if name.endswith(".csv"):
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    return None
+
+
+def detach_upload(upload: UploadFile) -> IO[bytes]:
+    """Independent handle on an uploaded file that outlives the request handler.
+
+    FastAPI closes form files when the endpoint returns, before a streamed
+    response is sent. Rolling the spooled file over to disk and duplicating its
+    descriptor keeps the data readable until the stream closes the copy.
+    """
+    upload.file.rollover()
+    raw = os.fdopen(os.dup(upload.file.fileno()), "rb")
+    raw.seek(0)
+    return raw
+
+
+def open_records(raw: IO[bytes], fmt: str, text_field: str, id_field: str) -> Iterator[Record]:
+    """Record iterator over an uploaded file; raises ValueError for an unusable CSV header."""
+    stream = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        if reader.fieldnames is None or text_field not in reader.fieldnames:
+            raise ValueError(f"CSV header must include a '{text_field}' column")
+        return _csv_records(reader, text_field, id_field)
+    return _jsonl_records(stream, text_field, id_field)
+
+
+def _csv_records(reader: csv.DictReader, text_field: str, id_field: str) -> Iterator[Record]:
+    for number, row in enumerate(reader, start=1):
+        yield number, row.get(id_field) or None, row.get(text_field) or "", None
+
+
+def _jsonl_records(stream: IO[str], text_field: str, id_field: str) -> Iterator[Record]:
+    """One record per JSONL line; malformed lines become per-record errors."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+            if not isinstance(item, dict):
+                raise TypeError("expected a JSON object")
+            text = item[text_field]
+            if not isinstance(text, str):
+                raise TypeError(f"'{text_field}' must be a string")
+        except (ValueError, KeyError, TypeError) as exc:
+            message = f"missing '{text_field}'" if isinstance(exc, KeyError) else str(exc)
+            yield number, None, None, f"Invalid record: {message}"
+            continue
+        record_id = item.get(id_field)
+        yield number, str(record_id) if record_id is not None else None, text, None
+
+
+def _take(records: Iterator[Record], size: int) -> List[Record]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == size:
+            break
+    return chunk
+
+
+async def _classify_records(pool: ClassifierPool, chunk: List[Record]) -> Tuple[List[str], int]:
+    """NDJSON lines for a chunk and the number of failed records."""
+    valid = [r for r in chunk if r[3] is None]
+    outcomes = iter(await pool.classify_chunk([r[2] for r in valid]) if valid else [])
+    lines = []
+    failed = 0
+    for number, record_id, _, parse_error in chunk:
+        result, error = (None, parse_error) if parse_error else next(outcomes)
+        failed += error is not None
+        lines.append(json.dumps({
+            "record": number,
+            "id": record_id,
+            "result": result.model_dump() if result is not None else None,
+            "error": error,
+        }) + "\n")
+    return lines, failed
+
+
+async def classify_stream(records: Iterator[Record], pool: ClassifierPool,
+                          chunk_size: int, source: IO[bytes]) -> AsyncIterator[str]:
+    """Classify records chunk by chunk, yielding NDJSON lines in completion order.
+
+    At most one chunk per worker is in flight; parsing runs in the threadpool so
+    reading the spooled file never blocks the event loop. The final line is a
+    summary with the succeeded/failed totals. `source` is closed when the stream ends.
+    """
+    pending: set = set()
+    exhausted = False
+    succeeded = failed = 0
+    try:
+        while True:
+            while not exhausted and len(pending) < pool.workers:
+                chunk = await run_in_threadpool(_take, records, chunk_size)
+                if not chunk:
+                    exhausted = True
+                    break
+                pending.add(asyncio.ensure_future(_classify_records(pool, chunk)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                lines, chunk_failed = task.result()
+                succeeded += len(lines) - chunk_failed
+                failed += chunk_failed
+                yield "".join(lines)
+        yield json.dumps({"done": True, "succeeded": succeeded, "failed": failed}) + "\n"
+    finally:
+        # The client went away: drop chunks that have not been classified yet
+        for task in pending:
+            task.cancel()
+        source.close()
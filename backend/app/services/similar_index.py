@@ -0,0 +1,344 @@
+"""
+Similar-report search over an in-process IVF index.
+
+Reports are embedded as hashed TF-IDF vectors: lower-cased word unigrams and
+bigrams are hashed (with a sign bit) into DIM buckets, term counts are
+dampened with log1p, weighted by the inverse document frequency of each
+bucket and L2-normalized, so a dot product is a cosine similarity.
+
+The index is an inverted file (IVF): spherical k-means centroids partition
+the vectors into lists, and a query only scores the vectors in its nprobe
+closest lists. Vectors are stored as int8 with a per-row scale (a quarter
+of float32's size, and cheaper to widen than float16). Vectors, scales,
+report ids and list assignments live in raw memory-mapped files sized to a capacity that doubles as reports are added;
+meta.json records how many rows are valid and is replaced atomically after
+the rows are written, so readers never see a partial append. A rebuild
+writes a new build directory and switches meta.json to it. Readers serve
+from an immutable IndexSnapshot that refresh() replaces in one assignment, so
+a search never mixes one build's centroids or lists with another's rows.
+
+Layout under the index directory:
+
+    meta.json                  build, dim, nlist, count, capacity
+    <build>/centroids.npy      (nlist, dim) float32
+    <build>/idf.npy            (dim,) float32
+    <build>/vectors.i8         (capacity, dim) int8
+    <build>/scales.f32         (capacity,) float32 row scale
+    <build>/ids.i64            (capacity,) int64 report ids
+    <build>/lists.i32          (capacity,) int32 centroid per row
+"""
+
+import os
+import re
+import json
+import uuid
+import zlib
+import shutil
+import threading
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+DIM = 256
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-]*")
+INITIAL_CAPACITY = 1 << 14
+
+
+@lru_cache(maxsize=1 << 20)
+def _feature_hash(feature: str) -> Tuple[int, float]:
+    h = zlib.crc32(feature.encode())
+    return h % DIM, 1.0 if (h >> 16) & 1 else -1.0
+
+
+def term_counts(texts: Sequence[str]) -> np.ndarray:
+    """(texts x DIM) signed, log-dampened hashed unigram and bigram counts."""
+    rows: List[int] = []
+    buckets: List[int] = []
+    signs: List[float] = []
+    for row, text in enumerate(texts):
+        tokens = TOKEN_RE.findall(text.lower())
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        for feature in features:
+            bucket, sign = _feature_hash(feature)
+            buckets.append(bucket)
+            signs.append(sign)
+        rows.extend([row] * len(features))
+    flat = np.bincount(np.array(rows, dtype=np.int64) * DIM + np.array(buckets, dtype=np.int64),
+                       weights=signs, minlength=len(texts) * DIM)
+    counts = flat.reshape(len(texts), DIM).astype(np.float32)
+    return np.sign(counts) * np.log1p(np.abs(counts))
+
+
+def fit_idf(counts: np.ndarray) -> np.ndarray:
+    df = np.count_nonzero(counts, axis=0)
+    return (np.log((1 + len(counts)) / (1 + df)) + 1).astype(np.float32)
+
+
+def embed(texts: Sequence[str], idf: np.ndarray) -> np.ndarray:
+    """Unit-length hashed TF-IDF vectors; texts without any token embed as zeros."""
+    vectors = term_counts(texts) * idf
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """int8 rows and the per-row scale that maps them back to float."""
+    peak = np.abs(vectors).max(axis=1)
+    scales = np.where(peak == 0, 1, peak) / 127
+    return np.round(vectors / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means: centroids are renormalized means of their assigned vectors."""
+    rng = np.random.default_rng(seed)
+    vectors = vectors[np.linalg.norm(vectors, axis=1) > 0]
+    nlist = max(1, min(nlist, len(vectors)))
+    centroids = vectors[rng.choice(len(vectors), nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = assign_lists(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, vectors)
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        empty = norms[:, 0] == 0
+        # Empty lists are reseeded from random vectors rather than left dead
+        sums[empty] = vectors[rng.choice(len(vectors), int(empty.sum()))]
+        centroids = sums / np.where(empty[:, None], 1, np.where(norms == 0, 1, norms))
+    return centroids.astype(np.float32)
+
+
+def assign_lists(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192) -> np.ndarray:
+    return np.concatenate([
+        np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1) for i in range(0, len(vectors), chunk)
+    ]).astype(np.int32) if len(vectors) else np.zeros(0, dtype=np.int32)
+
+
+def extend_lists(lists: Sequence[np.ndarray], assignments: np.ndarray, start: int, end: int) -> List[np.ndarray]:
+    """New per-centroid row lists with rows start..end added; the input lists are not modified."""
+    lists = list(lists)
+    if end <= start:
+        return lists
+    assign = np.asarray(assignments[start:end])
+    order = np.argsort(assign, kind="stable")
+    bounds = np.searchsorted(assign[order], np.arange(len(lists) + 1))
+    for lst in np.unique(assign):
+        rows = order[bounds[lst]:bounds[lst + 1]] + start
+        lists[lst] = np.concatenate([lists[lst], rows])
+    return lists
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """One published state of the index. Never modified after construction:
+    readers take a single reference and use nothing else for a request."""
+    build: str
+    centroids: np.ndarray
+    idf: np.ndarray
+    vectors: np.ndarray
+    scales: np.ndarray
+    ids: np.ndarray
+    assignments: np.ndarray
+    lists: Tuple[np.ndarray, ...]
+    count: int
+
+    @cached_property
+    def _id_order(self) -> np.ndarray:
+        return np.argsort(self.ids[:self.count], kind="stable")
+
+    @property
+    def max_id(self) -> int:
+        return int(np.max(self.ids[:self.count])) if self.count else 0
+
+    def vector_for(self, report_id: int) -> Optional[np.ndarray]:
+        """Stored vector of an indexed report."""
+        order = self._id_order
+        ids = self.ids[:self.count]
+        at = np.searchsorted(ids[order], report_id)
+        if at == len(order) or ids[order[at]] != report_id:
+            return None
+        row = order[at]
+        return np.asarray(self.vectors[row], dtype=np.float32) * self.scales[row]
+
+    def search(self, query: np.ndarray, k: int, nprobe: int,
+               exclude: Optional[int] = None) -> List[Tuple[int, float]]:
+        """(report id, cosine similarity) of the k best matches in the nprobe closest lists."""
+        if not np.any(query):
+            return []
+        nprobe = min(nprobe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self.lists[p] for p in probe])
+        if len(rows) == 0:
+            return []
+        rows.sort()  # sequential reads from the mapped files
+        scores = (np.asarray(self.vectors[rows], dtype=np.float32) @ query) * self.scales[rows]
+        ids = self.ids[rows]
+        if exclude is not None:
+            scores[ids == exclude] = -np.inf
+        top = min(k, len(rows))
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(int(ids[i]), round(float(scores[i]), 4)) for i in best if scores[i] > -np.inf]
+
+
+class SimilarIndex:
+    """Memory-mapped IVF index of report vectors; one writer, any number of readers.
+
+    The writer (create/open/add/publish) works on the instance's own arrays;
+    readers call refresh() and then use `snapshot`.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._meta_stamp: Optional[Tuple[int, int]] = None
+        self.build: Optional[str] = None
+        self.count = 0
+        self.capacity = 0
+        self._lists: List[np.ndarray] = []
+        self.snapshot: Optional[IndexSnapshot] = None
+
+    # --- building ---
+
+    @classmethod
+    def create(cls, path: str, centroids: np.ndarray, idf: np.ndarray) -> "SimilarIndex":
+        """Start a new, empty build; it replaces the served one when first published."""
+        index = cls(path)
+        index.build = "build-" + uuid.uuid4().hex[:12]
+        build_dir = index.path / index.build
+        build_dir.mkdir(parents=True)
+        np.save(build_dir / "centroids.npy", centroids.astype(np.float32))
+        np.save(build_dir / "idf.npy", idf.astype(np.float32))
+        index.centroids = centroids.astype(np.float32)
+        index.idf = idf.astype(np.float32)
+        index._lists = [np.zeros(0, dtype=np.int64) for _ in range(len(centroids))]
+        index._map(INITIAL_CAPACITY)
+        return index
+
+    def _map(self, capacity: int) -> None:
+        self.vectors, self.scales, self.ids, self.assignments = self._map_files(self.build, capacity, "r+")
+        self.capacity = capacity
+
+    def _map_files(self, build: str, capacity: int, mode: str) -> tuple:
+        build_dir = self.path / build
+        vectors, scales, ids, lists = (build_dir / "vectors.i8", build_dir / "scales.f32",
+                                       build_dir / "ids.i64", build_dir / "lists.i32")
+        if mode == "r+":
+            # Files only ever grow, so readers' existing mappings stay valid
+            for file, width in ((vectors, DIM), (scales, 4), (ids, 8), (lists, 4)):
+                with open(file, "ab") as f:
+                    if f.tell() < capacity * width:
+                        f.truncate(capacity * width)
+        return (np.memmap(vectors, dtype=np.int8, mode=mode, shape=(capacity, DIM)),
+                np.memmap(scales, dtype=np.float32, mode=mode, shape=(capacity,)),
+                np.memmap(ids, dtype=np.int64, mode=mode, shape=(capacity,)),
+                np.memmap(lists, dtype=np.int32, mode=mode, shape=(capacity,)))
+
+    def add(self, report_ids: Sequence[int], vectors: np.ndarray, publish: bool = True) -> None:
+        """Append vectors, making them visible to readers unless publish is False."""
+        if len(report_ids) == 0:
+            return
+        needed = self.count + len(report_ids)
+        if needed > self.capacity:
+            capacity = self.capacity
+            while capacity < needed:
+                capacity *= 2
+            self._map(capacity)
+        start, end = self.count, needed
+        assign = assign_lists(vectors, self.centroids)
+        quantized, scales = quantize(vectors)
+        self.vectors[start:end] = quantized
+        self.scales[start:end] = scales
+        self.ids[start:end] = np.asarray(report_ids, dtype=np.int64)
+        self.assignments[start:end] = assign
+        for m in (self.vectors, self.scales, self.ids, self.assignments):
+            m.flush()
+        self._extend_lists(start, end)
+        self.count = end
+        if publish:
+            self.publish()
+
+    def publish(self) -> None:
+        """Atomically point meta.json at this build and its current row count."""
+        meta = {"build": self.build, "dim": DIM, "nlist": len(self.centroids),
+                "count": self.count, "capacity": self.capacity}
+        tmp = self.path / f"meta.json.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(meta))
+        previous = self._read_meta()
+        os.replace(tmp, self.path / "meta.json")
+        if previous and previous["build"] != self.build:
+            # Readers holding the old build keep their mappings until they refresh
+            shutil.rmtree(self.path / previous["build"], ignore_errors=True)
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            return json.loads((self.path / "meta.json").read_text())
+        except FileNotFoundError:
+            return None
+
+    # --- reading ---
+
+    def refresh(self) -> bool:
+        """Pick up rows appended (or a rebuild published) since the last call; False if no index.
+
+        The next snapshot is built on the side and published with one assignment;
+        the previous one is left untouched for searches already holding it.
+        """
+        try:
+            stat = os.stat(self.path / "meta.json")
+        except FileNotFoundError:
+            return False
+        # meta.json is replaced, never rewritten in place, so a new inode means new rows
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._meta_stamp:
+            return True
+        with self._lock:
+            if stamp == self._meta_stamp:
+                return True
+            meta = self._read_meta()
+            current = self.snapshot
+            if current is None or meta["build"] != current.build:
+                build = meta["build"]
+                centroids = np.load(self.path / build / "centroids.npy")
+                idf = np.load(self.path / build / "idf.npy")
+                lists: Sequence[np.ndarray] = [np.zeros(0, dtype=np.int64) for _ in range(len(centroids))]
+                start = 0
+                mapped = self._map_files(build, meta["capacity"], "r")
+            else:
+                build, centroids, idf, lists, start = (current.build, current.centroids, current.idf,
+                                                       current.lists, current.count)
+                mapped = (current.vectors, current.scales, current.ids, current.assignments)
+                if meta["capacity"] != len(current.ids):
+                    mapped = self._map_files(build, meta["capacity"], "r")
+            vectors, scales, ids, assignments = mapped
+            self.snapshot = IndexSnapshot(
+                build=build, centroids=centroids, idf=idf, vectors=vectors, scales=scales, ids=ids,
+                assignments=assignments, lists=tuple(extend_lists(lists, assignments, start, meta["count"])),
+                count=meta["count"],
+            )
+            self._meta_stamp = stamp
+        return True
+
+    @classmethod
+    def open(cls, path: str) -> Optional["SimilarIndex"]:
+        """Index for writing more reports into the current build, or None if none exists."""
+        index = cls(path)
+        meta = index._read_meta()
+        if meta is None:
+            return None
+        index.build = meta["build"]
+        index.centroids = np.load(index.path / index.build / "centroids.npy")
+        index.idf = np.load(index.path / index.build / "idf.npy")
+        index._lists = [np.zeros(0, dtype=np.int64) for _ in range(len(index.centroids))]
+        index._map(meta["capacity"])
+        index._extend_lists(0, meta["count"])
+        index.count = meta["count"]
+        return index
+
+    def _extend_lists(self, start: int, end: int) -> None:
+        self._lists = extend_lists(self._lists, self.assignments, start, end)
+
+    @property
+    def max_id(self) -> int:
+        return int(np.max(self.ids[:self.count])) if self.count else 0
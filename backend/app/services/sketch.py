@@ -0,0 +1,90 @@
+"""
+DDSketch quantile sketches decoded from demographic_sketch_bins.
+
+Bucket i holds values in (gamma^(i-1), gamma^i]; any quantile read back from the
+sketch is within RELATIVE_ACCURACY of the true value. The bucket mapping is
+computed in SQL (`sketch_bucket` in migration 009) and must stay in sync with
+the constants here.
+"""
+
+import math
+from typing import Dict, Iterable, List, Tuple
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+
+METRIC_AGE = 1
+METRIC_WEIGHT = 2
+
+
+def bucket_index(value: float) -> int:
+    return math.ceil(math.log(max(value, 0.01)) / math.log(GAMMA))
+
+
+def bucket_value(index: int) -> float:
+    """Representative value of a bucket: the point with equal relative error to both bounds."""
+    return 2 * GAMMA ** index / (GAMMA + 1)
+
+
+class DDSketch:
+    """Mergeable sketch over positive values, stored as bucket -> count."""
+
+    def __init__(self, bins: Dict[int, int] | None = None):
+        self.bins: Dict[int, int] = {}
+        if bins:
+            for index, count in bins.items():
+                self.add_bucket(index, count)
+
+    def add(self, value: float, count: int = 1) -> None:
+        self.add_bucket(bucket_index(value), count)
+
+    def add_bucket(self, index: int, count: int) -> None:
+        if count:
+            self.bins[index] = self.bins.get(index, 0) + count
+
+    def merge(self, other: "DDSketch") -> "DDSketch":
+        for index, count in other.bins.items():
+            self.add_bucket(index, count)
+        return self
+
+    @property
+    def count(self) -> int:
+        return sum(c for c in self.bins.values() if c > 0)
+
+    def _sorted_bins(self) -> List[Tuple[int, int]]:
+        return sorted((i, c) for i, c in self.bins.items() if c > 0)
+
+    def quantile(self, q: float) -> float | None:
+        total = self.count
+        if total == 0:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for index, count in self._sorted_bins():
+            seen += count
+            if seen > rank:
+                return bucket_value(index)
+        return bucket_value(self._sorted_bins()[-1][0])
+
+    def mean(self) -> float | None:
+        total = self.count
+        if total == 0:
+            return None
+        return sum(bucket_value(i) * c for i, c in self._sorted_bins()) / total
+
+    def histogram(self, edges: Iterable[float]) -> List[Tuple[float, float, int]]:
+        """Re-bin the sketch into fixed-width display bins given ascending edges.
+
+        Values past the last edge are counted in the final bin.
+        """
+        edges = list(edges)
+        counts = [0] * (len(edges) - 1)
+        for index, count in self._sorted_bins():
+            value = bucket_value(index)
+            position = len(counts) - 1
+            for b in range(len(counts)):
+                if value < edges[b + 1]:
+                    position = b
+                    break
+            counts[position] += count
+        return [(edges[b], edges[b + 1], counts[b]) for b in range(len(counts))]
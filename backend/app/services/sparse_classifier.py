@@ -0,0 +1,183 @@
+"""
+Vectorized batch scoring for the keyword classifier.
+
+A batch of reports is lower-cased and joined into one corpus. Each literal
+keyword is located with str.find across the whole corpus and the hits are
+binned per report into a SciPy sparse term-count matrix (reports x patterns);
+the few real regexes run over the same corpus when they cannot match across
+the joins, and report by report otherwise. Label scores are the count matrix
+times the per-label weights, then normalized with array operations.
+
+Results are identical to BertClassifier.classify: the weighted counts are
+accumulated column by column in CANCER_PATTERNS order (a sparse/BLAS matrix
+product would reorder, and on some CPUs fuse, the float additions), totals
+are summed label by label like Python's sum(), and rounding uses Python's
+round() rather than np.round.
+"""
+
+import re
+from typing import List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from app.schemas.schemas import ClassifyResult
+from app.services.bert_service import (
+    BertClassifier, CANCER_PATTERNS, CLASSIFIER_VERSION, _literal_alternatives
+)
+
+# Reports are joined with a newline: no literal keyword contains one, so no
+# match can span two reports
+SEPARATOR = "\n"
+
+# Below this many reports the matrix set-up costs more than it saves, and the
+# scalar classifier gives the same results
+MIN_BATCH = 128
+
+
+def _lowered_regex(pattern: str) -> "re.Pattern":
+    """Regex equivalent to `pattern` with IGNORECASE when run on lower-cased ASCII text.
+
+    Dropping IGNORECASE lets the regex engine use its literal-prefix search,
+    which is only safe when lower-casing the pattern cannot change an escape.
+    """
+    if "\\" not in pattern.replace("\\b", ""):
+        return re.compile(pattern.lower())
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _corpus_safe(regex: "re.Pattern") -> bool:
+    """Whether the regex can be run over the joined corpus instead of report by report.
+
+    Without character classes or escapes other than \\b, nothing in the pattern
+    can match the newline separator, so no match spans two reports; patterns
+    that can match the empty string would count differently at the joins.
+    """
+    source = regex.pattern
+    return "[" not in source and "\\" not in source.replace("\\b", "") and regex.fullmatch("") is None
+
+
+class SparseKeywordClassifier:
+    """Batch scorer with the same patterns, weights and outputs as BertClassifier."""
+
+    version = CLASSIFIER_VERSION
+
+    def __init__(self):
+        self.labels = list(CANCER_PATTERNS)
+        self.patterns = [p for patterns in CANCER_PATTERNS.values() for p in patterns]
+        self.pattern_labels = np.array([
+            label for label, patterns in enumerate(CANCER_PATTERNS.values()) for _ in patterns
+        ])
+        self.weights = np.array([
+            1.0 / len(patterns) for patterns in CANCER_PATTERNS.values() for _ in patterns
+        ])
+        self.literals: List[Optional[List[str]]] = []
+        self.regexes: List[Optional["re.Pattern"]] = []
+        self.corpus_safe: List[bool] = []
+        for pattern in self.patterns:
+            literals = _literal_alternatives(pattern)
+            if literals is not None and any(SEPARATOR in literal for literal in literals):
+                literals = None
+            regex = _lowered_regex(pattern) if literals is None else None
+            self.literals.append(literals)
+            self.regexes.append(regex)
+            self.corpus_safe.append(regex is None or _corpus_safe(regex))
+        # Non-ASCII reports need the regex engine's Unicode case folding
+        self.fallback = BertClassifier()
+
+    def term_counts(self, texts: Sequence[str]) -> sparse.csc_matrix:
+        """Sparse (reports x patterns) matrix of case-insensitive match counts."""
+        ascii_rows = np.array([i for i, text in enumerate(texts) if text.isascii()], dtype=np.int64)
+        lowered = [texts[i].lower() for i in ascii_rows]
+        corpus = SEPARATOR.join(lowered)
+        ends = np.cumsum([len(text) + len(SEPARATOR) for text in lowered], dtype=np.int64)
+
+        rows, cols, data = [], [], []
+        for j, literals in enumerate(self.literals):
+            regex = self.regexes[j]
+            if self.corpus_safe[j]:
+                positions = []
+                if regex is not None:
+                    positions = [m.start() for m in regex.finditer(corpus)]
+                for literal in literals or ():
+                    find, step = corpus.find, len(literal)
+                    at = find(literal)
+                    while at != -1:
+                        positions.append(at)
+                        at = find(literal, at + step)
+                if positions:
+                    owners = np.searchsorted(ends, np.array(positions, dtype=np.int64), side="right")
+                    rows.append(ascii_rows[owners])
+                    cols.append(np.full(len(owners), j))
+                    data.append(np.ones(len(owners), dtype=np.int64))
+            else:
+                counts = np.array([len(regex.findall(text)) for text in lowered], dtype=np.int64)
+                hit = counts.nonzero()[0]
+                rows.append(ascii_rows[hit])
+                cols.append(np.full(len(hit), j))
+                data.append(counts[hit])
+
+        for i, text in enumerate(texts):
+            if not text.isascii():
+                flat = [c for counts in self.fallback.match_counts(text).values() for c in counts]
+                hit = np.nonzero(flat)[0]
+                rows.append(np.full(len(hit), i))
+                cols.append(hit)
+                data.append(np.array(flat, dtype=np.int64)[hit])
+
+        shape = (len(texts), len(self.patterns))
+        if not rows:
+            return sparse.csc_matrix(shape, dtype=np.int64)
+        # Duplicate (report, pattern) entries are summed into the count
+        return sparse.coo_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))), shape=shape
+        ).tocsc()
+
+    def scores(self, counts: sparse.csc_matrix) -> np.ndarray:
+        """(reports x labels) scores: counts times the per-label weight matrix."""
+        scores = np.zeros((counts.shape[0], len(self.labels)))
+        for j in range(counts.shape[1]):
+            column = counts[:, j].toarray().ravel()
+            scores[:, self.pattern_labels[j]] += column * self.weights[j]
+        return scores
+
+    def classify_batch(self, texts: Sequence[str]) -> List[ClassifyResult]:
+        if len(texts) < MIN_BATCH:
+            return [self.fallback.classify(text) for text in texts]
+        scores = self.scores(self.term_counts(texts))
+        total = scores[:, 0].copy()
+        for label in range(1, len(self.labels)):
+            total += scores[:, label]
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            probabilities = scores / total[:, None]
+        rounded = [[round(p, 4) for p in row] for row in probabilities.tolist()]
+        # Stable descending sort keeps label order among ties, like sorted(..., reverse=True)
+        order = np.argsort(-np.array(rounded), axis=1, kind="stable").tolist()
+
+        unknown = ClassifyResult(
+            predicted_cancer_type="Unknown",
+            confidence=0.1,
+            top_predictions=[
+                {"cancer_type": ct, "confidence": round(1.0 / len(self.labels), 4)}
+                for ct in self.labels[:3]
+            ],
+        )
+        results = []
+        for i in range(len(texts)):
+            if total[i] == 0:
+                results.append(unknown.model_copy(deep=True))
+                continue
+            top = order[i][:5]
+            results.append(ClassifyResult(
+                predicted_cancer_type=self.labels[top[0]],
+                confidence=rounded[i][top[0]],
+                top_predictions=[
+                    {"cancer_type": self.labels[k], "confidence": rounded[i][k]} for k in top
+                ],
+            ))
+        return results
+
+    def classify(self, text: str) -> ClassifyResult:
+        # A one-report matrix costs more than it saves; the scalar path gives the same result
+        return self.fallback.classify(text)
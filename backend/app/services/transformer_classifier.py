@@ -0,0 +1,130 @@
+"""
+ONNX transformer backend for report classification.
+
+Loads a sequence-classification model exported to ONNX (see
+ml/scripts/export_onnx.py, or ml/scripts/build_tiny_model.py for a small
+offline model) from a directory holding:
+
+    model.onnx      inputs input_ids / attention_mask [/ token_type_ids], output logits
+    tokenizer.json  Hugging Face `tokenizers` definition
+    config.json     {"id2label": {"0": "Lymphoma", ...}}
+
+Batches are sorted by token length and split into buckets padded only to the
+longest report in the bucket (rounded up to PAD_MULTIPLE), so short reports
+do not pay for the padding of long ones. Reports longer than max_length
+tokens are truncated.
+
+onnxruntime and tokenizers are only needed when this backend is selected; they
+are listed in requirements-transformer.txt, not requirements.txt.
+"""
+
+import json
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.config import settings
+from app.schemas.schemas import ClassifyResult
+
+MODEL_FILES = ("model.onnx", "tokenizer.json", "config.json")
+
+# Padded lengths are rounded up to a multiple of this, so buckets share shapes
+PAD_MULTIPLE = 16
+
+
+def model_version(model_dir: str) -> str:
+    """Classifier version for a model directory, derived from its file contents."""
+    digest = hashlib.sha256()
+    for name in MODEL_FILES:
+        path = Path(model_dir) / name
+        if not path.exists():
+            raise RuntimeError(f"Transformer model file not found: {path}")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return "onnx-" + digest.hexdigest()[:12]
+
+
+class TransformerClassifier:
+    """CPU ONNX Runtime classifier over a tokenizer and an exported model."""
+
+    def __init__(self, model_dir: Optional[str] = None, max_length: Optional[int] = None,
+                 batch_size: Optional[int] = None, threads: Optional[int] = None):
+        try:
+            import onnxruntime
+            from tokenizers import Tokenizer
+        except ImportError as exc:
+            raise RuntimeError(
+                "The transformer backend needs onnxruntime and tokenizers: "
+                "pip install -r requirements-transformer.txt"
+            ) from exc
+
+        model_dir = model_dir or settings.TRANSFORMER_MODEL_DIR
+        self.version = model_version(model_dir)
+        self.max_length = max_length or settings.TRANSFORMER_MAX_LENGTH
+        self.batch_size = batch_size or settings.TRANSFORMER_BATCH_SIZE
+
+        config = json.loads((Path(model_dir) / "config.json").read_text())
+        id2label = config["id2label"]
+        self.labels = [id2label[str(i)] for i in range(len(id2label))]
+
+        self.tokenizer = Tokenizer.from_file(str(Path(model_dir) / "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.max_length)
+        self.tokenizer.no_padding()
+
+        options = onnxruntime.SessionOptions()
+        # One pool worker per core already: more intra-op threads only oversubscribe
+        options.intra_op_num_threads = threads or settings.TRANSFORMER_THREADS
+        options.inter_op_num_threads = 1
+        self.session = onnxruntime.InferenceSession(
+            str(Path(model_dir) / "model.onnx"), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _buckets(self, lengths: List[int]) -> List[List[int]]:
+        """Report indices grouped by similar token length, at most batch_size each."""
+        order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+        return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+    def _logits(self, encodings: list, indices: List[int]) -> np.ndarray:
+        longest = max(len(encodings[i].ids) for i in indices)
+        width = min(-(-longest // PAD_MULTIPLE) * PAD_MULTIPLE, self.max_length)
+        input_ids = np.zeros((len(indices), width), dtype=np.int64)
+        attention_mask = np.zeros((len(indices), width), dtype=np.int64)
+        type_ids = np.zeros((len(indices), width), dtype=np.int64)
+        for row, i in enumerate(indices):
+            encoding = encodings[i]
+            n = len(encoding.ids)
+            input_ids[row, :n] = encoding.ids
+            attention_mask[row, :n] = 1
+            type_ids[row, :n] = encoding.type_ids
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask, "token_type_ids": type_ids}
+        return self.session.run(["logits"], {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+    def probabilities(self, texts: Sequence[str]) -> np.ndarray:
+        """(reports x labels) softmax probabilities in input order."""
+        encodings = self.tokenizer.encode_batch(list(texts))
+        logits = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        for indices in self._buckets([len(e.ids) for e in encodings]):
+            logits[indices] = self._logits(encodings, indices)
+        shifted = np.exp(logits - logits.max(axis=1, keepdims=True))
+        return shifted / shifted.sum(axis=1, keepdims=True)
+
+    def classify_batch(self, texts: Sequence[str]) -> List[ClassifyResult]:
+        if not texts:
+            return []
+        results = []
+        for row in self.probabilities(texts).tolist():
+            probs: Dict[str, float] = dict(zip(self.labels, row))
+            top = sorted(probs.items(), key=lambda x: x[1], reverse=True)[:5]
+            results.append(ClassifyResult(
+                predicted_cancer_type=top[0][0],
+                confidence=round(top[0][1], 4),
+                top_predictions=[{"cancer_type": ct, "confidence": round(p, 4)} for ct, p in top],
+            ))
+        return results
+
+    def classify(self, text: str) -> ClassifyResult:
+        return self.classify_batch([text])[0]
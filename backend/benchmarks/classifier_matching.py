@@ -0,0 +1,146 @@
+"""
+Microbenchmark for the keyword classifiers' pattern matching.
+
+Compares the original one-findall-per-pattern scoring against the literal
+counting used by BertClassifier (and VetBERTClassifier from ml/, when the
+repository checkout is available) on synthetic reports of increasing length.
+Every generated report is first checked for identical results.
+
+    python -m benchmarks.classifier_matching --reports 200
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from app.services.bert_service import BertClassifier, CANCER_PATTERNS
+
+ML_MODEL_DIR = Path(__file__).resolve().parents[2] / "ml" / "model"
+
+LENGTHS = [500, 2_000, 10_000, 50_000]
+
+FILLER = (
+    "sections examined with moderate hemorrhage and necrosis; the overlying epidermis is "
+    "ulcerated and margins were inked prior to trimming. cellularity is high and nuclei "
+    "show anisokaryosis. "
+).split()
+
+# Case variants, near misses and overlapping keywords that the fast path must count
+# exactly like the regex engine does
+TRICKY = [
+    "CD31", "cd3", "CD3CD31", "Ki-67", "KI-67", "bone-forming", "boneforming", "granule",
+    "GRANULAR", "collagenous", "SCC", "xSCCx", "TCC", "papillary and transitional",
+    "Patnaikiupel", "vWFactor VIII", "b-cellt-cell", "lymphomalymphoma", "Melan-A",
+]
+
+
+def legacy_match_counts(classifier: BertClassifier, text: str) -> Dict[str, List[int]]:
+    """BertClassifier matching as it was before literal counting: one findall per pattern."""
+    return {
+        cancer_type: [len(pattern.findall(text)) for pattern in compiled_patterns]
+        for cancer_type, compiled_patterns in classifier.patterns.items()
+    }
+
+
+def legacy_vetbert_predict(classifier, text: str) -> Dict:
+    """VetBERTClassifier.predict as it was before literal counting."""
+    scores = {}
+    for cancer_type, patterns in classifier.compiled_patterns.items():
+        score = 0.0
+        for pattern, weight in patterns:
+            score += len(pattern.findall(text)) * weight
+        scores[cancer_type] = score
+    total = sum(scores.values())
+    if total == 0:
+        probs = {ct: 1.0 / len(scores) for ct in scores}
+    else:
+        probs = {ct: score / total for ct, score in scores.items()}
+    sorted_preds = sorted(probs.items(), key=lambda x: x[1], reverse=True)
+    return {
+        "predicted_label": sorted_preds[0][0],
+        "confidence": round(sorted_preds[0][1], 4),
+        "all_probabilities": {ct: round(p, 4) for ct, p in sorted_preds},
+    }
+
+
+def make_report(rng: random.Random, length: int) -> str:
+    keywords = [p.replace("\\b", "") for patterns in CANCER_PATTERNS.values() for p in patterns
+                if not any(ch in p for ch in "()?.*")]
+    words: List[str] = []
+    size = 0
+    while size < length:
+        roll = rng.random()
+        if roll < 0.08:
+            word = rng.choice(keywords)
+        elif roll < 0.1:
+            word = rng.choice(TRICKY)
+        else:
+            word = rng.choice(FILLER)
+        if rng.random() < 0.1:
+            word = word.upper()
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)[:length]
+
+
+def time_per_report(fn: Callable[[str], object], texts: List[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            fn(text)
+        best = min(best, time.perf_counter() - start)
+    return best / len(texts) * 1000
+
+
+def load_vetbert():
+    if not (ML_MODEL_DIR / "classifier.py").exists():
+        return None
+    sys.path.insert(0, str(ML_MODEL_DIR))
+    from classifier import VetBERTClassifier
+    return VetBERTClassifier()
+
+
+def run(reports: int, repeat: int, seed: int) -> int:
+    rng = random.Random(seed)
+    bert = BertClassifier()
+    vetbert = load_vetbert()
+
+    corpus = {length: [make_report(rng, length) for _ in range(reports)] for length in LENGTHS}
+    # Non-ASCII reports take the regex fallback and must agree as well
+    corpus[LENGTHS[0]].append("Kelvin sign Ki-67 and ſquamous cells, CD31")
+
+    mismatches = 0
+    for texts in corpus.values():
+        for text in texts:
+            # classify() scores the counts exactly as before, so equal counts mean equal results
+            if bert.match_counts(text) != legacy_match_counts(bert, text):
+                mismatches += 1
+            if vetbert is not None and vetbert.predict(text) != legacy_vetbert_predict(vetbert, text):
+                mismatches += 1
+    if mismatches:
+        print(f"FAIL: {mismatches} reports scored differently")
+        return 1
+
+    print(f"{'classifier':<12} {'length':>8} {'findall ms':>11} {'literal ms':>11} {'speedup':>8}")
+    for length, texts in corpus.items():
+        rows = [("bert", lambda t: legacy_match_counts(bert, t), bert.match_counts)]
+        if vetbert is not None:
+            rows.append(("vetbert", lambda t: legacy_vetbert_predict(vetbert, t), vetbert.predict))
+        for name, legacy, fast in rows:
+            before = time_per_report(legacy, texts, repeat)
+            after = time_per_report(fast, texts, repeat)
+            print(f"{name:<12} {length:>8} {before:>11.3f} {after:>11.3f} {before / after:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark classifier keyword matching.")
+    parser.add_argument("--reports", type=int, default=100, help="Reports per length (default: 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions, best is kept")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args.reports, args.repeat, args.seed))
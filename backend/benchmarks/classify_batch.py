@@ -0,0 +1,92 @@
+"""
+Throughput benchmark for batch report classification.
+
+Posts a batch of synthetic reports to /api/v1/search/classify-batch in-process
+and compares the throughput with one /classify request per report (timed on a
+sample and extrapolated). Batch results are checked against the single-report
+endpoint before timing.
+
+    python -m benchmarks.classify_batch --reports 10000 --workers 4
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+
+import httpx
+
+from app.config import settings
+from app.main import app
+from app.routers import search
+from app.services.classifier_pool import ClassifierPool, CLASSIFIER_BACKENDS
+from benchmarks.classifier_matching import make_report
+
+BASE_URL = "http://bench"
+
+
+async def run(reports: int, length: int, workers: int, kind: str, backend: str, chunk_size: int,
+              single_sample: int, seed: int) -> int:
+    settings.CLASSIFY_BATCH_CHUNK_SIZE = chunk_size
+    settings.CLASSIFY_BATCH_MAX_REPORTS = max(settings.CLASSIFY_BATCH_MAX_REPORTS, reports)
+    search.classifier_pool = ClassifierPool(kind=kind, workers=workers, backend=backend,
+                                            queue_size=settings.CLASSIFIER_QUEUE_SIZE,
+                                            timeout=settings.CLASSIFIER_TIMEOUT_SECONDS)
+    rng = random.Random(seed)
+    texts = [make_report(rng, rng.randint(length // 2, length)) for _ in range(reports)]
+    texts[rng.randrange(reports)] = "   "  # one invalid report exercises partial failure
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url=BASE_URL, timeout=None) as client:
+            # Warm up the worker processes so start-up is not billed to either side
+            await client.post("/api/v1/search/classify-batch",
+                              json={"reports": [{"text": t} for t in texts[:workers * 2]]})
+
+            start = time.perf_counter()
+            response = await client.post("/api/v1/search/classify-batch",
+                                         json={"reports": [{"id": str(i), "text": t}
+                                                           for i, t in enumerate(texts)]})
+            batch_seconds = time.perf_counter() - start
+            response.raise_for_status()
+            body = response.json()
+
+            sample = [i for i in range(min(single_sample, reports)) if texts[i].strip()]
+            start = time.perf_counter()
+            singles = [await client.post("/api/v1/search/classify", json={"text": texts[i]})
+                       for i in sample]
+            single_seconds = (time.perf_counter() - start) / max(len(sample), 1) * reports
+    finally:
+        search.classifier_pool.shutdown()
+
+    results = body["results"]
+    if [r["index"] for r in results] != list(range(reports)) or body["failed"] != 1:
+        print("FAIL: batch results out of order or unexpected failures")
+        return 1
+    if any(results[i]["result"] != s.json() for i, s in zip(sample, singles)):
+        print("FAIL: batch results differ from single-report classification")
+        return 1
+
+    print(f"pool: {kind}, {backend} backend, {workers} workers, chunks of {chunk_size}; {reports} reports of ~{length} chars")
+    print(f"batch     {batch_seconds:8.2f} s  {reports / batch_seconds:10.0f} reports/s")
+    print(f"single    {single_seconds:8.2f} s  {reports / single_seconds:10.0f} reports/s  "
+          f"(extrapolated from {len(sample)} requests)")
+    print(f"speedup   {single_seconds / batch_seconds:8.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark batch report classification.")
+    parser.add_argument("--reports", type=int, default=10_000, help="Reports in the batch (default: 10000)")
+    parser.add_argument("--length", type=int, default=2_000, help="Maximum report length in characters")
+    parser.add_argument("--workers", type=int, default=settings.CLASSIFIER_WORKERS)
+    parser.add_argument("--kind", choices=["process", "thread"], default=settings.CLASSIFIER_POOL_KIND)
+    parser.add_argument("--backend", choices=sorted(CLASSIFIER_BACKENDS), default=settings.CLASSIFIER_BACKEND)
+    parser.add_argument("--chunk-size", type=int, default=settings.CLASSIFY_BATCH_CHUNK_SIZE)
+    parser.add_argument("--single-sample", type=int, default=500,
+                        help="Single-report requests timed for the comparison")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.reports, args.length, args.workers, args.kind, args.backend, args.chunk_size,
+                             args.single_sample, args.seed)))
@@ -0,0 +1,92 @@
+"""
+Throughput benchmark for micro-batched single-report classification.
+
+Drives ClassifierPool.classify (what /api/v1/search/classify awaits) with a
+fixed number of concurrent callers, first with micro-batching disabled and
+then enabled, and reports throughput, request latency and the per-batch
+statistics shown by /classify/metrics. The pool is driven directly because an
+in-process HTTP client would share, and saturate, the same event loop. No
+result cache is attached, so every request is scored.
+
+With the tiny offline model (ml/scripts/build_tiny_model.py):
+
+    TRANSFORMER_MODEL_DIR=../ml/model/vetbert-tiny \\
+        python -m benchmarks.micro_batching --backend transformer --concurrency 64
+"""
+
+import sys
+import time
+import random
+import asyncio
+import argparse
+from typing import List
+
+from app.config import settings
+from app.services.classifier_pool import ClassifierPool, CLASSIFIER_BACKENDS
+from app.services.sketch import DDSketch
+from benchmarks.classifier_matching import make_report
+
+
+async def drive(pool: ClassifierPool, texts: List[str], concurrency: int) -> DDSketch:
+    """Classify every text with `concurrency` requests in flight; returns request latencies in ms."""
+    latencies = DDSketch()
+    queue = iter(texts)
+
+    async def user():
+        for text in queue:
+            start = time.perf_counter()
+            await pool.classify(text)
+            latencies.add((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    return latencies
+
+
+async def run(requests: int, length: int, concurrency: int, workers: int, kind: str, backend: str,
+              batch_size: int, wait_ms: float, seed: int) -> int:
+    rng = random.Random(seed)
+    texts = [make_report(rng, rng.randint(length // 2, length)) for _ in range(requests)]
+
+    rows = []
+    for label, size, wait in (("unbatched", 1, 0.0), ("micro-batched", batch_size, wait_ms)):
+        pool = ClassifierPool(kind=kind, workers=workers, backend=backend,
+                              queue_size=max(settings.CLASSIFIER_QUEUE_SIZE, concurrency),
+                              timeout=60.0, max_batch_size=size, max_batch_wait_ms=wait)
+        try:
+            # Warm up the workers so model loading is not billed to either side
+            await drive(pool, texts[:workers * 4], workers * 4)
+            start = time.perf_counter()
+            latencies = await drive(pool, texts, concurrency)
+            seconds = time.perf_counter() - start
+        finally:
+            pool.shutdown()
+        rows.append((label, seconds, latencies, pool.metrics()["micro_batching"]))
+
+    print(f"pool: {kind}, {backend} backend, {workers} workers; {requests} requests of ~{length} chars, "
+          f"{concurrency} concurrent")
+    print(f"{'mode':<14} {'reports/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'batches':>8} {'mean size':>10} "
+          f"{'batch p50 ms':>13}")
+    for label, seconds, latencies, batching in rows:
+        mean_size = batching["mean_batch_size"]
+        batch_p50 = batching["batch_ms"]["p50"]
+        print(f"{label:<14} {requests / seconds:>10.0f} {latencies.quantile(0.5):>8.1f} "
+              f"{latencies.quantile(0.99):>8.1f} {batching['batches']:>8} "
+              f"{mean_size if mean_size is not None else '-':>10} "
+              f"{batch_p50 if batch_p50 is not None else '-':>13}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark micro-batching of single-report requests.")
+    parser.add_argument("--requests", type=int, default=5_000, help="Requests to send (default: 5000)")
+    parser.add_argument("--length", type=int, default=1_000, help="Maximum report length in characters")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight (default: 64)")
+    parser.add_argument("--workers", type=int, default=settings.CLASSIFIER_WORKERS)
+    parser.add_argument("--kind", choices=["process", "thread"], default=settings.CLASSIFIER_POOL_KIND)
+    parser.add_argument("--backend", choices=sorted(CLASSIFIER_BACKENDS), default=settings.CLASSIFIER_BACKEND)
+    parser.add_argument("--batch-size", type=int, default=max(settings.CLASSIFY_MICRO_BATCH_SIZE, 2))
+    parser.add_argument("--wait-ms", type=float, default=settings.CLASSIFY_MICRO_BATCH_WAIT_MS)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args.requests, args.length, args.concurrency, args.workers, args.kind,
+                             args.backend, args.batch_size, args.wait_ms, args.seed)))
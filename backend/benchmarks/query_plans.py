@@ -0,0 +1,306 @@
+"""
+Query-plan regression suite for the registry API.
+
+Seeds a scratch database at a chosen scale, calls every analytic endpoint over a
+matrix of representative filter combinations, captures each SQL statement the
+endpoint issues and re-runs it under EXPLAIN (ANALYZE, BUFFERS). The report lists
+per-query time, rows and buffers; the run fails when a selective query falls
+back to a sequential scan of a large table or an endpoint exceeds its budget.
+
+Runs against the `bench_db` PostGIS container:
+    docker compose --profile bench run --rm bench --scale 500k
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import contextvars
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import httpx
+import psycopg2
+from sqlalchemy import event
+
+from app.config import settings
+from app.database import engine
+from app.main import app
+
+SCALES = {"5k": 5_000, "500k": 500_000, "5m": 5_000_000}
+
+SEED_DIR = Path(os.getenv("SEED_DIR", Path(__file__).resolve().parents[2] / "database" / "seed"))
+
+# Relations whose sequential scan counts as a regression for selective queries.
+# Partition names (cancer_cases_y2019, ...) match by prefix.
+LARGE_RELATIONS = ("patients", "cancer_cases", "pathology_reports", "fact_cases")
+
+# Per-endpoint time budget in milliseconds, summed over the endpoint's statements
+BUDGETS_MS = {
+    "/api/v1/dashboard/summary": 1500,
+    "/api/v1/dashboard/filters": 500,
+    "/api/v1/dashboard/facets": 1500,
+    "/api/v1/incidence": 1500,
+    "/api/v1/incidence/by-cancer-type": 800,
+    "/api/v1/incidence/by-species": 800,
+    "/api/v1/incidence/by-breed": 800,
+    "/api/v1/geo/counties": 1000,
+    "/api/v1/geo/counties/1": 500,
+    "/api/v1/trends/yearly": 800,
+    "/api/v1/trends/by-cancer-type": 800,
+    "/api/v1/search/reports": 300,
+}
+
+# Filter combinations; `selective` cases must not sequentially scan large tables
+FILTER_MATRIX = [
+    {"name": "unfiltered", "params": {}, "selective": False},
+    {"name": "species", "params": {"species": ["Cat"]}, "selective": False},
+    {"name": "year_range", "params": {"year_start": 2015, "year_end": 2020}, "selective": False},
+    {"name": "sex", "params": {"sex": "Neutered Male"}, "selective": False},
+    {"name": "cancer_county_year",
+     "params": {"cancer_type": ["Osteosarcoma"], "county": ["Amador"],
+                "year_start": 2020, "year_end": 2020},
+     "selective": True},
+    {"name": "all_filters",
+     "params": {"species": ["Dog"], "cancer_type": ["Hemangiosarcoma"], "county": ["Colusa"],
+                "year_start": 2022, "year_end": 2024, "sex": "Female"},
+     "selective": True},
+]
+
+SEARCH_MATRIX = [
+    {"name": "first_page", "params": {}, "selective": False},
+    {"name": "keyword", "params": {"keyword": "Patnaik"}, "selective": True},
+    {"name": "classification", "params": {"classification": "Melanoma"}, "selective": False},
+    {"name": "keyword_classification",
+     "params": {"keyword": "CD31", "classification": "Hemangiosarcoma"}, "selective": True},
+    {"name": "fuzzy_keyword", "params": {"keyword": "osteosarcma", "match": "fuzzy"}, "selective": True},
+    {"name": "features", "params": {"patnaik_grade": 3, "margin_status": "incomplete"}, "selective": True},
+    {"name": "keyword_facets", "params": {"keyword": "Patnaik", "facets": "true"}, "selective": True},
+]
+
+# Query parameters each endpoint understands
+ENDPOINT_PARAMS = {
+    "/api/v1/dashboard/summary": set(),
+    "/api/v1/dashboard/filters": set(),
+    "/api/v1/dashboard/facets": {"species", "cancer_type", "county", "year_start", "year_end", "sex"},
+    "/api/v1/incidence": {"species", "cancer_type", "county", "year_start", "year_end", "sex"},
+    "/api/v1/incidence/by-cancer-type": {"species", "county", "year_start", "year_end", "sex"},
+    "/api/v1/incidence/by-species": {"cancer_type", "county", "year_start", "year_end", "sex"},
+    "/api/v1/incidence/by-breed": {"species", "cancer_type", "county", "year_start", "year_end", "sex"},
+    "/api/v1/geo/counties": {"species", "cancer_type", "year_start", "year_end", "sex"},
+    "/api/v1/geo/counties/1": set(),
+    "/api/v1/trends/yearly": {"species", "cancer_type", "county", "sex"},
+    "/api/v1/trends/by-cancer-type": {"species", "county", "sex"},
+}
+
+# Endpoints that aggregate over every option by design; seq scans are expected
+FULL_SCAN_ENDPOINTS = {"/api/v1/dashboard/facets"}
+
+_capture: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("capture", default=None)
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _capture_statement(conn, cursor, statement, parameters, context, executemany):
+    captured = _capture.get()
+    if captured is not None and statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        captured.append((statement, parameters))
+
+
+@dataclass
+class QueryPlan:
+    statement: str
+    execution_ms: float
+    rows: int
+    shared_hit: int
+    shared_read: int
+    seq_scans: list[str] = field(default_factory=list)
+
+
+@dataclass
+class CaseResult:
+    endpoint: str
+    case: str
+    selective: bool
+    queries: list[QueryPlan]
+    failures: list[str]
+
+    @property
+    def total_ms(self) -> float:
+        return sum(q.execution_ms for q in self.queries)
+
+
+def _walk(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def _is_large(relation: str) -> bool:
+    return any(relation == r or relation.startswith(r + "_") for r in LARGE_RELATIONS)
+
+
+def _is_setting(statement: str) -> bool:
+    return "set_config(" in statement
+
+
+async def explain(conn, statement: str, parameters) -> QueryPlan:
+    result = await conn.exec_driver_sql(
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + statement, parameters
+    )
+    raw = result.scalar()
+    doc = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    root = doc["Plan"]
+    seq_scans = sorted({
+        node["Relation Name"] for node in _walk(root)
+        if node["Node Type"] == "Seq Scan" and _is_large(node["Relation Name"])
+    })
+    return QueryPlan(
+        statement=" ".join(statement.split()),
+        execution_ms=doc["Execution Time"],
+        rows=root["Actual Rows"],
+        shared_hit=root.get("Shared Hit Blocks", 0),
+        shared_read=root.get("Shared Read Blocks", 0),
+        seq_scans=seq_scans,
+    )
+
+
+async def replay(captured: list) -> list[QueryPlan]:
+    """EXPLAIN a request's statements in order, in one transaction on one connection.
+
+    Transaction-local settings the endpoint made (set_config(..., true), e.g. the
+    fuzzy-search similarity threshold) are re-applied rather than explained, so
+    later statements are planned under the same settings the endpoint used.
+    """
+    plans = []
+    async with engine.connect() as conn:
+        async with conn.begin() as transaction:
+            for statement, parameters in captured:
+                if _is_setting(statement):
+                    await conn.exec_driver_sql(statement, parameters)
+                else:
+                    plans.append(await explain(conn, statement, parameters))
+            await transaction.rollback()
+    return plans
+
+
+async def run_case(client: httpx.AsyncClient, endpoint: str, case: dict) -> CaseResult:
+    captured: list = []
+    token = _capture.set(captured)
+    try:
+        response = await client.get(endpoint, params=case["params"])
+    finally:
+        _capture.reset(token)
+
+    failures = []
+    if response.status_code != 200:
+        failures.append(f"HTTP {response.status_code}")
+
+    queries = await replay(captured)
+    budget = BUDGETS_MS.get(endpoint)
+    total = sum(q.execution_ms for q in queries)
+    if budget is not None and total > budget:
+        failures.append(f"{total:.1f} ms exceeds {budget} ms budget")
+    if case["selective"]:
+        for q in queries:
+            if q.seq_scans:
+                failures.append(f"seq scan on {', '.join(q.seq_scans)}")
+    return CaseResult(endpoint, case["name"], case["selective"], queries, failures)
+
+
+def cases_for(endpoint: str) -> list[dict]:
+    """Project the filter matrix onto the parameters an endpoint accepts, deduplicated."""
+    accepted = ENDPOINT_PARAMS[endpoint]
+    seen = set()
+    cases = []
+    for case in FILTER_MATRIX:
+        params = {k: v for k, v in case["params"].items() if k in accepted}
+        key = json.dumps(params, sort_keys=True)
+        if key in seen:
+            continue
+        seen.add(key)
+        cases.append({"name": case["name"], "params": params,
+                      "selective": (case["selective"] and params == case["params"]
+                                    and endpoint not in FULL_SCAN_ENDPOINTS)})
+    return cases
+
+
+def seed(total_cases: int):
+    """Reset the scratch database and seed it with `total_cases` cases."""
+    conn = psycopg2.connect(settings.DATABASE_URL_SYNC)
+    conn.autocommit = True
+    cur = conn.cursor()
+    print(f"Resetting database and seeding {total_cases:,} cases...")
+    cur.execute("TRUNCATE pathology_reports, fact_cases, cancer_cases, patients RESTART IDENTITY")
+    cur.execute("SELECT rebuild_demographic_sketches(), rebuild_report_counts(), rebuild_report_features(), "
+                "rebuild_report_terms()")
+    cur.close()
+    conn.close()
+
+    sys.path.insert(0, str(SEED_DIR))
+    import seed_mock_data
+    seed_mock_data.DATABASE_URL = settings.DATABASE_URL_SYNC
+    seed_mock_data.run(total_cases)
+
+    conn = psycopg2.connect(settings.DATABASE_URL_SYNC)
+    conn.autocommit = True
+    conn.cursor().execute("VACUUM ANALYZE")
+    conn.close()
+
+
+def print_report(results: list[CaseResult]):
+    print()
+    print(f"{'endpoint':<34} {'case':<24} {'stmts':>5} {'ms':>9} {'rows':>9} {'buffers':>9}  status")
+    print("-" * 110)
+    for r in results:
+        rows = sum(q.rows for q in r.queries)
+        buffers = sum(q.shared_hit + q.shared_read for q in r.queries)
+        status = "ok" if not r.failures else "FAIL: " + "; ".join(r.failures)
+        print(f"{r.endpoint:<34} {r.case:<24} {len(r.queries):>5} {r.total_ms:>9.1f} "
+              f"{rows:>9} {buffers:>9}  {status}")
+
+
+async def run(output: Optional[str] = None) -> int:
+    results: list[CaseResult] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in ENDPOINT_PARAMS:
+            for case in cases_for(endpoint):
+                results.append(await run_case(client, endpoint, case))
+        for case in SEARCH_MATRIX:
+            results.append(await run_case(client, "/api/v1/search/reports", case))
+
+    print_report(results)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump([
+                {"endpoint": r.endpoint, "case": r.case, "selective": r.selective,
+                 "total_ms": r.total_ms, "failures": r.failures,
+                 "queries": [q.__dict__ for q in r.queries]}
+                for r in results
+            ], f, indent=2)
+        print(f"\nWrote {output}")
+
+    failed = [r for r in results if r.failures]
+    print(f"\n{len(results) - len(failed)}/{len(results)} cases passed")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the query-plan regression suite.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="5k",
+                        help="Number of seeded cases (default: 5k)")
+    parser.add_argument("--no-seed", action="store_true",
+                        help="Reuse the data already in the database")
+    parser.add_argument("--output", help="Write the full report as JSON to this path")
+    args = parser.parse_args()
+
+    if not args.no_seed:
+        seed(SCALES[args.scale])
+    started = time.perf_counter()
+    exit_code = asyncio.run(run(args.output))
+    print(f"Finished in {time.perf_counter() - started:.1f}s")
+    sys.exit(exit_code)
@@ -0,0 +1,95 @@
+"""
+Latency and recall benchmark for the similar-report index.
+
+Builds an index over synthetic reports (a mock pathology report template
+followed by a random run of keywords, so reports of one cancer type are not
+near-duplicates) in a scratch directory, then queries it with indexed reports
+at several nprobe settings. Recall@k is measured against an exact scan of the
+same vectors; results tied with the k-th exact score count as hits.
+
+    python -m benchmarks.similar_search --reports 1000000
+"""
+
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+from app.services import similar_index
+from app.services.similar_index import SimilarIndex
+from benchmarks.classifier_matching import ML_MODEL_DIR, make_report
+
+NPROBES = [4, 8, 16, 32]
+
+
+def make_reports(rng: random.Random, count: int):
+    sys.path.insert(0, str(ML_MODEL_DIR.parent / "scripts"))
+    from generate_mock_reports import REPORT_TEMPLATES, generate_report
+    random.seed(rng.random())
+    labels = list(REPORT_TEMPLATES)
+    return [generate_report(rng.choice(labels)) + " " + make_report(rng, 300) for _ in range(count)]
+
+
+def run(reports: int, queries: int, k: int, batch_size: int, seed: int) -> int:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    texts = make_reports(rng, reports)
+    print(f"generated {reports} reports in {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    sample = texts[:50_000]
+    idf = similar_index.fit_idf(similar_index.term_counts(sample))
+    centroids = similar_index.train_centroids(similar_index.embed(sample, idf), int(np.sqrt(reports)))
+    fitted = time.perf_counter() - started
+
+    started = time.perf_counter()
+    vectors = np.vstack([similar_index.embed(texts[i:i + batch_size], idf)
+                         for i in range(0, reports, batch_size)])
+    embedded = time.perf_counter() - started
+
+    with tempfile.TemporaryDirectory() as path:
+        started = time.perf_counter()
+        writer = SimilarIndex.create(path, centroids, idf)
+        for i in range(0, reports, batch_size):
+            writer.add(range(i + 1, min(i + batch_size, reports) + 1), vectors[i:i + batch_size],
+                       publish=False)
+        writer.publish()
+        added = time.perf_counter() - started
+        print(f"fit {fitted:.1f}s ({len(centroids)} lists), embed {embedded:.1f}s, add {added:.1f}s")
+
+        index = SimilarIndex(path)
+        index.refresh()
+        reader = index.snapshot
+        picks = np.random.default_rng(seed).choice(reports, min(queries, reports), replace=False)
+        print(f"{'nprobe':>6} {'p50 ms':>8} {'p99 ms':>8} {f'recall@{k}':>10}")
+        for nprobe in NPROBES:
+            latencies, recalls = [], []
+            for row in picks:
+                report_id = int(row) + 1
+                query = reader.vector_for(report_id)
+                start = time.perf_counter()
+                found = reader.search(query, k, nprobe, exclude=report_id)
+                latencies.append((time.perf_counter() - start) * 1000)
+
+                exact = vectors @ query
+                exact[row] = -np.inf
+                kth = np.partition(exact, -k)[-k]
+                # Quantized scores may differ from the exact ones in the third decimal
+                recalls.append(sum(exact[i - 1] >= kth - 1e-3 for i, _ in found) / k)
+            print(f"{nprobe:>6} {np.percentile(latencies, 50):>8.2f} {np.percentile(latencies, 99):>8.2f} "
+                  f"{np.mean(recalls):>10.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark similar-report search.")
+    parser.add_argument("--reports", type=int, default=200_000, help="Reports to index (default: 200000)")
+    parser.add_argument("--queries", type=int, default=200, help="Query reports per nprobe setting")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args.reports, args.queries, args.k, args.batch_size, args.seed))
@@ -0,0 +1,80 @@
+"""
+Throughput benchmark for sparse batch scoring.
+
+Scores a corpus of synthetic reports with the per-report keyword classifier
+and with the sparse term-count backend (and the VetBERT pair from ml/, when
+the repository checkout is available). Every report must get an identical
+result from both before anything is timed.
+
+    python -m benchmarks.sparse_scoring --reports 100000 --batch-size 5000
+"""
+
+import sys
+import time
+import random
+import argparse
+from typing import Callable, List, Sequence
+
+from app.services.bert_service import BertClassifier
+from app.services.sparse_classifier import SparseKeywordClassifier
+from benchmarks.classifier_matching import make_report, load_vetbert
+
+
+def load_sparse_vetbert():
+    # load_vetbert() has already put ml/model on sys.path
+    from sparse_classifier import SparseVetBERTClassifier
+    return SparseVetBERTClassifier()
+
+
+def batches(texts: List[str], size: int) -> List[List[str]]:
+    return [texts[i:i + size] for i in range(0, len(texts), size)]
+
+
+def timed(fn: Callable[[Sequence[str]], list], chunks: List[List[str]]) -> float:
+    start = time.perf_counter()
+    for chunk in chunks:
+        fn(chunk)
+    return time.perf_counter() - start
+
+
+def run(reports: int, length: int, batch_size: int, seed: int) -> int:
+    rng = random.Random(seed)
+    texts = [make_report(rng, rng.randint(length // 2, length)) for _ in range(reports)]
+    texts[rng.randrange(reports)] = "Kelvin sign Ki-67 and ſquamous cells, CD31"
+    texts[rng.randrange(reports)] = "no keywords here"
+    chunks = batches(texts, batch_size)
+
+    pairs = [("bert", BertClassifier(), SparseKeywordClassifier())]
+    vetbert = load_vetbert()
+    if vetbert is not None:
+        pairs.append(("vetbert", vetbert, load_sparse_vetbert()))
+
+    print(f"{reports} reports of ~{length} chars in batches of {batch_size}")
+    print(f"{'classifier':<12} {'scalar s':>9} {'sparse s':>9} {'reports/s':>11} {'speedup':>8}")
+    for name, scalar, sparse_scorer in pairs:
+        if name == "bert":
+            one, many = scalar.classify, sparse_scorer.classify_batch
+        else:
+            one, many = scalar.predict, sparse_scorer.predict_batch
+
+        expected = [one(text) for text in texts]
+        actual = [result for chunk in chunks for result in many(chunk)]
+        mismatches = sum(a != b for a, b in zip(expected, actual))
+        if mismatches or len(actual) != len(expected):
+            print(f"FAIL: {name} sparse backend scored {mismatches} reports differently")
+            return 1
+
+        before = timed(lambda chunk: [one(text) for text in chunk], chunks)
+        after = timed(many, chunks)
+        print(f"{name:<12} {before:>9.2f} {after:>9.2f} {reports / after:>11.0f} {before / after:>7.1f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sparse batch scoring against per-report scoring.")
+    parser.add_argument("--reports", type=int, default=100_000, help="Reports to score (default: 100000)")
+    parser.add_argument("--length", type=int, default=1_000, help="Maximum report length in characters")
+    parser.add_argument("--batch-size", type=int, default=5_000, help="Reports per sparse batch")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(run(args.reports, args.length, args.batch_size, args.seed))
@@ -0,0 +1,109 @@
+-- 007_fact_cases.sql
+-- Narrow star-schema fact table for analytic queries.
+-- One row per cancer case with smallint dimension keys, so dashboard, incidence,
+-- trend and map queries never have to join cancer_cases -> patients.
+
+CREATE TABLE IF NOT EXISTS fact_cases (
+    case_id INTEGER NOT NULL,
+    species_id SMALLINT NOT NULL,
+    breed_id SMALLINT NOT NULL,
+    sex SMALLINT NOT NULL,              -- 1 = male, 2 = female
+    is_neutered BOOLEAN NOT NULL,
+    county_id SMALLINT NOT NULL,
+    cancer_type_id SMALLINT NOT NULL,
+    stage SMALLINT,                     -- 1..4 for I..IV
+    outcome SMALLINT,                   -- 1 = alive, 2 = deceased, 3 = unknown
+    diagnosis_year SMALLINT NOT NULL,
+    diagnosis_month SMALLINT NOT NULL,
+    PRIMARY KEY (case_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_fact_year_brin ON fact_cases USING BRIN (diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_cancer_year ON fact_cases (cancer_type_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_species_year ON fact_cases (species_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_county_year ON fact_cases (county_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_breed ON fact_cases (breed_id);
+CREATE INDEX IF NOT EXISTS idx_fact_sex ON fact_cases (sex, is_neutered);
+
+
+-- Dimension encoders shared by the sync triggers and the backfill below
+CREATE OR REPLACE FUNCTION fact_sex_code(p_sex TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE WHEN p_sex IN ('Male', 'Neutered Male') THEN 1 ELSE 2 END::SMALLINT
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION fact_neutered(p_sex TEXT) RETURNS BOOLEAN AS $$
+    SELECT p_sex IN ('Neutered Male', 'Spayed Female')
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION fact_stage_code(p_stage TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE p_stage WHEN 'I' THEN 1 WHEN 'II' THEN 2 WHEN 'III' THEN 3 WHEN 'IV' THEN 4 END::SMALLINT
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION fact_outcome_code(p_outcome TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE p_outcome WHEN 'alive' THEN 1 WHEN 'deceased' THEN 2 WHEN 'unknown' THEN 3 END::SMALLINT
+$$ LANGUAGE SQL IMMUTABLE;
+
+
+-- Keep fact_cases in sync with cancer_cases
+CREATE OR REPLACE FUNCTION fact_cases_sync_case() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM fact_cases WHERE case_id = OLD.id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO fact_cases (case_id, species_id, breed_id, sex, is_neutered, county_id,
+                                cancer_type_id, stage, outcome, diagnosis_year, diagnosis_month)
+        SELECT NEW.id, p.species_id, p.breed_id, fact_sex_code(p.sex), fact_neutered(p.sex),
+               NEW.county_id, NEW.cancer_type_id, fact_stage_code(NEW.stage),
+               fact_outcome_code(NEW.outcome),
+               EXTRACT(YEAR FROM NEW.diagnosis_date), EXTRACT(MONTH FROM NEW.diagnosis_date)
+        FROM patients p
+        WHERE p.id = NEW.patient_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fact_cases_sync ON cancer_cases;
+CREATE TRIGGER trg_fact_cases_sync
+    AFTER INSERT OR UPDATE OR DELETE ON cancer_cases
+    FOR EACH ROW EXECUTE FUNCTION fact_cases_sync_case();
+
+
+-- Patient demographics are denormalized onto every one of their cases
+CREATE OR REPLACE FUNCTION fact_cases_sync_patient() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE fact_cases f
+    SET species_id = NEW.species_id,
+        breed_id = NEW.breed_id,
+        sex = fact_sex_code(NEW.sex),
+        is_neutered = fact_neutered(NEW.sex)
+    FROM cancer_cases c
+    WHERE c.patient_id = NEW.id AND f.case_id = c.id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fact_cases_sync_patient ON patients;
+CREATE TRIGGER trg_fact_cases_sync_patient
+    AFTER UPDATE OF species_id, breed_id, sex ON patients
+    FOR EACH ROW EXECUTE FUNCTION fact_cases_sync_patient();
+
+
+-- Full rebuild, used after bulk loads that bypass the triggers
+CREATE OR REPLACE FUNCTION rebuild_fact_cases() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE fact_cases;
+    INSERT INTO fact_cases (case_id, species_id, breed_id, sex, is_neutered, county_id,
+                            cancer_type_id, stage, outcome, diagnosis_year, diagnosis_month)
+    SELECT c.id, p.species_id, p.breed_id, fact_sex_code(p.sex), fact_neutered(p.sex),
+           c.county_id, c.cancer_type_id, fact_stage_code(c.stage),
+           fact_outcome_code(c.outcome),
+           EXTRACT(YEAR FROM c.diagnosis_date), EXTRACT(MONTH FROM c.diagnosis_date)
+    FROM cancer_cases c
+    JOIN patients p ON c.patient_id = p.id;
+    ANALYZE fact_cases;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_fact_cases();
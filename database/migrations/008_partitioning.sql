@@ -0,0 +1,189 @@
+-- 008_partitioning.sql
+-- Range-partition cancer_cases, pathology_reports and fact_cases by year.
+--
+-- Year filters on the routers prune to the matching partitions, and old years
+-- can be archived with DETACH PARTITION CONCURRENTLY (see
+-- database/maintenance/archive_partitions.py). There is deliberately no DEFAULT
+-- partition: it would block concurrent detach, so every write path calls
+-- ensure_year_partitions() for the years it is about to insert.
+--
+-- pathology_reports.case_id no longer carries a foreign key: a partitioned
+-- cancer_cases can only be referenced by its full (id, diagnosis_date) key.
+-- The seed and ingest paths only ever attach reports to cases they created.
+-- Materialized views built on the old heap tables are dropped with them; the
+-- seed recreates them.
+
+
+-- Create any missing yearly partitions for the three tables
+CREATE OR REPLACE FUNCTION ensure_year_partitions(p_first INTEGER, p_last INTEGER) RETURNS VOID AS $$
+DECLARE
+    y INTEGER;
+BEGIN
+    FOR y IN p_first..p_last LOOP
+        IF to_regclass(format('cancer_cases_y%s', y)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF cancer_cases FOR VALUES FROM (%L) TO (%L)',
+                format('cancer_cases_y%s', y), make_date(y, 1, 1), make_date(y + 1, 1, 1));
+        END IF;
+        IF to_regclass(format('pathology_reports_y%s', y)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF pathology_reports FOR VALUES FROM (%L) TO (%L)',
+                format('pathology_reports_y%s', y), make_date(y, 1, 1), make_date(y + 1, 1, 1));
+        END IF;
+        IF to_regclass(format('fact_cases_y%s', y)) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE IF NOT EXISTS %I PARTITION OF fact_cases FOR VALUES FROM (%s) TO (%s)',
+                format('fact_cases_y%s', y), y, y + 1);
+        END IF;
+    END LOOP;
+END;
+$$ LANGUAGE plpgsql;
+
+
+DO $$
+DECLARE
+    first_year INTEGER;
+    last_year INTEGER;
+BEGIN
+    IF (SELECT relkind FROM pg_class WHERE oid = 'cancer_cases'::regclass) = 'p' THEN
+        RETURN;
+    END IF;
+
+    SELECT LEAST(MIN(EXTRACT(YEAR FROM diagnosis_date))::INTEGER, 1995),
+           GREATEST(MAX(EXTRACT(YEAR FROM diagnosis_date))::INTEGER,
+                    EXTRACT(YEAR FROM CURRENT_DATE)::INTEGER + 1)
+    INTO first_year, last_year
+    FROM cancer_cases;
+    first_year := LEAST(first_year,
+                        (SELECT MIN(EXTRACT(YEAR FROM report_date))::INTEGER FROM pathology_reports));
+    last_year := GREATEST(last_year,
+                          (SELECT MAX(EXTRACT(YEAR FROM report_date))::INTEGER FROM pathology_reports));
+
+    -- Move the heap tables aside, keeping their id sequences
+    ALTER TABLE pathology_reports DROP CONSTRAINT IF EXISTS pathology_reports_case_id_fkey;
+    ALTER SEQUENCE cancer_cases_id_seq OWNED BY NONE;
+    ALTER SEQUENCE pathology_reports_id_seq OWNED BY NONE;
+    ALTER INDEX cancer_cases_pkey RENAME TO cancer_cases_unpartitioned_pkey;
+    ALTER INDEX pathology_reports_pkey RENAME TO pathology_reports_unpartitioned_pkey;
+    ALTER INDEX fact_cases_pkey RENAME TO fact_cases_unpartitioned_pkey;
+    ALTER TABLE cancer_cases RENAME TO cancer_cases_unpartitioned;
+    ALTER TABLE pathology_reports RENAME TO pathology_reports_unpartitioned;
+    ALTER TABLE fact_cases RENAME TO fact_cases_unpartitioned;
+
+    CREATE TABLE cancer_cases (
+        id INTEGER NOT NULL DEFAULT nextval('cancer_cases_id_seq'),
+        patient_id INTEGER NOT NULL REFERENCES patients(id),
+        cancer_type_id INTEGER NOT NULL REFERENCES cancer_types(id),
+        diagnosis_date DATE NOT NULL,
+        stage VARCHAR(5) CHECK (stage IN ('I', 'II', 'III', 'IV')),
+        outcome VARCHAR(20) CHECK (outcome IN ('alive', 'deceased', 'unknown')),
+        county_id INTEGER NOT NULL REFERENCES counties(id),
+        PRIMARY KEY (id, diagnosis_date)
+    ) PARTITION BY RANGE (diagnosis_date);
+
+    CREATE TABLE pathology_reports (
+        id INTEGER NOT NULL DEFAULT nextval('pathology_reports_id_seq'),
+        case_id INTEGER NOT NULL,
+        report_text TEXT NOT NULL,
+        classification VARCHAR(100),
+        confidence_score NUMERIC(5, 4),
+        report_date DATE NOT NULL,
+        PRIMARY KEY (id, report_date)
+    ) PARTITION BY RANGE (report_date);
+
+    CREATE TABLE fact_cases (
+        case_id INTEGER NOT NULL,
+        species_id SMALLINT NOT NULL,
+        breed_id SMALLINT NOT NULL,
+        sex SMALLINT NOT NULL,
+        is_neutered BOOLEAN NOT NULL,
+        county_id SMALLINT NOT NULL,
+        cancer_type_id SMALLINT NOT NULL,
+        stage SMALLINT,
+        outcome SMALLINT,
+        diagnosis_year SMALLINT NOT NULL,
+        diagnosis_month SMALLINT NOT NULL,
+        PRIMARY KEY (case_id, diagnosis_year)
+    ) PARTITION BY RANGE (diagnosis_year);
+
+    ALTER SEQUENCE cancer_cases_id_seq OWNED BY cancer_cases.id;
+    ALTER SEQUENCE pathology_reports_id_seq OWNED BY pathology_reports.id;
+
+    PERFORM ensure_year_partitions(first_year, last_year);
+
+    INSERT INTO cancer_cases SELECT * FROM cancer_cases_unpartitioned;
+    INSERT INTO pathology_reports SELECT * FROM pathology_reports_unpartitioned;
+    INSERT INTO fact_cases SELECT * FROM fact_cases_unpartitioned;
+
+    DROP TABLE pathology_reports_unpartitioned;
+    DROP TABLE fact_cases_unpartitioned;
+    DROP TABLE cancer_cases_unpartitioned CASCADE;
+END;
+$$;
+
+
+-- Indexes are declared on the parents and cascade to every partition
+CREATE INDEX IF NOT EXISTS idx_cases_cancer_type ON cancer_cases (cancer_type_id);
+CREATE INDEX IF NOT EXISTS idx_cases_county ON cancer_cases (county_id);
+CREATE INDEX IF NOT EXISTS idx_cases_diagnosis_date ON cancer_cases (diagnosis_date);
+CREATE INDEX IF NOT EXISTS idx_cases_patient ON cancer_cases (patient_id);
+CREATE INDEX IF NOT EXISTS idx_cases_id ON cancer_cases (id);
+
+CREATE INDEX IF NOT EXISTS idx_reports_case ON pathology_reports (case_id);
+CREATE INDEX IF NOT EXISTS idx_reports_classification ON pathology_reports (classification);
+CREATE INDEX IF NOT EXISTS idx_reports_text_trgm ON pathology_reports USING GIN (report_text gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_reports_date_id ON pathology_reports (report_date, id);
+
+CREATE INDEX IF NOT EXISTS idx_fact_year_brin ON fact_cases USING BRIN (diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_cancer_year ON fact_cases (cancer_type_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_species_year ON fact_cases (species_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_county_year ON fact_cases (county_id, diagnosis_year);
+CREATE INDEX IF NOT EXISTS idx_fact_breed ON fact_cases (breed_id);
+CREATE INDEX IF NOT EXISTS idx_fact_sex ON fact_cases (sex, is_neutered);
+
+
+-- Sync triggers now delete with the partition key so they touch one partition
+CREATE OR REPLACE FUNCTION fact_cases_sync_case() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        DELETE FROM fact_cases
+        WHERE case_id = OLD.id
+          AND diagnosis_year = EXTRACT(YEAR FROM OLD.diagnosis_date);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO fact_cases (case_id, species_id, breed_id, sex, is_neutered, county_id,
+                                cancer_type_id, stage, outcome, diagnosis_year, diagnosis_month)
+        SELECT NEW.id, p.species_id, p.breed_id, fact_sex_code(p.sex), fact_neutered(p.sex),
+               NEW.county_id, NEW.cancer_type_id, fact_stage_code(NEW.stage),
+               fact_outcome_code(NEW.outcome),
+               EXTRACT(YEAR FROM NEW.diagnosis_date), EXTRACT(MONTH FROM NEW.diagnosis_date)
+        FROM patients p
+        WHERE p.id = NEW.patient_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_fact_cases_sync ON cancer_cases;
+CREATE TRIGGER trg_fact_cases_sync
+    AFTER INSERT OR UPDATE OR DELETE ON cancer_cases
+    FOR EACH ROW EXECUTE FUNCTION fact_cases_sync_case();
+
+CREATE OR REPLACE FUNCTION fact_cases_sync_patient() RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE fact_cases f
+    SET species_id = NEW.species_id,
+        breed_id = NEW.breed_id,
+        sex = fact_sex_code(NEW.sex),
+        is_neutered = fact_neutered(NEW.sex)
+    FROM cancer_cases c
+    WHERE c.patient_id = NEW.id
+      AND f.case_id = c.id
+      AND f.diagnosis_year = EXTRACT(YEAR FROM c.diagnosis_date);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+ANALYZE cancer_cases;
+ANALYZE pathology_reports;
+ANALYZE fact_cases;
@@ -0,0 +1,102 @@
+-- 009_demographic_sketches.sql
+-- Mergeable quantile sketches of patient age and weight per cube cell.
+--
+-- Each (species, breed, cancer type) cell keeps a DDSketch: counts of values per
+-- logarithmic bucket, with bucket i covering (gamma^(i-1), gamma^i] for
+-- gamma = (1 + a) / (1 - a) and relative accuracy a = 1%. Sketches merge by
+-- summing bucket counts, so any filter combination is answered by a SUM over a
+-- few thousand bin rows instead of rescanning patients. The bucket mapping must
+-- match app/services/sketch.py.
+
+CREATE TABLE IF NOT EXISTS demographic_sketch_bins (
+    metric SMALLINT NOT NULL,           -- 1 = age_years, 2 = weight_kg
+    species_id SMALLINT NOT NULL,
+    breed_id SMALLINT NOT NULL,
+    cancer_type_id SMALLINT NOT NULL,
+    bucket SMALLINT NOT NULL,
+    count BIGINT NOT NULL,
+    PRIMARY KEY (metric, species_id, breed_id, cancer_type_id, bucket)
+);
+
+CREATE OR REPLACE FUNCTION sketch_bucket(p_value NUMERIC) RETURNS SMALLINT AS $$
+    SELECT CEIL(LN(GREATEST(p_value, 0.01)) / LN(1.01 / 0.99))::SMALLINT
+$$ LANGUAGE SQL IMMUTABLE;
+
+
+-- Add (p_delta = 1) or remove (p_delta = -1) one case's patient from its cell
+CREATE OR REPLACE FUNCTION sketch_apply_case(p_patient_id INTEGER, p_cancer_type_id INTEGER,
+                                             p_delta INTEGER) RETURNS VOID AS $$
+    INSERT INTO demographic_sketch_bins (metric, species_id, breed_id, cancer_type_id, bucket, count)
+    SELECT m.metric, p.species_id, p.breed_id, p_cancer_type_id, sketch_bucket(m.value), p_delta
+    FROM patients p
+    CROSS JOIN LATERAL (VALUES (1, p.age_years), (2, p.weight_kg)) AS m(metric, value)
+    WHERE p.id = p_patient_id AND m.value IS NOT NULL
+    ON CONFLICT (metric, species_id, breed_id, cancer_type_id, bucket)
+    DO UPDATE SET count = demographic_sketch_bins.count + EXCLUDED.count;
+$$ LANGUAGE SQL;
+
+CREATE OR REPLACE FUNCTION sketch_sync_case() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM sketch_apply_case(OLD.patient_id, OLD.cancer_type_id, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM sketch_apply_case(NEW.patient_id, NEW.cancer_type_id, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sketch_sync ON cancer_cases;
+CREATE TRIGGER trg_sketch_sync
+    AFTER INSERT OR DELETE OR UPDATE OF patient_id, cancer_type_id ON cancer_cases
+    FOR EACH ROW EXECUTE FUNCTION sketch_sync_case();
+
+
+-- Patient edits move every one of their cases' values between cells and buckets:
+-- remove the OLD values and add the NEW ones, summed per bin so a bin touched
+-- twice (several cases, or an unchanged bucket) gets one upsert
+CREATE OR REPLACE FUNCTION sketch_sync_patient() RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO demographic_sketch_bins (metric, species_id, breed_id, cancer_type_id, bucket, count)
+    SELECT m.metric, m.species_id, m.breed_id, c.cancer_type_id, sketch_bucket(m.value), SUM(m.delta)
+    FROM cancer_cases c
+    CROSS JOIN LATERAL (VALUES
+        (1, OLD.species_id, OLD.breed_id, OLD.age_years, -1),
+        (2, OLD.species_id, OLD.breed_id, OLD.weight_kg, -1),
+        (1, NEW.species_id, NEW.breed_id, NEW.age_years, 1),
+        (2, NEW.species_id, NEW.breed_id, NEW.weight_kg, 1)
+    ) AS m(metric, species_id, breed_id, value, delta)
+    WHERE c.patient_id = NEW.id AND m.value IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5
+    ON CONFLICT (metric, species_id, breed_id, cancer_type_id, bucket)
+    DO UPDATE SET count = demographic_sketch_bins.count + EXCLUDED.count;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sketch_sync_patient ON patients;
+CREATE TRIGGER trg_sketch_sync_patient
+    AFTER UPDATE OF species_id, breed_id, age_years, weight_kg ON patients
+    FOR EACH ROW
+    WHEN ((OLD.species_id, OLD.breed_id, OLD.age_years, OLD.weight_kg)
+          IS DISTINCT FROM (NEW.species_id, NEW.breed_id, NEW.age_years, NEW.weight_kg))
+    EXECUTE FUNCTION sketch_sync_patient();
+
+
+-- Full rebuild, used after bulk loads that bypass the triggers
+CREATE OR REPLACE FUNCTION rebuild_demographic_sketches() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE demographic_sketch_bins;
+    INSERT INTO demographic_sketch_bins (metric, species_id, breed_id, cancer_type_id, bucket, count)
+    SELECT m.metric, p.species_id, p.breed_id, c.cancer_type_id, sketch_bucket(m.value), COUNT(*)
+    FROM cancer_cases c
+    JOIN patients p ON c.patient_id = p.id
+    CROSS JOIN LATERAL (VALUES (1, p.age_years), (2, p.weight_kg)) AS m(metric, value)
+    WHERE m.value IS NOT NULL
+    GROUP BY 1, 2, 3, 4, 5;
+    ANALYZE demographic_sketch_bins;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_demographic_sketches();
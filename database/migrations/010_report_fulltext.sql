@@ -0,0 +1,25 @@
+-- 010_report_fulltext.sql
+-- Ranked full-text search over pathology reports.
+--
+-- vet_oncology is the english configuration with alphanumeric and hyphenated
+-- tokens left unstemmed, so markers and grading systems such as CD31, Ki-67,
+-- c-KIT, Melan-A and S-100 are indexed verbatim (plus their hyphen parts).
+
+DO $$
+BEGIN
+    IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'vet_oncology') THEN
+        CREATE TEXT SEARCH CONFIGURATION vet_oncology (COPY = english);
+        ALTER TEXT SEARCH CONFIGURATION vet_oncology
+            ALTER MAPPING FOR numword, numhword, hword_numpart, asciihword, hword_asciipart
+            WITH simple;
+    END IF;
+END;
+$$;
+
+ALTER TABLE pathology_reports
+    ADD COLUMN IF NOT EXISTS report_tsv TSVECTOR
+    GENERATED ALWAYS AS (to_tsvector('vet_oncology'::regconfig, report_text)) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_reports_tsv ON pathology_reports USING GIN (report_tsv);
+
+ANALYZE pathology_reports;
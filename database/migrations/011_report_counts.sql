@@ -0,0 +1,58 @@
+-- 011_report_counts.sql
+-- Precomputed report counts per classification, so search totals for the
+-- common "no keyword" cases never count(*) the whole table.
+-- Unclassified reports are counted under the empty string.
+
+CREATE TABLE IF NOT EXISTS report_classification_counts (
+    classification VARCHAR(100) PRIMARY KEY,
+    report_count BIGINT NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION report_counts_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        INSERT INTO report_classification_counts (classification, report_count)
+        SELECT COALESCE(classification, ''), -COUNT(*) FROM old_rows GROUP BY 1
+        ON CONFLICT (classification)
+        DO UPDATE SET report_count = report_classification_counts.report_count + EXCLUDED.report_count;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO report_classification_counts (classification, report_count)
+        SELECT COALESCE(classification, ''), COUNT(*) FROM new_rows GROUP BY 1
+        ON CONFLICT (classification)
+        DO UPDATE SET report_count = report_classification_counts.report_count + EXCLUDED.report_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level triggers with transition tables: one upsert per classification
+-- per statement, however many rows a bulk insert carries
+DROP TRIGGER IF EXISTS trg_report_counts_insert ON pathology_reports;
+CREATE TRIGGER trg_report_counts_insert
+    AFTER INSERT ON pathology_reports
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_counts_apply();
+
+DROP TRIGGER IF EXISTS trg_report_counts_update ON pathology_reports;
+CREATE TRIGGER trg_report_counts_update
+    AFTER UPDATE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_counts_apply();
+
+DROP TRIGGER IF EXISTS trg_report_counts_delete ON pathology_reports;
+CREATE TRIGGER trg_report_counts_delete
+    AFTER DELETE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_counts_apply();
+
+
+CREATE OR REPLACE FUNCTION rebuild_report_counts() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE report_classification_counts;
+    INSERT INTO report_classification_counts (classification, report_count)
+    SELECT COALESCE(classification, ''), COUNT(*) FROM pathology_reports GROUP BY 1;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_report_counts();
@@ -0,0 +1,16 @@
+-- 012_reclassification.sql
+-- Classifier version per report, so bulk reclassification only touches rows
+-- scored by an older pattern table or model, and a checkpoint per target
+-- version so an interrupted run resumes where it stopped.
+
+ALTER TABLE pathology_reports ADD COLUMN IF NOT EXISTS classifier_version VARCHAR(64);
+
+CREATE TABLE IF NOT EXISTS reclassification_checkpoints (
+    classifier_version VARCHAR(64) PRIMARY KEY,
+    last_report_date DATE,
+    last_id INTEGER,
+    processed BIGINT NOT NULL DEFAULT 0,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    finished_at TIMESTAMPTZ
+);
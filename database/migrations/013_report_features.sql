@@ -0,0 +1,186 @@
+-- 013_report_features.sql
+-- Structured grading and prognostic values parsed out of the free-text
+-- reports into typed, indexed columns, so questions like "Patnaik grade III
+-- with incomplete margins" or "Ki-67 above 20%" are index scans rather than
+-- regex scans over every report.
+--
+-- Numeric captures are at most three integer digits and implausible values
+-- (Ki-67 or margins over 100) become NULL, so unusual text can never overflow
+-- a column and abort the statement that inserted the report.
+--
+-- Codes: grades and c-KIT patterns are stored as 1-3 (Roman numerals in the
+-- text), kiupel_grade 1 = low / 2 = high, margin_status 1 = clean /
+-- 2 = narrow / 3 = incomplete. A column is NULL when the report does not
+-- state the value.
+
+CREATE TABLE IF NOT EXISTS report_features (
+    report_id INTEGER PRIMARY KEY,
+    report_date DATE NOT NULL,
+    patnaik_grade SMALLINT,
+    kiupel_grade SMALLINT,
+    mitotic_index SMALLINT,
+    ki67_percent NUMERIC(5, 2),
+    margin_status SMALLINT,
+    margin_mm NUMERIC(5, 1),
+    ckit_pattern SMALLINT,
+    tumor_size_cm NUMERIC(6, 1),
+    extractor_version SMALLINT NOT NULL
+);
+
+-- Partial indexes: most reports state only a few of these values
+CREATE INDEX IF NOT EXISTS idx_report_features_patnaik ON report_features (patnaik_grade) WHERE patnaik_grade IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_kiupel ON report_features (kiupel_grade) WHERE kiupel_grade IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_mitotic ON report_features (mitotic_index) WHERE mitotic_index IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_ki67 ON report_features (ki67_percent) WHERE ki67_percent IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_margin ON report_features (margin_status) WHERE margin_status IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_ckit ON report_features (ckit_pattern) WHERE ckit_pattern IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_report_features_size ON report_features (tumor_size_cm) WHERE tumor_size_cm IS NOT NULL;
+
+
+-- Roman (I-III) or Arabic grade to 1-3
+CREATE OR REPLACE FUNCTION report_grade_number(p_grade TEXT) RETURNS SMALLINT AS $$
+    SELECT CASE upper(p_grade)
+        WHEN 'I' THEN 1 WHEN 'II' THEN 2 WHEN 'III' THEN 3
+        WHEN '1' THEN 1 WHEN '2' THEN 2 WHEN '3' THEN 3
+    END::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+-- Bump report_features_version() whenever the patterns change, then run
+-- rebuild_report_features() to re-extract every report.
+CREATE OR REPLACE FUNCTION report_features_version() RETURNS SMALLINT AS $$
+    SELECT 2::SMALLINT;
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION extract_report_features(
+    p_text TEXT,
+    OUT patnaik_grade SMALLINT,
+    OUT kiupel_grade SMALLINT,
+    OUT mitotic_index SMALLINT,
+    OUT ki67_percent NUMERIC,
+    OUT margin_status SMALLINT,
+    OUT margin_mm NUMERIC,
+    OUT ckit_pattern SMALLINT,
+    OUT tumor_size_cm NUMERIC
+) AS $$
+DECLARE
+    m TEXT[];
+BEGIN
+    -- "Patnaik grade II", "Grade II (Patnaik)"
+    m := COALESCE(regexp_match(p_text, 'patnaik\s+grade\s*:?\s*(III|II|I|[1-3])\M', 'i'),
+                  regexp_match(p_text, '\mgrade\s*:?\s*(III|II|I|[1-3])\s*\(patnaik\)', 'i'));
+    patnaik_grade := report_grade_number(m[1]);
+
+    -- "Kiupel grade: high", "low-grade (Kiupel)"
+    m := COALESCE(regexp_match(p_text, 'kiupel\s+grade\s*:?\s*(low|high)\M', 'i'),
+                  regexp_match(p_text, '\m(low|high)[- ]grade\s*\(kiupel\)', 'i'));
+    kiupel_grade := CASE lower(m[1]) WHEN 'low' THEN 1 WHEN 'high' THEN 2 END;
+
+    -- "12/10 HPF", "12 mitotic figures per 10 HPF"
+    m := regexp_match(p_text, '\m(\d{1,3})\s*(?:/\s*10\s*hpf|(?:mitotic figures|mitoses) per 10\s*hpf)', 'i');
+    mitotic_index := m[1]::SMALLINT;
+
+    -- "Ki-67 index: 18%"
+    m := regexp_match(p_text, '\mki-?67[^0-9%.]{0,20}(\d{1,3}(?:\.\d+)?)\s*%', 'i');
+    ki67_percent := CASE WHEN m[1]::NUMERIC <= 100 THEN round(m[1]::NUMERIC, 2) END;
+
+    -- "Surgical margins are narrow (<1mm)", "Margins: clean (>3mm)",
+    -- "incomplete/dirty margins"
+    m := COALESCE(
+        regexp_match(p_text, '\mmargins?\s*(?:are|:)?\s*(clean|narrow|incomplete|dirty)\M(?:\s*\(\s*[<>]?\s*(\d{1,3}(?:\.\d+)?)\s*mm\))?', 'i'),
+        regexp_match(p_text, '\m(clean|narrow|incomplete|dirty)\M(?:/\w+)?(?:\s*\(\s*[<>]?\s*(\d{1,3}(?:\.\d+)?)\s*mm\))?\s*(?:surgical\s+)?margins?\M', 'i'));
+    margin_status := CASE lower(m[1]) WHEN 'clean' THEN 1 WHEN 'narrow' THEN 2
+                                      WHEN 'incomplete' THEN 3 WHEN 'dirty' THEN 3 END;
+    margin_mm := CASE WHEN m[2]::NUMERIC <= 100 THEN round(m[2]::NUMERIC, 1) END;
+
+    -- "c-KIT pattern: focal cytoplasmic (pattern II)", "KIT pattern 2"
+    m := regexp_match(p_text, '\mc?-?kit\s+pattern\s*:?\s*(?:[a-z ]*\(\s*pattern\s+)?(III|II|I|[1-3])\M', 'i');
+    ckit_pattern := report_grade_number(m[1]);
+
+    -- "a 5.2 cm hemorrhagic mass", "4.1 x 3.0 cm": the first dimension is the largest by convention
+    m := regexp_match(p_text, '(?:^|[^\d.])(\d{1,3}(?:\.\d+)?)\s*(?:x\s*\d{1,3}(?:\.\d+)?\s*)*cm\M', 'i');
+    tumor_size_cm := round(m[1]::NUMERIC, 1);
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+
+CREATE OR REPLACE FUNCTION report_features_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO report_features (
+            report_id, report_date, patnaik_grade, kiupel_grade, mitotic_index, ki67_percent,
+            margin_status, margin_mm, ckit_pattern, tumor_size_cm, extractor_version
+        )
+        SELECT n.id, n.report_date, x.*, report_features_version()
+        FROM new_rows n
+        CROSS JOIN LATERAL extract_report_features(n.report_text) x
+        ON CONFLICT (report_id) DO NOTHING;
+    ELSIF TG_OP = 'UPDATE' THEN
+        -- Only reports whose text or date changed are re-extracted, so
+        -- reclassification batches (which rewrite every row they touch) cost one anti-join
+        INSERT INTO report_features (
+            report_id, report_date, patnaik_grade, kiupel_grade, mitotic_index, ki67_percent,
+            margin_status, margin_mm, ckit_pattern, tumor_size_cm, extractor_version
+        )
+        SELECT n.id, n.report_date, x.*, report_features_version()
+        FROM new_rows n
+        CROSS JOIN LATERAL extract_report_features(n.report_text) x
+        WHERE NOT EXISTS (SELECT 1 FROM old_rows o
+                          WHERE o.id = n.id
+                            AND o.report_date = n.report_date
+                            AND o.report_text IS NOT DISTINCT FROM n.report_text)
+        ON CONFLICT (report_id) DO UPDATE SET
+            report_date = EXCLUDED.report_date,
+            patnaik_grade = EXCLUDED.patnaik_grade,
+            kiupel_grade = EXCLUDED.kiupel_grade,
+            mitotic_index = EXCLUDED.mitotic_index,
+            ki67_percent = EXCLUDED.ki67_percent,
+            margin_status = EXCLUDED.margin_status,
+            margin_mm = EXCLUDED.margin_mm,
+            ckit_pattern = EXCLUDED.ckit_pattern,
+            tumor_size_cm = EXCLUDED.tumor_size_cm,
+            extractor_version = EXCLUDED.extractor_version;
+    ELSE
+        DELETE FROM report_features f USING old_rows o WHERE f.report_id = o.id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level, like the report counts: a bulk insert or COPY extracts
+-- its whole batch in one INSERT ... SELECT
+DROP TRIGGER IF EXISTS trg_report_features_insert ON pathology_reports;
+CREATE TRIGGER trg_report_features_insert
+    AFTER INSERT ON pathology_reports
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_features_apply();
+
+DROP TRIGGER IF EXISTS trg_report_features_update ON pathology_reports;
+CREATE TRIGGER trg_report_features_update
+    AFTER UPDATE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_features_apply();
+
+DROP TRIGGER IF EXISTS trg_report_features_delete ON pathology_reports;
+CREATE TRIGGER trg_report_features_delete
+    AFTER DELETE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_features_apply();
+
+
+-- Full backfill: after a bulk load with the triggers disabled, a TRUNCATE of
+-- pathology_reports, or a change to the extraction patterns
+CREATE OR REPLACE FUNCTION rebuild_report_features() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE report_features;
+    INSERT INTO report_features (
+        report_id, report_date, patnaik_grade, kiupel_grade, mitotic_index, ki67_percent,
+        margin_status, margin_mm, ckit_pattern, tumor_size_cm, extractor_version
+    )
+    SELECT r.id, r.report_date, x.*, report_features_version()
+    FROM pathology_reports r
+    CROSS JOIN LATERAL extract_report_features(r.report_text) x;
+    ANALYZE report_features;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_report_features();
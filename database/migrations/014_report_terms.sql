@@ -0,0 +1,94 @@
+-- 014_report_terms.sql
+-- Dictionary of the words used in pathology reports, with the number of
+-- reports containing each, for "did you mean" suggestions on misspelled
+-- searches. Words are lower-cased but not stemmed (the 'simple' text search
+-- configuration), so a suggestion is always a word as it appears in reports.
+
+CREATE TABLE IF NOT EXISTS report_terms (
+    term TEXT PRIMARY KEY,
+    doc_count BIGINT NOT NULL
+);
+
+-- Serves the similarity (%) lookups for suggestions
+CREATE INDEX IF NOT EXISTS idx_report_terms_trgm ON report_terms USING GIN (term gin_trgm_ops);
+
+-- Distinct dictionary words of one report: letters first, at least three characters
+-- (numbers, doses and single letters are never worth suggesting), and not an
+-- English stop word (ts_lexize returns an empty array for those): "the" or "with"
+-- would only add the hottest rows to every report's upsert
+CREATE OR REPLACE FUNCTION report_terms_of(p_text TEXT) RETURNS SETOF TEXT AS $$
+    SELECT lexeme FROM unnest(to_tsvector('simple', p_text)) AS t(lexeme)
+    WHERE lexeme ~ '^[a-z][a-z0-9-]{2,}$'
+      AND ts_lexize('english_stem', lexeme) IS DISTINCT FROM '{}'::TEXT[];
+$$ LANGUAGE sql IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION report_terms_apply() RETURNS TRIGGER AS $$
+BEGIN
+    -- Updates only count reports whose text changed
+    IF TG_OP = 'UPDATE' THEN
+        INSERT INTO report_terms (term, doc_count)
+        SELECT w.term, -COUNT(*)
+        FROM old_rows o
+        JOIN new_rows n ON n.id = o.id AND n.report_text IS DISTINCT FROM o.report_text
+        CROSS JOIN LATERAL report_terms_of(o.report_text) AS w(term)
+        GROUP BY 1 ORDER BY 1
+        ON CONFLICT (term) DO UPDATE SET doc_count = report_terms.doc_count + EXCLUDED.doc_count;
+
+        INSERT INTO report_terms (term, doc_count)
+        SELECT w.term, COUNT(*)
+        FROM new_rows n
+        JOIN old_rows o ON o.id = n.id AND o.report_text IS DISTINCT FROM n.report_text
+        CROSS JOIN LATERAL report_terms_of(n.report_text) AS w(term)
+        GROUP BY 1 ORDER BY 1
+        ON CONFLICT (term) DO UPDATE SET doc_count = report_terms.doc_count + EXCLUDED.doc_count;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO report_terms (term, doc_count)
+        SELECT w.term, -COUNT(*)
+        FROM old_rows o CROSS JOIN LATERAL report_terms_of(o.report_text) AS w(term)
+        GROUP BY 1 ORDER BY 1
+        ON CONFLICT (term) DO UPDATE SET doc_count = report_terms.doc_count + EXCLUDED.doc_count;
+    ELSE
+        INSERT INTO report_terms (term, doc_count)
+        SELECT w.term, COUNT(*)
+        FROM new_rows n CROSS JOIN LATERAL report_terms_of(n.report_text) AS w(term)
+        GROUP BY 1 ORDER BY 1
+        ON CONFLICT (term) DO UPDATE SET doc_count = report_terms.doc_count + EXCLUDED.doc_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Statement-level, like the report counts: one upsert per distinct word per
+-- statement. Every branch upserts in term order (ORDER BY 1), so concurrent
+-- writers lock shared rows in the same order and wait rather than deadlock.
+DROP TRIGGER IF EXISTS trg_report_terms_insert ON pathology_reports;
+CREATE TRIGGER trg_report_terms_insert
+    AFTER INSERT ON pathology_reports
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_terms_apply();
+
+DROP TRIGGER IF EXISTS trg_report_terms_update ON pathology_reports;
+CREATE TRIGGER trg_report_terms_update
+    AFTER UPDATE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_terms_apply();
+
+DROP TRIGGER IF EXISTS trg_report_terms_delete ON pathology_reports;
+CREATE TRIGGER trg_report_terms_delete
+    AFTER DELETE ON pathology_reports
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION report_terms_apply();
+
+
+CREATE OR REPLACE FUNCTION rebuild_report_terms() RETURNS VOID AS $$
+BEGIN
+    TRUNCATE report_terms;
+    INSERT INTO report_terms (term, doc_count)
+    SELECT w.term, COUNT(*)
+    FROM pathology_reports r CROSS JOIN LATERAL report_terms_of(r.report_text) AS w(term)
+    GROUP BY 1;
+    ANALYZE report_terms;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT rebuild_report_terms();
@@ -0,0 +1,21 @@
+-- 015_data_versions.sql
+-- Version counter per data dimension, bumped in the same transaction as every
+-- write to that dimension, so caches can tell whether what they hold is current.
+--   cases   - patients and cancer cases (dashboard, incidence, trends, geo, demographics)
+--   reports - pathology reports (search)
+
+CREATE TABLE IF NOT EXISTS data_versions (
+    dimension VARCHAR(32) PRIMARY KEY,
+    version BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO data_versions (dimension) VALUES ('cases'), ('reports') ON CONFLICT DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_data_versions(p_dimensions TEXT[])
+RETURNS TABLE (dimension VARCHAR, version BIGINT) AS $$
+    INSERT INTO data_versions AS d (dimension, version)
+    SELECT DISTINCT unnest(p_dimensions), 1
+    ON CONFLICT (dimension) DO UPDATE SET version = d.version + 1, updated_at = now()
+    RETURNING d.dimension, d.version;
+$$ LANGUAGE sql;
@@ -0,0 +1,37 @@
+-- 016_data_change_notify.sql
+-- Publish every data_versions bump on the registry_data_changed channel, so
+-- each API worker can drop the cached results of the dimensions that
+-- changed. The payload is a JSON object of the new versions, e.g.
+-- {"cases": 42, "reports": 17}. NOTIFY is transactional: listeners hear of
+-- a change only once the write that bumped the version has committed.
+
+CREATE OR REPLACE FUNCTION bump_data_versions(p_dimensions TEXT[])
+RETURNS TABLE (dimension VARCHAR, version BIGINT) AS $$
+#variable_conflict use_column
+DECLARE
+    changed JSONB;
+BEGIN
+    WITH bumped AS (
+        INSERT INTO data_versions AS d (dimension, version)
+        SELECT DISTINCT unnest(p_dimensions), 1
+        ON CONFLICT (dimension) DO UPDATE SET version = d.version + 1, updated_at = now()
+        RETURNING d.dimension, d.version
+    )
+    SELECT jsonb_object_agg(b.dimension, b.version) INTO changed FROM bumped b;
+
+    IF changed IS NOT NULL THEN
+        PERFORM pg_notify('registry_data_changed', changed::TEXT);
+    END IF;
+    RETURN QUERY SELECT e.key::VARCHAR, e.value::BIGINT FROM jsonb_each_text(changed) AS e;
+END;
+$$ LANGUAGE plpgsql;
+
+
+-- Refresh the materialized views from migration 006 and announce it
+CREATE OR REPLACE FUNCTION refresh_registry_views() RETURNS VOID AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW mv_county_cancer_incidence;
+    REFRESH MATERIALIZED VIEW mv_yearly_trends;
+    PERFORM bump_data_versions(ARRAY['cases']);
+END;
+$$ LANGUAGE plpgsql;
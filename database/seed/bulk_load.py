@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Bulk-load mode for the mock data generator, for load-testing datasets of
+millions of cases.
+
+Rows from seed_mock_data's chunk generator are streamed into the database
+with COPY FROM STDIN, one chunk per transaction, by a pool of worker
+processes that each generate and load their own chunks over their own
+connection. For the duration of the load:
+
+- secondary indexes on the loaded and derived tables are dropped and
+  rebuilt afterwards, in parallel;
+- trigger maintenance of fact_cases, the demographic sketches, report
+  counts, features and terms is switched off, and each derived table is
+  rebuilt once with its rebuild_*() function instead.
+
+The materialized views and county boundaries are built last, then
+everything is ANALYZEd. Indexes and triggers are restored even if the load
+fails. Other writers must not run during a bulk load: their rows would
+bypass the disabled triggers.
+
+COPY uses the text format: psycopg2 has no binary COPY encoder, and with
+indexes and triggers deferred the server-side parse is not the bottleneck.
+
+Usage:
+    python bulk_load.py --scale 2000 [--workers 8] [--seed 42] [--chunk-size 100000]
+"""
+
+import io
+import os
+import time
+import argparse
+from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import psycopg2
+
+import seed_mock_data
+
+# Tables rows are copied into
+COPY_COLUMNS = {
+    "patients": ("id", "species_id", "breed_id", "sex", "age_years", "weight_kg",
+                 "county_id", "registered_date"),
+    "cancer_cases": ("id", "patient_id", "cancer_type_id", "diagnosis_date",
+                     "stage", "outcome", "county_id"),
+    "pathology_reports": ("case_id", "report_text", "classification", "confidence_score", "report_date"),
+}
+
+# Trigger-maintained tables, rebuilt in one pass after the load
+DERIVED_TABLES = ["fact_cases", "report_features", "report_terms"]
+REBUILD_FUNCTIONS = [
+    "rebuild_fact_cases", "rebuild_demographic_sketches", "rebuild_report_counts",
+    "rebuild_report_features", "rebuild_report_terms",
+]
+
+# Memory for each parallel CREATE INDEX / rebuild session
+MAINTENANCE_WORK_MEM = "512MB"
+
+def copy_rows(cur, table: str, rows: list):
+    """COPY rows (tuples in COPY_COLUMNS order) into a table in text format."""
+    if not rows:
+        return
+    data = io.StringIO("".join("\t".join(map(seed_mock_data.copy_value, row)) + "\n" for row in rows))
+    cur.copy_expert(f"COPY {table} ({', '.join(COPY_COLUMNS[table])}) FROM STDIN", data)
+
+
+def secondary_indexes(cur, tables: list) -> list:
+    """(name, definition) of every index on the tables that backs no constraint.
+
+    Indexes of partitioned tables are listed once, on the parent; dropping
+    and recreating the parent index covers every partition.
+    """
+    cur.execute("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indrelid = ANY(%s::regclass[])
+          AND NOT i.indisprimary AND NOT i.indisunique
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+        ORDER BY c.relname
+    """, (tables,))
+    # Partitioned indexes are reported ON ONLY the parent, which would skip the partitions
+    return [(name, definition.replace(" ON ONLY ", " ON ", 1)) for name, definition in cur.fetchall()]
+
+
+def run_parallel(statements: list, workers: int):
+    """Run independent statements concurrently, one connection each."""
+    def execute(statement):
+        conn = psycopg2.connect(seed_mock_data.DATABASE_URL)
+        conn.autocommit = True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SET maintenance_work_mem = %s", (MAINTENANCE_WORK_MEM,))
+                started = time.perf_counter()
+                cur.execute(statement)
+                print(f"  {statement.split('(')[0][:70]} ({time.perf_counter() - started:.1f}s)")
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        list(pool.map(execute, statements))
+
+
+# --- Worker processes: each generates and copies whole chunks ---
+
+_worker = {}
+
+
+def _init_worker(lookups: dict, total_cases: int, seed: int, chunk_size: int):
+    conn = psycopg2.connect(seed_mock_data.DATABASE_URL)
+    # Chunks can be regenerated from their seed, so a lost commit only costs a rerun
+    with conn.cursor() as cur:
+        cur.execute("SET synchronous_commit = off")
+    conn.commit()
+    _worker.update(conn=conn, lookups=lookups, total_cases=total_cases, seed=seed,
+                   chunk_size=chunk_size)
+
+
+def _load_chunk(index: int) -> tuple:
+    """Generate chunk `index` exactly as seed_mock_data.generate_chunks would, and COPY it."""
+    first = index * _worker["chunk_size"]
+    size = min(_worker["chunk_size"], _worker["total_cases"] - first)
+    rng = np.random.default_rng([_worker["seed"], index])
+    patients, cases, reports = seed_mock_data.generate_chunk(rng, _worker["lookups"], first + 1, size)
+    conn = _worker["conn"]
+    with conn.cursor() as cur:
+        copy_rows(cur, "patients", patients)
+        copy_rows(cur, "cancer_cases", cases)
+        copy_rows(cur, "pathology_reports", reports)
+    conn.commit()
+    return len(patients), len(cases), len(reports)
+
+
+def run(total_cases: int, workers: int = os.cpu_count(), seed: int = 42,
+        chunk_size: int = seed_mock_data.CHUNK_CASES):
+    workers = max(1, workers or 1)
+    conn = psycopg2.connect(seed_mock_data.DATABASE_URL)
+    conn.autocommit = True
+    cur = conn.cursor()
+    started = time.perf_counter()
+
+    print("Loading lookup data...")
+    lookups = seed_mock_data.load_lookups(cur)
+    # Every year a case or its report can fall in; partitions created later would not
+    # inherit the disabled trigger state
+    cur.execute("SELECT ensure_year_partitions(%s, %s)",
+                (int(seed_mock_data.YEARS[0]), int(seed_mock_data.YEARS[-1]) + 1))
+
+    tables = list(COPY_COLUMNS) + DERIVED_TABLES
+    indexes = secondary_indexes(cur, tables)
+    print(f"Dropping {len(indexes)} secondary indexes and disabling derived-table triggers...")
+    try:
+        for name, _ in indexes:
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+        for table in COPY_COLUMNS:
+            cur.execute(f"ALTER TABLE {table} DISABLE TRIGGER USER")
+
+        chunks = range((total_cases + chunk_size - 1) // chunk_size)
+        print(f"Copying {total_cases:,} cases in {len(chunks)} chunks over {workers} connections...")
+        patients = cases = reports = 0
+        with Pool(workers, initializer=_init_worker,
+                  initargs=(lookups, total_cases, seed, chunk_size)) as pool:
+            for n_patients, n_cases, n_reports in pool.imap_unordered(_load_chunk, chunks):
+                patients += n_patients
+                cases += n_cases
+                reports += n_reports
+                elapsed = time.perf_counter() - started
+                print(f"  {cases:,} cases, {reports:,} reports ({cases / elapsed:,.0f} cases/s)")
+        loaded = time.perf_counter()
+    finally:
+        for table in COPY_COLUMNS:
+            cur.execute(f"ALTER TABLE {table} ENABLE TRIGGER USER")
+        print("Rebuilding derived tables...")
+        run_parallel([f"SELECT {function}()" for function in REBUILD_FUNCTIONS], workers)
+        print(f"Recreating {len(indexes)} indexes...")
+        run_parallel([definition for _, definition in indexes], workers)
+
+    seed_mock_data.reset_sequences(cur)
+    seed_mock_data.create_materialized_views(cur)
+    seed_mock_data.load_county_boundaries(cur)
+    seed_mock_data.announce_data_change(cur)
+    print("Analyzing...")
+    cur.execute("ANALYZE")
+    cur.close()
+    conn.close()
+    print(f"Done! Loaded {patients:,} patients, {cases:,} cases, {reports:,} reports: "
+          f"copy {loaded - started:.0f}s, total {time.perf_counter() - started:.0f}s.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk-load mock cancer cases with parallel COPY.")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--cases", type=int, default=seed_mock_data.BASE_CASES,
+                      help=f"Number of cancer cases to generate (default: {seed_mock_data.BASE_CASES})")
+    size.add_argument("--scale", type=float,
+                      help=f"Scale factor over {seed_mock_data.BASE_CASES:,} cases, e.g. 2000 for 10M")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Parallel COPY connections (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=seed_mock_data.CHUNK_CASES,
+                        help=f"Cases per COPY transaction (default: {seed_mock_data.CHUNK_CASES})")
+    args = parser.parse_args()
+    total = round(seed_mock_data.BASE_CASES * args.scale) if args.scale else args.cases
+    run(total, workers=args.workers, seed=args.seed, chunk_size=args.chunk_size)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Generate a large mock pathology report corpus for search benchmarks.
+
+Reports are rendered from seed_mock_data's precompiled templates, with cancer
+types in the registry's species-weighted mix, and streamed to a JSONL or
+PostgreSQL COPY (text format) file, gzip-compressed when the output name ends
+in .gz. A pool of worker processes renders, encodes and compresses whole
+chunks; the parent writes them in chunk order, so memory stays bounded by a
+few chunks and the output is byte-for-byte identical for a given seed and
+chunk size, whatever the number of workers. Compressed chunks are separate
+gzip members, which gzip, zcat and Python read as one stream.
+
+Rows carry (case_id, report_text, classification, confidence_score,
+report_date); case ids are drawn from 1..--cases. Report ids are left to the
+pathology_reports sequence, so a corpus loads into a seeded database without
+colliding with existing reports. The partitioned table has no foreign key on
+case_id, so a COPY file loads directly once its year partitions exist:
+
+    SELECT ensure_year_partitions(1995, 2025);
+    \\copy pathology_reports (case_id, report_text, classification, confidence_score, report_date)
+        FROM PROGRAM 'gunzip -c reports.copy.gz'
+
+Usage:
+    python generate_report_corpus.py --reports 5000000 --output reports.copy.gz [--workers 8] [--seed 42]
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+from multiprocessing import Pool
+
+import numpy as np
+
+import seed_mock_data
+
+CORPUS_COLUMNS = ("case_id", "report_text", "classification", "confidence_score", "report_date")
+
+FORMATS = ("jsonl", "copy")
+
+# Reports rendered, encoded and compressed per worker task
+CHUNK_REPORTS = 50_000
+
+
+def cancer_type_probabilities() -> np.ndarray:
+    """P(cancer type) over all species: sum of P(species) * P(cancer type | species)."""
+    species = seed_mock_data.probabilities(seed_mock_data.SPECIES_WEIGHTS)
+    p = np.zeros(len(seed_mock_data.CANCER_TYPES))
+    for share, name in zip(species, seed_mock_data.SPECIES):
+        weights = seed_mock_data.CANCER_BY_SPECIES[name]
+        for cancer_type, q in zip(weights, seed_mock_data.probabilities(weights)):
+            p[seed_mock_data.CANCER_TYPES.index(cancer_type)] += share * q
+    return p
+
+
+CANCER_TYPE_P = cancer_type_probabilities()
+
+
+def generate_reports(rng: np.random.Generator, size: int, cases: int) -> list:
+    """Rows in CORPUS_COLUMNS order for `size` reports."""
+    types = rng.choice(len(seed_mock_data.CANCER_TYPES), size=size, p=CANCER_TYPE_P)
+    classifications = [seed_mock_data.CANCER_TYPES[t] for t in types]
+    case_ids = rng.integers(1, cases + 1, size=size)
+    confidence = np.round(rng.uniform(0.75, 0.99, size=size), 4)
+    year = seed_mock_data.YEARS[rng.choice(len(seed_mock_data.YEARS), size=size,
+                                           p=seed_mock_data.probabilities(seed_mock_data.YEAR_WEIGHTS))]
+    report_dates = (((year - 1970) * 12).astype("datetime64[M]").astype("datetime64[D]")
+                    + rng.integers(0, 365, size=size).astype("timedelta64[D]"))
+    return list(zip(
+        case_ids.tolist(), seed_mock_data.render_reports(rng, classifications), classifications,
+        confidence.tolist(), report_dates.tolist(),
+    ))
+
+
+def encode(rows: list, fmt: str) -> bytes:
+    if fmt == "copy":
+        lines = ("\t".join(map(seed_mock_data.copy_value, row)) + "\n" for row in rows)
+    else:
+        lines = (json.dumps({
+            "case_id": case_id, "report_text": text, "classification": classification,
+            "confidence_score": confidence, "report_date": report_date.isoformat(),
+        }) + "\n" for case_id, text, classification, confidence, report_date in rows)
+    return "".join(lines).encode()
+
+
+# --- Worker processes: each renders and encodes whole chunks ---
+
+_worker = {}
+
+
+def _init_worker(total: int, cases: int, seed: int, chunk_size: int, fmt: str, compress: bool):
+    _worker.update(total=total, cases=cases, seed=seed, chunk_size=chunk_size, fmt=fmt, compress=compress)
+
+
+def _render_chunk(index: int) -> tuple:
+    size = min(_worker["chunk_size"], _worker["total"] - index * _worker["chunk_size"])
+    rng = np.random.default_rng([_worker["seed"], index])
+    data = encode(generate_reports(rng, size, _worker["cases"]), _worker["fmt"])
+    if _worker["compress"]:
+        # Each chunk is its own gzip member; concatenated members are one valid gzip stream
+        data = gzip.compress(data, compresslevel=6, mtime=0)
+    return size, data
+
+
+def run(total: int, output: str, fmt: str, cases: int = 1_000_000, workers: int = os.cpu_count(),
+        seed: int = 42, chunk_size: int = CHUNK_REPORTS):
+    compress = output.endswith(".gz")
+    chunks = range((total + chunk_size - 1) // chunk_size)
+    started = time.perf_counter()
+    written = size = 0
+    print(f"Generating {total:,} reports in {len(chunks)} chunks over {max(1, workers or 1)} processes...",
+          file=sys.stderr)
+    out = sys.stdout.buffer if output == "-" else open(output, "wb")
+    try:
+        with Pool(max(1, workers or 1), initializer=_init_worker,
+                  initargs=(total, cases, seed, chunk_size, fmt, compress)) as pool:
+            # imap keeps chunk order: the output does not depend on scheduling
+            for count, data in pool.imap(_render_chunk, chunks):
+                out.write(data)
+                written += count
+                size += len(data)
+                rate = written / (time.perf_counter() - started)
+                print(f"  {written:,} reports, {size / 2**20:,.0f} MiB ({rate:,.0f} reports/s)", file=sys.stderr)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+    print(f"Done! {written:,} reports -> {output} in {time.perf_counter() - started:.1f}s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a mock pathology report corpus for search benchmarks.")
+    parser.add_argument("--reports", type=int, default=1_000_000, help="Number of reports (default: 1000000)")
+    parser.add_argument("--output", required=True,
+                        help="Output file, gzip-compressed if it ends in .gz; - for stdout")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="jsonl or copy (PostgreSQL COPY text); default from the output name, else jsonl")
+    parser.add_argument("--cases", type=int, default=1_000_000,
+                        help="Case ids are drawn from 1..CASES (default: 1000000)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="Rendering processes (default: CPU count)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (default: 42)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_REPORTS,
+                        help=f"Reports per worker task (default: {CHUNK_REPORTS})")
+    args = parser.parse_args()
+    fmt = args.format or ("copy" if ".copy" in args.output or ".tsv" in args.output else "jsonl")
+    run(args.reports, args.output, fmt, cases=args.cases, workers=args.workers,
+        seed=args.seed, chunk_size=args.chunk_size)
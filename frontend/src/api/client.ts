@@ -52,6 +52,20 @@ export interface FilterOptions {
   year_range: number[];
 }
 
+export interface FacetOption {
+  id: number;
+  name: string;
+  count: number;
+}
+
+export interface FacetCounts {
+  total: number;
+  species: FacetOption[];
+  cancer_types: FacetOption[];
+  counties: FacetOption[];
+  breeds: FacetOption[];
+}
+
 interface FilterParams {
   species?: string[];
   cancerTypes?: string[];
@@ -100,6 +114,12 @@ export async function fetchFilterOptions(): Promise<FilterOptions> {
   return fetchJson('/api/v1/dashboard/filters');
 }
 
+export async function fetchFacets(filters: FilterParams = {}): Promise<FacetCounts> {
+  const params = filtersToParams(filters);
+  const url = params.toString() ? `/api/v1/dashboard/facets?${params}` : '/api/v1/dashboard/facets';
+  return fetchJson(url);
+}
+
 export async function fetchIncidence(filters: FilterParams = {}): Promise<IncidenceResponse> {
   const params = filtersToParams(filters);
   const url = params.toString() ? `/api/v1/incidence?${params}` : '/api/v1/incidence';
@@ -9,10 +9,13 @@ Production usage would be:
     from transformers import AutoTokenizer, AutoModelForSequenceClassification
     tokenizer = AutoTokenizer.from_pretrained("bert-base-uncased")
     model = AutoModelForSequenceClassification.from_pretrained("./vetbert-finetuned")
+
+The backend serves such a model with CLASSIFIER_BACKEND=transformer once it has
+been exported with ml/scripts/export_onnx.py.
 """
 
 import re
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 
 CANCER_LABELS = [
@@ -72,6 +75,39 @@ KEYWORD_WEIGHTS: Dict[str, List[Tuple[str, float]]] = {
 }
 
 
+_REGEX_META = set(".^$*+?{}[]\\()")
+
+
+def _literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """Lower-cased literals of a plain `a|b` pattern, or None if it needs the regex engine.
+
+    Alternatives that could overlap each other are left to the regex, whose
+    leftmost non-overlapping match count would differ from the summed counts.
+    """
+    if any(ch in _REGEX_META for ch in pattern):
+        return None
+    literals = [alt.lower() for alt in pattern.split("|")]
+    for i, a in enumerate(literals):
+        if not a:
+            return None
+        for j, b in enumerate(literals):
+            if i != j and (a in b or any(a.endswith(b[:k]) for k in range(1, len(b)))):
+                return None
+    return literals
+
+
+def _match_counter(pattern: str) -> Callable[[str, str], int]:
+    """Count of case-insensitive matches given (text, lower-cased ASCII text)."""
+    literals = _literal_alternatives(pattern)
+    if literals is None:
+        compiled = re.compile(pattern, re.IGNORECASE)
+        return lambda text, lowered: len(compiled.findall(text))
+    if len(literals) == 1:
+        literal = literals[0]
+        return lambda text, lowered: lowered.count(literal)
+    return lambda text, lowered: sum(lowered.count(literal) for literal in literals)
+
+
 class VetBERTClassifier:
     """Mock VetBERT classifier using weighted keyword matching."""
 
@@ -81,16 +117,31 @@ class VetBERTClassifier:
                      for pattern, weight in patterns]
             for cancer, patterns in KEYWORD_WEIGHTS.items()
         }
+        # Literal keywords are counted with str.count on the lowered text, which
+        # for ASCII input equals the number of IGNORECASE findall matches
+        self.counters = {
+            cancer: [(_match_counter(pattern), weight) for pattern, weight in patterns]
+            for cancer, patterns in KEYWORD_WEIGHTS.items()
+        }
 
     def predict(self, text: str) -> Dict:
         scores: Dict[str, float] = {}
 
-        for cancer_type, patterns in self.compiled_patterns.items():
-            score = 0.0
-            for pattern, weight in patterns:
-                matches = pattern.findall(text)
-                score += len(matches) * weight
-            scores[cancer_type] = score
+        if text.isascii():
+            lowered = text.lower()
+            for cancer_type, counters in self.counters.items():
+                score = 0.0
+                for count, weight in counters:
+                    score += count(text, lowered) * weight
+                scores[cancer_type] = score
+        else:
+            # Unicode case folding is only honoured by the regex engine
+            for cancer_type, patterns in self.compiled_patterns.items():
+                score = 0.0
+                for pattern, weight in patterns:
+                    matches = pattern.findall(text)
+                    score += len(matches) * weight
+                scores[cancer_type] = score
 
         total = sum(scores.values())
         if total == 0:
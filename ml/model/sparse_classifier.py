@@ -0,0 +1,134 @@
+"""
+Vectorized batch scoring for the VetBERT keyword classifier.
+
+Mirrors backend/app/services/sparse_classifier.py for KEYWORD_WEIGHTS: a batch
+of lower-cased reports is joined into one corpus, keyword hits are binned per
+report into a SciPy sparse term-count matrix (reports x patterns), and label
+scores are the counts times the per-pattern weights, normalized with array
+operations. predict_batch returns exactly what VetBERTClassifier.predict
+returns for each report.
+
+Usage:
+    from sparse_classifier import SparseVetBERTClassifier
+    results = SparseVetBERTClassifier().predict_batch(texts)
+"""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from scipy import sparse
+
+from classifier import CANCER_LABELS, KEYWORD_WEIGHTS, VetBERTClassifier, _literal_alternatives
+
+SEPARATOR = "\n"
+
+
+def _lowered_regex(pattern: str) -> "re.Pattern":
+    """Regex equivalent to `pattern` with IGNORECASE on lower-cased ASCII text."""
+    if "\\" not in pattern.replace("\\b", ""):
+        return re.compile(pattern.lower())
+    return re.compile(pattern, re.IGNORECASE)
+
+
+def _corpus_safe(regex: "re.Pattern") -> bool:
+    """Whether no match of the regex can span the newline joining two reports."""
+    source = regex.pattern
+    return "[" not in source and "\\" not in source.replace("\\b", "") and regex.fullmatch("") is None
+
+
+class SparseVetBERTClassifier:
+    """Batch scorer with the same patterns, weights and outputs as VetBERTClassifier."""
+
+    def __init__(self):
+        self.labels = list(KEYWORD_WEIGHTS)
+        self.pattern_labels = np.array([
+            label for label, patterns in enumerate(KEYWORD_WEIGHTS.values()) for _ in patterns
+        ])
+        self.weights = np.array([weight for patterns in KEYWORD_WEIGHTS.values() for _, weight in patterns])
+        self.literals: List[Optional[List[str]]] = []
+        self.regexes: List[Optional["re.Pattern"]] = []
+        self.corpus_safe: List[bool] = []
+        for patterns in KEYWORD_WEIGHTS.values():
+            for pattern, _ in patterns:
+                literals = _literal_alternatives(pattern)
+                if literals is not None and any(SEPARATOR in literal for literal in literals):
+                    literals = None
+                regex = _lowered_regex(pattern) if literals is None else None
+                self.literals.append(literals)
+                self.regexes.append(regex)
+                self.corpus_safe.append(regex is None or _corpus_safe(regex))
+        # Non-ASCII reports need the regex engine's Unicode case folding
+        self.fallback = VetBERTClassifier()
+
+    def term_counts(self, texts: Sequence[str]) -> sparse.csc_matrix:
+        """Sparse (ASCII reports x patterns) matrix of case-insensitive match counts."""
+        lowered = [text.lower() for text in texts]
+        corpus = SEPARATOR.join(lowered)
+        ends = np.cumsum([len(text) + len(SEPARATOR) for text in lowered], dtype=np.int64)
+
+        rows, cols, data = [], [], []
+        for j, literals in enumerate(self.literals):
+            regex = self.regexes[j]
+            if self.corpus_safe[j]:
+                positions = []
+                if regex is not None:
+                    positions = [m.start() for m in regex.finditer(corpus)]
+                for literal in literals or ():
+                    find, step = corpus.find, len(literal)
+                    at = find(literal)
+                    while at != -1:
+                        positions.append(at)
+                        at = find(literal, at + step)
+                owners = np.searchsorted(ends, np.array(positions, dtype=np.int64), side="right")
+                counts = np.ones(len(owners), dtype=np.int64)
+            else:
+                per_report = np.array([len(regex.findall(text)) for text in lowered], dtype=np.int64)
+                owners = per_report.nonzero()[0]
+                counts = per_report[owners]
+            rows.append(owners)
+            cols.append(np.full(len(owners), j))
+            data.append(counts)
+
+        # Duplicate (report, pattern) entries are summed into the count
+        return sparse.coo_matrix(
+            (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+            shape=(len(texts), len(self.pattern_labels)),
+        ).tocsc()
+
+    def scores(self, counts: sparse.csc_matrix) -> np.ndarray:
+        """(reports x labels) scores, accumulated pattern by pattern in KEYWORD_WEIGHTS order."""
+        scores = np.zeros((counts.shape[0], len(self.labels)))
+        for j in range(counts.shape[1]):
+            scores[:, self.pattern_labels[j]] += counts[:, j].toarray().ravel() * self.weights[j]
+        return scores
+
+    def predict_batch(self, texts: Sequence[str]) -> List[Dict]:
+        ascii_rows = [i for i, text in enumerate(texts) if text.isascii()]
+        results: List[Optional[Dict]] = [None] * len(texts)
+        for i, text in enumerate(texts):
+            if not text.isascii():
+                results[i] = self.fallback.predict(text)
+        if not ascii_rows:
+            return results
+
+        scores = self.scores(self.term_counts([texts[i] for i in ascii_rows]))
+        total = scores[:, 0].copy()
+        for label in range(1, len(self.labels)):
+            total += scores[:, label]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            probabilities = (scores / total[:, None]).tolist()
+        uniform = {ct: 1.0 / len(CANCER_LABELS) for ct in CANCER_LABELS}
+
+        for row, i in enumerate(ascii_rows):
+            if total[row] == 0:
+                probs = uniform
+            else:
+                probs = dict(zip(self.labels, probabilities[row]))
+            sorted_preds = sorted(probs.items(), key=lambda x: x[1], reverse=True)
+            results[i] = {
+                "predicted_label": sorted_preds[0][0],
+                "confidence": round(sorted_preds[0][1], 4),
+                "all_probabilities": {ct: round(p, 4) for ct, p in sorted_preds},
+            }
+        return results
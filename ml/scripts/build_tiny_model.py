@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Build a tiny VetBERT-shaped ONNX model for offline testing of the transformer backend.
+
+The model has the inputs and output of an exported BERT sequence classifier
+(input_ids, attention_mask -> logits) and a WordPiece tokenizer, but only a
+32-wide embedding, one masked self-attention layer and a linear head. Its
+weights are set from the KEYWORD_WEIGHTS table rather than trained, so
+predictions track the keyword classifier closely enough to eyeball. Nothing
+is downloaded; the output directory is what TRANSFORMER_MODEL_DIR expects.
+
+Usage:
+    python ml/scripts/build_tiny_model.py --output ml/model/vetbert-tiny
+"""
+
+import re
+import sys
+import json
+import argparse
+from pathlib import Path
+
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+from tokenizers import Tokenizer, decoders, models, normalizers, pre_tokenizers, processors
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "model"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from classifier import KEYWORD_WEIGHTS  # noqa: E402
+from generate_mock_reports import REPORT_TEMPLATES, FILLS  # noqa: E402
+
+SPECIAL_TOKENS = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"]
+HIDDEN = 32
+
+
+def keyword_phrases(pattern: str):
+    """Plain-text alternatives of a keyword regex."""
+    for alternative in pattern.split("|"):
+        yield re.sub(r"\\b|[()?\\]", "", alternative).lower()
+
+
+def build_tokenizer(vocab_words) -> Tokenizer:
+    characters = sorted({ch for word in vocab_words for ch in word} | set("abcdefghijklmnopqrstuvwxyz0123456789"))
+    vocab = list(SPECIAL_TOKENS)
+    vocab += sorted(set(vocab_words) | set(characters))
+    vocab += ["##" + ch for ch in characters]
+    tokenizer = Tokenizer(models.WordPiece({token: i for i, token in enumerate(vocab)}, unk_token="[UNK]"))
+    tokenizer.normalizer = normalizers.BertNormalizer(lowercase=True)
+    tokenizer.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]", special_tokens=[("[CLS]", 2), ("[SEP]", 3)]
+    )
+    tokenizer.decoder = decoders.WordPiece()
+    return tokenizer
+
+
+def build_weights(tokenizer: Tokenizer, labels, rng: np.random.Generator):
+    vocab = tokenizer.get_vocab()
+    embeddings = rng.normal(0, 0.02, (len(vocab), HIDDEN)).astype(np.float32)
+    embeddings[:, :len(labels)] = 0.0
+    for label, (_, patterns) in enumerate(KEYWORD_WEIGHTS.items()):
+        for pattern, weight in patterns:
+            for phrase in keyword_phrases(pattern):
+                ids = tokenizer.encode(phrase, add_special_tokens=False).ids
+                for token_id in ids:
+                    embeddings[token_id, label] += weight / len(ids)
+    head = np.zeros((HIDDEN, len(labels)), dtype=np.float32)
+    head[:len(labels), :len(labels)] = np.eye(len(labels))
+    return {
+        "embeddings": embeddings,
+        "w_query": rng.normal(0, 0.1, (HIDDEN, HIDDEN)).astype(np.float32),
+        "w_key": rng.normal(0, 0.1, (HIDDEN, HIDDEN)).astype(np.float32),
+        "w_value": rng.normal(0, 0.05, (HIDDEN, HIDDEN)).astype(np.float32),
+        "w_head": head,
+        "b_head": np.zeros(len(labels), dtype=np.float32),
+        "scale": np.array(1 / np.sqrt(HIDDEN), dtype=np.float32),
+        "mask_bias": np.array(-10000.0, dtype=np.float32),
+        "one": np.array(1.0, dtype=np.float32),
+        "axis1": np.array([1], dtype=np.int64),
+        "axis2": np.array([2], dtype=np.int64),
+    }
+
+
+def build_graph(weights) -> onnx.ModelProto:
+    node = helper.make_node
+    nodes = [
+        node("Gather", ["embeddings", "input_ids"], ["x"]),                   # [B, T, H]
+        node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),     # [B, T]
+        node("MatMul", ["x", "w_query"], ["q"]),
+        node("MatMul", ["x", "w_key"], ["k"]),
+        node("MatMul", ["x", "w_value"], ["v"]),
+        node("Transpose", ["k"], ["k_t"], perm=[0, 2, 1]),
+        node("MatMul", ["q", "k_t"], ["raw_scores"]),                         # [B, T, T]
+        node("Mul", ["raw_scores", "scale"], ["scores"]),
+        # Padding keys get a large negative bias, as in BERT's extended attention mask
+        node("Sub", ["one", "mask"], ["padding"]),
+        node("Mul", ["padding", "mask_bias"], ["key_bias_2d"]),
+        node("Unsqueeze", ["key_bias_2d", "axis1"], ["key_bias"]),           # [B, 1, T]
+        node("Add", ["scores", "key_bias"], ["masked_scores"]),
+        node("Softmax", ["masked_scores"], ["attention"], axis=-1),
+        node("MatMul", ["attention", "v"], ["context"]),
+        node("Add", ["x", "context"], ["hidden"]),
+        node("Unsqueeze", ["mask", "axis2"], ["mask_3d"]),                   # [B, T, 1]
+        node("Mul", ["hidden", "mask_3d"], ["masked_hidden"]),
+        node("ReduceSum", ["masked_hidden", "axis1"], ["pooled"], keepdims=0),  # [B, H]
+        node("MatMul", ["pooled", "w_head"], ["head"]),
+        node("Add", ["head", "b_head"], ["logits"]),
+    ]
+    graph = helper.make_graph(
+        nodes,
+        "vetbert_tiny",
+        inputs=[
+            helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+            helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"]),
+        ],
+        outputs=[helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", len(weights["b_head"])])],
+        initializer=[numpy_helper.from_array(value, name) for name, value in weights.items()],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+    return model
+
+
+def template_words():
+    text = re.sub(r"\{\w+\}", " ", " ".join(t for templates in REPORT_TEMPLATES.values() for t in templates))
+    text += " " + " ".join(str(v) for values in FILLS.values() for v in values)
+    return text
+
+
+def main(output: Path, seed: int):
+    labels = list(KEYWORD_WEIGHTS)
+    probe = build_tokenizer([])
+    words = set()
+    corpus = [template_words()] + [p for ps in KEYWORD_WEIGHTS.values() for pattern, _ in ps
+                                   for p in keyword_phrases(pattern)]
+    for text in corpus:
+        normalized = probe.normalizer.normalize_str(text)
+        words.update(word for word, _ in probe.pre_tokenizer.pre_tokenize_str(normalized))
+    tokenizer = build_tokenizer(sorted(words))
+
+    weights = build_weights(tokenizer, labels, np.random.default_rng(seed))
+    model = build_graph(weights)
+
+    output.mkdir(parents=True, exist_ok=True)
+    onnx.save(model, str(output / "model.onnx"))
+    tokenizer.save(str(output / "tokenizer.json"))
+    (output / "config.json").write_text(json.dumps({
+        "architectures": ["VetBERTTiny"],
+        "id2label": {str(i): label for i, label in enumerate(labels)},
+        "label2id": {label: i for i, label in enumerate(labels)},
+        "hidden_size": HIDDEN,
+    }, indent=2))
+    print(f"Wrote {output} ({tokenizer.get_vocab_size()} tokens, {len(labels)} labels)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a tiny ONNX VetBERT for offline testing.")
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parents[1] / "model" / "vetbert-tiny")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    main(args.output, args.seed)
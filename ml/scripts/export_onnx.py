@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Export a fine-tuned VetBERT checkpoint to the layout the transformer backend loads.
+
+Writes model.onnx (dynamic batch and sequence axes, output "logits"),
+tokenizer.json and config.json into the output directory, which is then
+served with CLASSIFIER_BACKEND=transformer and TRANSFORMER_MODEL_DIR.
+
+Usage:
+    python ml/scripts/export_onnx.py --model ./vetbert-finetuned --output ml/model/vetbert-onnx
+"""
+
+import argparse
+from pathlib import Path
+
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+
+def export(model_path: str, output: Path, opset: int):
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    model.config.return_dict = False
+
+    sample = tokenizer(["Histopathology of the cutaneous mass"], return_tensors="pt")
+    names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in names}
+    dynamic["logits"] = {0: "batch"}
+
+    output.mkdir(parents=True, exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in names), str(output / "model.onnx"),
+            input_names=names, output_names=["logits"], dynamic_axes=dynamic, opset_version=opset,
+        )
+    # Fast tokenizers save tokenizer.json alongside the vocab files
+    tokenizer.save_pretrained(str(output))
+    model.config.save_pretrained(str(output))
+    print(f"Exported {model_path} to {output} ({len(model.config.id2label)} labels)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a fine-tuned VetBERT to ONNX.")
+    parser.add_argument("--model", required=True, help="Fine-tuned checkpoint directory or hub id")
+    parser.add_argument("--output", type=Path, default=Path(__file__).resolve().parents[1] / "model" / "vetbert-onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+    export(args.model, args.output, args.opset)
@@ -6,6 +6,7 @@ This script can be run standalone to generate sample reports for testing.
 
 import random
 import json
+from string import Formatter
 
 
 REPORT_TEMPLATES = {
@@ -66,15 +67,40 @@ FILLS = {
 }
 
 
-def generate_report(cancer_type: str) -> str:
-    templates = REPORT_TEMPLATES.get(cancer_type, REPORT_TEMPLATES["Lymphoma"])
-    template = random.choice(templates)
-    result = template
-    for key, values in FILLS.items():
-        placeholder = "{" + key + "}"
-        while placeholder in result:
-            result = result.replace(placeholder, random.choice(values), 1)
-    return result
+def compile_templates(templates: dict, fills: dict) -> dict:
+    """Split each template into literal text and the fill lists of its placeholders, once.
+
+    Shared with database/seed/seed_mock_data.py, which has its own templates and fills.
+    """
+    compiled = {}
+    for cancer_type, texts in templates.items():
+        compiled[cancer_type] = []
+        for template in texts:
+            literals, slots = [""], []
+            for literal, field, _, _ in Formatter().parse(template):
+                literals[-1] += literal
+                if field is None:
+                    continue
+                if field in fills:
+                    slots.append(fills[field])
+                    literals.append("")
+                else:
+                    literals[-1] += "{" + field + "}"
+            compiled[cancer_type].append((literals, slots))
+    return compiled
+
+
+COMPILED_TEMPLATES = compile_templates(REPORT_TEMPLATES, FILLS)
+
+
+def generate_report(cancer_type: str, rng=random) -> str:
+    templates = COMPILED_TEMPLATES.get(cancer_type, COMPILED_TEMPLATES["Lymphoma"])
+    literals, slots = rng.choice(templates)
+    parts = [literals[0]]
+    for values, literal in zip(slots, literals[1:]):
+        parts.append(rng.choice(values))
+        parts.append(literal)
+    return "".join(parts)
 
 
 if __name__ == "__main__":